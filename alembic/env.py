@@ -11,6 +11,8 @@ from app.models.base import Base
 from app.models.user import User
 from app.models.message import Message
 from app.models.document import Document
+from app.models.llm_usage import LLMUsage
+from app.models.document_chunk import DocumentChunk
 from app.config.settings import settings
 
 config = context.config
@@ -0,0 +1,48 @@
+"""add_llm_usage_table
+
+Revision ID: 7c2e91d4a5b8
+Revises: 3bfa14b553ce
+Create Date: 2026-10-19 09:12:44.318201
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '7c2e91d4a5b8'
+down_revision: Union[str, None] = '3bfa14b553ce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_usage',
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.Column('agent_type', sa.String(length=50), nullable=True),
+    sa.Column('node', sa.String(length=100), nullable=True),
+    sa.Column('model', sa.String(length=255), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+    sa.Column('completion_tokens', sa.Integer(), nullable=False),
+    sa.Column('cached_tokens', sa.Integer(), nullable=False),
+    sa.Column('total_tokens', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Float(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_usage_id'), 'llm_usage', ['id'], unique=False)
+    op.create_index('ix_llm_usage_user_created', 'llm_usage', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_llm_usage_session_id', 'llm_usage', ['session_id'], unique=False)
+    op.create_index('ix_llm_usage_agent_created', 'llm_usage', ['agent_type', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_usage_agent_created', table_name='llm_usage')
+    op.drop_index('ix_llm_usage_session_id', table_name='llm_usage')
+    op.drop_index('ix_llm_usage_user_created', table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_id'), table_name='llm_usage')
+    op.drop_table('llm_usage')
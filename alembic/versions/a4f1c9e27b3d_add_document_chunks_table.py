@@ -0,0 +1,67 @@
+"""add_document_chunks_table
+
+Revision ID: a4f1c9e27b3d
+Revises: 7c2e91d4a5b8
+Create Date: 2026-10-19 14:03:12.527310
+
+The embedding width and the ANN index type/parameters are read from
+settings (PGVECTOR_DIMENSION, PGVECTOR_INDEX_TYPE, PGVECTOR_*). Rebuild the
+index later with ``PgVectorStore.create_index``.
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.config.settings import settings
+
+revision: str = 'a4f1c9e27b3d'
+down_revision: Union[str, None] = '7c2e91d4a5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPCLASSES = {
+    'cosine': 'vector_cosine_ops',
+    'l2': 'vector_l2_ops',
+    'inner_product': 'vector_ip_ops',
+}
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.create_table('document_chunks',
+    sa.Column('collection', sa.String(length=100), nullable=False),
+    sa.Column('chunk_id', sa.String(length=255), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('collection', 'chunk_id', name='uq_document_chunks_collection_chunk')
+    )
+    op.execute(f'ALTER TABLE document_chunks ADD COLUMN embedding vector({settings.PGVECTOR_DIMENSION}) NOT NULL')
+    op.create_index(op.f('ix_document_chunks_id'), 'document_chunks', ['id'], unique=False)
+    op.create_index('ix_document_chunks_document_id', 'document_chunks', ['document_id'], unique=False)
+    op.create_index('ix_document_chunks_metadata', 'document_chunks', ['metadata'], unique=False, postgresql_using='gin')
+
+    opclass = OPCLASSES[settings.PGVECTOR_DISTANCE_METRIC]
+    if settings.PGVECTOR_INDEX_TYPE == 'ivfflat':
+        options = f'lists = {settings.PGVECTOR_IVFFLAT_LISTS}'
+    else:
+        options = f'm = {settings.PGVECTOR_HNSW_M}, ef_construction = {settings.PGVECTOR_HNSW_EF_CONSTRUCTION}'
+    op.execute(
+        f'CREATE INDEX ix_document_chunks_embedding ON document_chunks '
+        f'USING {settings.PGVECTOR_INDEX_TYPE} (embedding {opclass}) WITH ({options})'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_document_chunks_embedding')
+    op.drop_index('ix_document_chunks_metadata', table_name='document_chunks')
+    op.drop_index('ix_document_chunks_document_id', table_name='document_chunks')
+    op.drop_index(op.f('ix_document_chunks_id'), table_name='document_chunks')
+    op.drop_table('document_chunks')
@@ -0,0 +1,36 @@
+"""add_document_chunks_tsvector
+
+Revision ID: b7d3e8f1c2a6
+Revises: a4f1c9e27b3d
+Create Date: 2026-10-19 16:41:05.902113
+
+Generated ``content_tsv`` column with a GIN index for the keyword side of
+``PgVectorStore.hybrid_search_with_score``. The ``simple`` text search
+configuration lowercases without stemming or stop words, so identifiers and
+codes are indexed verbatim.
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'b7d3e8f1c2a6'
+down_revision: Union[str, None] = 'a4f1c9e27b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_chunks', sa.Column(
+        'content_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', content)", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_document_chunks_content_tsv', 'document_chunks', ['content_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_chunks_content_tsv', table_name='document_chunks')
+    op.drop_column('document_chunks', 'content_tsv')
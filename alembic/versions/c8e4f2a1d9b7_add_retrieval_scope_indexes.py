@@ -0,0 +1,29 @@
+"""add_retrieval_scope_indexes
+
+Revision ID: c8e4f2a1d9b7
+Revises: b7d3e8f1c2a6
+Create Date: 2026-10-19 18:12:44.613029
+
+Indexes behind session- and user-scoped retrieval: ``PgVectorStore``
+resolves a scope to document ids through ``session_documents.session_id``
+and ``documents.user_id``, then fetches their chunks through
+``ix_document_chunks_document_id``.
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = 'c8e4f2a1d9b7'
+down_revision: Union[str, None] = 'b7d3e8f1c2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_session_documents_session_document', 'session_documents', ['session_id', 'document_id'], unique=False)
+    op.create_index('ix_documents_user_id', 'documents', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_user_id', table_name='documents')
+    op.drop_index('ix_session_documents_session_document', table_name='session_documents')
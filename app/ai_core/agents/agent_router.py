@@ -5,6 +5,7 @@ import logging
 from langchain_core.messages import HumanMessage
 
 from app.ai_core.llm import LLMFactory, LLMProviderType
+from app.ai_core.llm.metering import usage_context
 from app.config.settings import settings
 from app.ai_core.agents.agent_factory import AgentFactory, AgentType
 from app.ai_core.prompts import get_intent_detection_prompt
@@ -48,7 +49,8 @@ class AgentRouter:
         prompt = get_intent_detection_prompt(user_input)
 
         try:
-            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            with usage_context(agent_type="router", node="detect_intent"):
+                response = await self.llm.ainvoke([HumanMessage(content=prompt)])
             intent_str = response.content.strip().lower()
             
             parts = intent_str.split()
@@ -54,7 +54,7 @@ class BaseAgent(ABC):
         """Get PostgreSQL connection pool for checkpointer."""
         if self._connection_pool is None:
             try:
-                
+            
                 db_url = settings.DATABASE_URL
                 pg_url = db_url.replace("postgresql+asyncpg://", "postgresql://")
                 
@@ -82,7 +82,7 @@ class BaseAgent(ABC):
                     max_size=max_size,
                     environment=settings.ENVIRONMENT.value
                 )
-                
+            
             except Exception as e:
                 self.logger.error(
                     "connection_pool_creation_failed",
@@ -110,7 +110,7 @@ class BaseAgent(ABC):
             session_id: Session/thread ID for checkpointer
             user_id: User ID for tracing
             metadata: Additional metadata
-            
+        
         Returns:
             Graph configuration dict
         """
@@ -159,7 +159,7 @@ class BaseAgent(ABC):
                 config["callbacks"] = [self._langfuse_handler]
             
             return config
-            
+        
         except ImportError:
             self.logger.warning(
                 "langfuse_enabled_but_not_installed",
@@ -220,7 +220,7 @@ class BaseAgent(ABC):
             )
             
             return self.graph
-            
+        
         except Exception as e:
             self.logger.error(
                 "graph_build_failed",
@@ -309,7 +309,7 @@ class BaseAgent(ABC):
                 )
             
             return result
-            
+        
         except Exception as e:
             self.logger.warning(
                 "trim_messages_failed_using_fallback",
@@ -380,32 +380,14 @@ class BaseAgent(ABC):
             history: Conversation history
             system_prompt: System prompt for LLM
             metadata: Additional metadata
-            
+        
         Yields:
             str: Tokens/chunks as they are generated
         """
         if self.graph is None:
             await self._build_graph_async()
         
-        messages = []
-        
-        if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
-        
-        for msg in (history or []):
-            for msg in history:
-                if msg.get("role") == "user":
-                    messages.append(HumanMessage(content=msg["content"]))
-                elif msg.get("role") == "assistant":
-                    messages.append(AIMessage(content=msg["content"]))
-        
-        messages.append(HumanMessage(content=query))
-        
-        state: BaseAgentState = {
-            "messages": messages,
-            "session_id": session_id,
-            "metadata": metadata or {}
-        }
+        state = self._build_message_state(query, session_id, user_id, history, system_prompt, metadata)
         
         config = self._build_graph_config(
             session_id=session_id,
@@ -418,7 +400,7 @@ class BaseAgent(ABC):
                 "agent_stream_started",
                 agent_type=self.agent_type,
                 session_id=session_id,
-                message_count=len(messages)
+                message_count=len(state["messages"])
             )
             
             async for event in self.graph.astream(
@@ -434,7 +416,7 @@ class BaseAgent(ABC):
                     
                     if hasattr(message, "content") and message.content:
                         yield message.content
-                        
+                
                 except Exception as token_error:
                     self.logger.error(
                         "stream_token_error",
@@ -448,7 +430,7 @@ class BaseAgent(ABC):
                 agent_type=self.agent_type,
                 session_id=session_id
             )
-            
+        
         except Exception as e:
             self.logger.error(
                 "agent_stream_failed",
@@ -458,6 +440,51 @@ class BaseAgent(ABC):
             )
             raise
     
+    def _build_message_state(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        history: Optional[List[dict[str, str]]] = None,
+        system_prompt: Optional[str] = None,
+        metadata: Optional[MetadataDict] = None
+    ) -> BaseAgentState:
+        """
+        Initial graph state for a message-based graph.
+        
+        Subclasses extend it with per-request state (e.g. retrieval scope),
+        so execution and streaming start from the same state.
+        
+        Args:
+            query: User query
+            session_id: Session ID
+            user_id: User ID
+            history: Conversation history
+            system_prompt: System prompt for LLM
+            metadata: Additional metadata
+        
+        Returns:
+            State with the conversation as messages, ending with the query
+        """
+        messages = []
+        
+        if system_prompt:
+            messages.append(SystemMessage(content=system_prompt))
+        
+        for msg in self.truncate_history(history or []):
+            if msg.get("role") == "user":
+                messages.append(HumanMessage(content=msg["content"]))
+            elif msg.get("role") == "assistant":
+                messages.append(AIMessage(content=msg["content"]))
+        
+        messages.append(HumanMessage(content=query))
+        
+        return {
+            "messages": messages,
+            "session_id": session_id,
+            "metadata": metadata or {}
+        }
+    
     async def _execute_internal(self, state: BaseAgentState, config: Optional[LangGraphConfig] = None) -> AgentResponse:
         """Internal execution with tracking and optional Langfuse tracing."""
         if self.graph is None:
@@ -510,7 +537,7 @@ class BaseAgent(ABC):
             ).observe(duration)
             
             return result
-            
+        
         except Exception as e:
             duration = time.time() - start_time
             
@@ -561,7 +588,7 @@ class BaseAgent(ABC):
                     })
             
             return history
-            
+        
         except Exception as e:
             self.logger.error(
                 "get_session_history_failed",
@@ -1,161 +1,420 @@
 """RAG agent for retrieval-augmented generation."""
 
 from typing import Optional, List
-from langgraph.graph import StateGraph, END
+import asyncio
+import json
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph import StateGraph, START, END
+from langchain_core.messages import HumanMessage, AIMessage
 
 from app.ai_core.agents.base import BaseAgent
-from app.ai_core.llm.llm_factory import LLMFactory
+from app.ai_core.llm.llm_factory import LLMFactory, LLMProviderType
 from app.ai_core.agents.rag_agent.state import RAGAgentState
 from app.ai_core.tools.think import ThinkTool
 from app.ai_core.tools.plan import PlanTool
-from app.ai_core.vectorstore.pgvector_store import PgVectorStore
-from app.ai_core.vectorstore.base import Document
+from app.ai_core.vectorstore.factory import create_vector_store
+from app.ai_core.vectorstore.base import Document, fuse_query_rankings
+from app.ai_core.vectorstore.chunking import get_token_counter
 from app.ai_core.vectorstore.embeddings import get_embedding_function
+from app.ai_core.vectorstore.packing import pack_context
+from app.ai_core.vectorstore.query_expansion import expand_query, quoted_queries
+from app.ai_core.vectorstore.rerank import Reranker
 from app.ai_core.prompts.rag_prompts import (
     get_rag_thinking_prompt,
     get_rag_planning_prompt,
+    get_rag_reasoning_prompt,
     get_rag_generation_prompt
 )
-from app.types import AgentConfig, NodeReturnType, VectorStoreConfig
+from app.config.settings import settings
+from app.types import AgentConfig, NodeReturnType, RAGReasoning, RetrievalScope, VectorStoreFilter
 
 
 class RAGAgent(BaseAgent):
     """
     RAG (Retrieval-Augmented Generation) agent.
     
-    This agent uses a full workflow:
-    - Think: Analyze the query
-    - Plan: Plan retrieval strategy
-    - Retrieve: Fetch relevant documents
-    - Rerank: Score and order results
-    - Generate: Create answer with context
+    This agent uses a fan-out/fan-in workflow:
+    - Reason: Analyze the query and plan retrieval
+    - Retrieve: Fetch documents for the raw query (concurrently with Reason)
+    - Refine: Extra searches for the plan's sub-queries and filters, if any
+    - Rerank: Keep the most relevant, non-redundant results (MMR)
+    - Generate: Pack reranked chunks into a token budget and answer
     - Respond: Format final response
     
+    Reasoning modes (``reasoning_mode`` in config, default RAG_REASONING_MODE):
+    - fused: one structured LLM call returns intent, sub-queries and filters
+    - separate: ThinkTool analysis followed by a PlanTool plan (two calls)
+    
+    Retrieval modes (``retrieval_mode`` in config, default RAG_RETRIEVAL_MODE):
+    - hybrid: vector and keyword search fused with reciprocal rank fusion
+      (``vector_weight``/``lexical_weight`` in config), so exact identifiers,
+      error codes and names are found even when embeddings miss them
+    - dense: vector search only
+    
+    Retrieval over-fetches ``top_k`` candidates per search; rerank drops
+    near-duplicate chunks and selects ``rerank_top_n`` of them with maximal
+    marginal relevance, scored by ``rerank_scorer`` (a RelevanceScorer, e.g.
+    a cross-encoder) when configured, else by the retrieval scores.
+    Generation packs them into ``context_tokens`` tokens (default
+    RAG_CONTEXT_TOKENS, capped at the agent's context limit), merging
+    chunks of the same document; the packed token count is reported in the
+    result metadata.
+    
+    Retrieval is restricted to ``retrieval_scope`` (default
+    RAG_RETRIEVAL_SCOPE): ``user`` searches the documents attached to the
+    current session or owned by the user, ``session`` only the session's,
+    and ``all`` the whole corpus. Calls without a session or user are not
+    restricted.
+    
     Features:
     - Semantic search over documents
-    - Relevance reranking
+    - Relevance and diversity reranking
     - Context-aware generation
     - Metadata filtering
     """
     
+    REASONING_MODES = ("fused", "separate")
+    RETRIEVAL_MODES = ("hybrid", "dense")
+    RETRIEVAL_SCOPES = ("user", "session", "all")
+    
+    # Minimum cosine similarity kept by rerank in dense mode
+    DENSE_SCORE_THRESHOLD = 0.7
+    
     def __init__(
         self,
-        llm_provider: Optional[str] = None,
-        model: Optional[str] = None,
-        vectorstore_config: Optional[VectorStoreConfig] = None,
-        top_k: int = 5,
-        **kwargs
+        config: Optional[AgentConfig] = None
     ):
         """
         Initialize RAG Agent.
         
         Args:
-            llm_provider: LLM provider name (default from config)
-            model: Model name (default from config)
-            vectorstore_config: Vector store configuration
-            top_k: Number of documents to retrieve
-            **kwargs: Additional configuration
+            config: Optional configuration dict
         """
-        self.llm = LLMFactory.create(provider=llm_provider, model=model)
-        self.vectorstore = PgVectorStore(config=vectorstore_config)
+        config = config or {}
+        
+        self.reasoning_mode = config.get("reasoning_mode", settings.RAG_REASONING_MODE)
+        if self.reasoning_mode not in self.REASONING_MODES:
+            raise ValueError(
+                f"Unknown RAG reasoning mode: {self.reasoning_mode}. "
+                f"Available modes: {', '.join(self.REASONING_MODES)}"
+            )
+        
+        self.retrieval_mode = config.get("retrieval_mode", settings.RAG_RETRIEVAL_MODE)
+        if self.retrieval_mode not in self.RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown RAG retrieval mode: {self.retrieval_mode}. "
+                f"Available modes: {', '.join(self.RETRIEVAL_MODES)}"
+            )
+        self.retrieval_scope = config.get("retrieval_scope", settings.RAG_RETRIEVAL_SCOPE)
+        if self.retrieval_scope not in self.RETRIEVAL_SCOPES:
+            raise ValueError(
+                f"Unknown RAG retrieval scope: {self.retrieval_scope}. "
+                f"Available scopes: {', '.join(self.RETRIEVAL_SCOPES)}"
+            )
+        self.vector_weight = config.get("vector_weight", settings.RAG_HYBRID_VECTOR_WEIGHT)
+        self.lexical_weight = config.get("lexical_weight", settings.RAG_HYBRID_LEXICAL_WEIGHT)
+        self.score_threshold = (
+            settings.RAG_HYBRID_MIN_SCORE if self.retrieval_mode == "hybrid" else self.DENSE_SCORE_THRESHOLD
+        )
+        
+        provider_type = LLMProviderType(config.get("llm_provider", settings.LLM_PROVIDER))
+        model = config.get("model", settings.LLM_MODEL)
+        
+        self.llm = LLMFactory.create(
+            provider_type=provider_type,
+            model=model,
+            temperature=config.get("temperature", settings.LLM_TEMPERATURE),
+            max_tokens=config.get("max_tokens", settings.LLM_MAX_TOKENS),
+            api_key=settings.LLM_API_KEY,
+            base_url=settings.LLM_BASE_URL,
+            enable_guardrail=config.get("enable_guardrail", False),
+        )
+        # Reasoning output is internal: keep it out of token streams
+        self.reasoning_llm = LLMFactory.create(
+            provider_type=provider_type,
+            model=model,
+            temperature=0.2,
+            max_tokens=800,
+            api_key=settings.LLM_API_KEY,
+            base_url=settings.LLM_BASE_URL,
+            enable_guardrail=False,
+            tags=[TAG_NOSTREAM],
+        )
+        self.vectorstore = create_vector_store(config.get("vectorstore_config"))
         self.embeddings = get_embedding_function()
         self.think_tool = ThinkTool()
         self.plan_tool = PlanTool()
-        self.top_k = top_k
-        super().__init__(agent_type="rag", **kwargs)
+        self.top_k = config.get("top_k", settings.RAG_TOP_K)
+        self.query_rewrites = config.get("query_rewrites", settings.RAG_QUERY_REWRITES)
+        self.rerank_top_n = config.get("rerank_top_n", settings.RAG_RERANK_TOP_N)
+        self.context_tokens = config.get("context_tokens", settings.RAG_CONTEXT_TOKENS)
+        self.reranker = Reranker(
+            getattr(self.vectorstore, "embeddings", self.embeddings),
+            scorer=config.get("rerank_scorer"),
+            lambda_mult=settings.RAG_MMR_LAMBDA,
+            duplicate_threshold=settings.RAG_DUPLICATE_THRESHOLD,
+        )
+        super().__init__(agent_type="rag", config=config)
+        self.context_tokens = min(self.context_tokens, self.max_tokens)
+    
+    async def execute(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        history: Optional[list] = None,
+        system_prompt: Optional[str] = None,
+        metadata: Optional[dict] = None
+    ) -> NodeReturnType:
+        """
+        Execute RAG agent.
+        
+        Args:
+            query: User query
+            session_id: Session ID for checkpointer
+            user_id: User ID for tracking
+            history: Conversation history
+            system_prompt: System prompt for the LLM
+            metadata: Additional metadata
+        
+        Returns:
+            Agent response
+        """
+        state = self._build_message_state(query, session_id, user_id, history, system_prompt, metadata)
+        
+        config = self._build_graph_config(
+            session_id=session_id,
+            user_id=user_id,
+            metadata=metadata
+        )
+        
+        return await self._execute_internal(state, config)
     
     def _build_graph(self) -> StateGraph:
         """
         Build RAG agent graph.
         
-        Graph:
-        think → plan → retrieve → rerank → generate → respond → END
+        Retrieval on the raw query does not depend on reasoning, so both
+        branches start together and join before refinement:
+        
+        Graph (fused):
+        START → reason ──┐
+        START → retrieve ┴→ refine → rerank → generate → respond → END
+        
+        Graph (separate):
+        START → think → plan ┐
+        START → retrieve ────┴→ refine → rerank → generate → respond → END
         
         Returns:
             Compiled StateGraph
         """
         workflow = StateGraph(RAGAgentState)
         
-        workflow.add_node("think", self._think_node)
-        workflow.add_node("plan", self._plan_node)
         workflow.add_node("retrieve", self._retrieve_node)
+        workflow.add_node("refine", self._refine_node)
         workflow.add_node("rerank", self._rerank_node)
         workflow.add_node("generate", self._generate_node)
         workflow.add_node("respond", self._respond_node)
         
-        workflow.set_entry_point("think")
-        workflow.add_edge("think", "plan")
-        workflow.add_edge("plan", "retrieve")
-        workflow.add_edge("retrieve", "rerank")
+        if self.reasoning_mode == "fused":
+            workflow.add_node("reason", self._reason_node)
+            workflow.add_edge(START, "reason")
+            reasoning_tail = "reason"
+        else:
+            workflow.add_node("think", self._think_node)
+            workflow.add_node("plan", self._plan_node)
+            workflow.add_edge(START, "think")
+            workflow.add_edge("think", "plan")
+            reasoning_tail = "plan"
+        
+        workflow.add_edge(START, "retrieve")
+        workflow.add_edge([reasoning_tail, "retrieve"], "refine")
+        workflow.add_edge("refine", "rerank")
         workflow.add_edge("rerank", "generate")
         workflow.add_edge("generate", "respond")
         workflow.add_edge("respond", END)
         
         return workflow.compile()
     
+    def _build_message_state(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        history: Optional[list] = None,
+        system_prompt: Optional[str] = None,
+        metadata: Optional[dict] = None
+    ) -> RAGAgentState:
+        """Conversation state restricted to the retrieval scope (for ``execute`` and ``execute_stream``)."""
+        state: RAGAgentState = super()._build_message_state(
+            query, session_id, user_id, history, system_prompt, metadata
+        )
+        scope = self._retrieval_scope(session_id, user_id)
+        if scope:
+            state["metadata_filter"] = {"scope": scope}
+        return state
+    
+    def _retrieval_scope(self, session_id: Optional[str], user_id: Optional[int]) -> Optional[RetrievalScope]:
+        """Session and user this conversation may retrieve from, or None for the whole corpus."""
+        if self.retrieval_scope == "all":
+            return None
+        
+        scope: RetrievalScope = {}
+        if session_id is not None and str(session_id).isdigit():
+            scope["session_id"] = int(session_id)
+        if self.retrieval_scope == "user" and user_id is not None:
+            scope["user_id"] = int(user_id)
+        return scope or None
+    
+    def _get_query(self, state: RAGAgentState) -> str:
+        """Get the latest user query from state."""
+        return state["messages"][-1].content if state.get("messages") else ""
+    
+    async def _search(self, queries: List[str], filter_dict: Optional[VectorStoreFilter]) -> List[List[tuple]]:
+        """Top-k documents per query in the configured retrieval mode, embedded in one batch."""
+        return await self.vectorstore.multi_query_rankings(
+            queries,
+            k=self.top_k,
+            filter_dict=filter_dict,
+            hybrid=self.retrieval_mode == "hybrid",
+            vector_weight=self.vector_weight,
+            lexical_weight=self.lexical_weight
+        )
+    
+    async def _reason_node(self, state: RAGAgentState) -> NodeReturnType:
+        """Analyze the query and plan retrieval in one structured LLM call."""
+        self.logger.info("Executing reason node")
+        
+        try:
+            query = self._get_query(state)
+            
+            prompt = get_rag_reasoning_prompt(query)
+            response = await self.reasoning_llm.ainvoke([HumanMessage(content=prompt)])
+            reasoning = self._parse_reasoning(response.content)
+            
+            self.logger.info(
+                "rag_reasoning_completed",
+                intent=reasoning["intent"],
+                sub_queries=len(reasoning["sub_queries"]),
+                filters=list(reasoning["filters"].keys())
+            )
+            
+            return {
+                "reasoning": reasoning,
+                "thinking": reasoning["analysis"]
+            }
+        
+        except Exception as e:
+            # Runs in parallel with retrieval: degrade to raw-query retrieval
+            self.logger.error(f"Reason node error: {str(e)}", exc_info=True)
+            return {"reasoning": None}
+    
     async def _think_node(self, state: RAGAgentState) -> NodeReturnType:
         """Think about the retrieval strategy."""
         self.logger.info("Executing think node")
         
         try:
-            query = state["messages"][-1].content if state.get("messages") else ""
+            query = self._get_query(state)
             
             prompt = get_rag_thinking_prompt(query)
-            thinking = await self.think_tool.execute(prompt)
-            
-            return {"thinking": thinking}
+            thinking = await self.think_tool.execute({"prompt": prompt})
             
+            return {"thinking": thinking.get("result", "")}
+        
         except Exception as e:
             self.logger.error(f"Think node error: {str(e)}", exc_info=True)
-            return {"error": str(e)}
+            return {"thinking": ""}
     
     async def _plan_node(self, state: RAGAgentState) -> NodeReturnType:
         """Plan the retrieval strategy."""
         self.logger.info("Executing plan node")
         
         try:
-            query = state["messages"][-1].content if state.get("messages") else ""
+            query = self._get_query(state)
             
             prompt = get_rag_planning_prompt(
                 query,
                 state.get('thinking', '')
             )
-            plan = await self.plan_tool.execute(prompt)
+            plan = await self.plan_tool.execute({"prompt": prompt})
             
             return {"plan": plan}
-            
+        
         except Exception as e:
             self.logger.error(f"Plan node error: {str(e)}", exc_info=True)
-            return {"error": str(e)}
+            return {"plan": None}
     
     async def _retrieve_node(self, state: RAGAgentState) -> NodeReturnType:
         """Retrieve relevant documents."""
         self.logger.info("Executing retrieve node")
         
         try:
-            query = state["messages"][-1].content if state.get("messages") else ""
+            query = self._get_query(state)
             
             filter_dict = state.get("metadata_filter")
             
-            documents = await self.vectorstore.similarity_search_with_score(
-                query=query,
-                k=self.top_k,
-                filter_dict=filter_dict
-            )
+            queries = [query, *expand_query(query, self.query_rewrites)]
+            rankings = await self._search(queries, filter_dict)
+            documents = fuse_query_rankings(rankings, settings.VECTOR_HYBRID_RRF_K)[:self.top_k]
             
-            self.logger.info(f"Retrieved {len(documents)} documents")
+            self.logger.info(f"Retrieved {len(documents)} documents for {len(rankings)} queries")
             
             return {
                 "retrieved_docs": documents,
                 "retrieval_count": len(documents)
             }
-            
+        
         except Exception as e:
             self.logger.error(f"Retrieve node error: {str(e)}", exc_info=True)
             return {"error": str(e)}
     
+    async def _refine_node(self, state: RAGAgentState) -> NodeReturnType:
+        """Run plan-driven searches and merge them with the raw-query results."""
+        reasoning = state.get("reasoning") or {}
+        plan = state.get("plan") or {}
+        # Separate mode has no structured plan: use the search queries it quotes
+        sub_queries = reasoning.get("sub_queries") or quoted_queries(
+            plan.get("plan_text", ""), settings.RAG_MAX_SUB_QUERIES
+        )
+        plan_filters = reasoning.get("filters") or {}
+        
+        if state.get("error") or not (sub_queries or plan_filters):
+            self.logger.info("Skipping refine node (plan asks for no extra retrieval)")
+            return {}
+        
+        self.logger.info("Executing refine node")
+        
+        try:
+            query = self._get_query(state)
+            filter_dict: VectorStoreFilter = {**plan_filters, **(state.get("metadata_filter") or {})}
+            
+            searches = [q for q in sub_queries[:settings.RAG_MAX_SUB_QUERIES] if q != query]
+            if plan_filters:
+                searches.insert(0, query)
+            
+            rankings = await self._search(searches, filter_dict)
+            documents = fuse_query_rankings(
+                [state.get("retrieved_docs", []), *rankings],
+                settings.VECTOR_HYBRID_RRF_K
+            )
+            
+            self.logger.info(
+                f"Refined retrieval with {len(searches)} extra searches: "
+                f"{len(state.get('retrieved_docs', []))} → {len(documents)} documents"
+            )
+            
+            return {
+                "retrieved_docs": documents,
+                "retrieval_count": len(documents)
+            }
+        
+        except Exception as e:
+            # Raw-query results are still usable
+            self.logger.error(f"Refine node error: {str(e)}", exc_info=True)
+            return {}
+    
     async def _rerank_node(self, state: RAGAgentState) -> NodeReturnType:
-        """Rerank retrieved documents."""
+        """Rerank retrieved documents for relevance and diversity."""
         self.logger.info("Executing rerank node")
         
         try:
@@ -164,19 +423,25 @@ class RAGAgent(BaseAgent):
             if not documents:
                 return {"reranked_docs": []}
             
-            score_threshold = 0.7
+            score_threshold = self.score_threshold
             filtered_docs = [
                 (doc, score) for doc, score in documents
                 if score >= score_threshold
             ]
             
-            self.logger.info(
-                f"Reranked {len(filtered_docs)} documents "
-                f"(filtered from {len(documents)} by score threshold {score_threshold})"
+            reranked_docs = await self.reranker.rerank(
+                self._get_query(state),
+                filtered_docs,
+                self.rerank_top_n
             )
             
-            return {"reranked_docs": filtered_docs}
+            self.logger.info(
+                f"Reranked {len(documents)} documents to {len(reranked_docs)} "
+                f"({len(filtered_docs)} above score threshold {score_threshold})"
+            )
             
+            return {"reranked_docs": reranked_docs}
+        
         except Exception as e:
             self.logger.error(f"Rerank node error: {str(e)}", exc_info=True)
             return {"error": str(e)}
@@ -186,27 +451,32 @@ class RAGAgent(BaseAgent):
         self.logger.info("Executing generate node")
         
         try:
-            query = state["messages"][-1].content if state.get("messages") else ""
+            query = self._get_query(state)
             reranked_docs = state.get("reranked_docs", [])
             
-            context_parts = []
-            for idx, (doc, score) in enumerate(reranked_docs[:3], 1):
-                context_parts.append(
-                    f"Document {idx} (relevance: {score:.2f}):\n{doc.content}"
-                )
+            # Loading a tiktoken encoding may download it; keep that off the event loop
+            count_tokens = await asyncio.to_thread(get_token_counter, settings.INGESTION_TOKENIZER)
+            packed = pack_context(reranked_docs, self.context_tokens, count_tokens)
+            
+            self.logger.info(
+                f"Packed {packed['chunks_used']} of {len(reranked_docs)} chunks "
+                f"({packed['chunks_trimmed']} trimmed) into {len(packed['sections'])} documents, "
+                f"{packed['token_count']}/{self.context_tokens} tokens"
+            )
             
-            context = "\n\n".join(context_parts) if context_parts else "No relevant documents found."
+            context = packed["text"] or "No relevant documents found."
             
             prompt = get_rag_generation_prompt(query, context)
             
-            messages = [{"role": "user", "content": prompt}]
-            answer = await self.llm.ainvoke(messages)
+            answer = await self.llm.ainvoke([HumanMessage(content=prompt)])
             
             return {
-                "answer": answer,
-                "context_used": len(context_parts)
+                "messages": [answer],
+                "answer": answer.content,
+                "context_used": len(packed["sections"]),
+                "context_tokens": packed["token_count"]
             }
-            
+        
         except Exception as e:
             self.logger.error(f"Generate node error: {str(e)}", exc_info=True)
             return {"error": str(e)}
@@ -216,8 +486,10 @@ class RAGAgent(BaseAgent):
         self.logger.info("Executing respond node")
         
         if state.get("error"):
+            response = f"I apologize, but I encountered an error: {state['error']}"
             return {
-                "response": f"I apologize, but I encountered an error: {state['error']}",
+                "messages": [AIMessage(content=response)],
+                "response": response,
                 "error": state["error"]
             }
         
@@ -239,7 +511,70 @@ class RAGAgent(BaseAgent):
         
         response = "".join(response_parts)
         
+        # Reuse the streamed answer's id so the final message replaces it
+        # instead of being emitted a second time
+        last_message = state["messages"][-1] if state.get("messages") else None
+        answer_id = last_message.id if isinstance(last_message, AIMessage) else None
+        
         return {
+            "messages": [AIMessage(content=response, id=answer_id)],
             "response": response,
-            "error": None
+            "error": None,
+            "metadata": {
+                **(state.get("metadata") or {}),
+                "context_documents": context_used,
+                "context_tokens": state.get("context_tokens", 0),
+                "retrieval_count": retrieval_count
+            }
+        }
+    
+    def _parse_reasoning(self, text: str) -> RAGReasoning:
+        """
+        Parse the JSON retrieval plan returned by the reasoning call.
+        
+        Tolerates code fences and surrounding text. Falls back to an empty
+        plan (raw query only) when the output is not valid JSON.
+        
+        Args:
+            text: Raw LLM output
+        
+        Returns:
+            Normalized reasoning result
+        """
+        data = {}
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                data = json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                data = {}
+        
+        if not isinstance(data, dict) or not data:
+            self.logger.warning("rag_reasoning_unparseable", output_length=len(text))
+            return {
+                "intent": "other",
+                "analysis": text.strip()[:500],
+                "sub_queries": [],
+                "filters": {}
+            }
+        
+        sub_queries = [
+            q.strip() for q in data.get("sub_queries") or []
+            if isinstance(q, str) and q.strip()
+        ][:settings.RAG_MAX_SUB_QUERIES]
+        
+        raw_filters = data.get("filters") if isinstance(data.get("filters"), dict) else {}
+        filters = {}
+        for key in ("document_type", "date_from", "date_to"):
+            if isinstance(raw_filters.get(key), str) and raw_filters[key]:
+                filters[key] = raw_filters[key]
+        tags = [t for t in raw_filters.get("tags") or [] if isinstance(t, str) and t]
+        if tags:
+            filters["tags"] = tags
+        
+        return {
+            "intent": str(data.get("intent") or "other"),
+            "analysis": str(data.get("analysis") or ""),
+            "sub_queries": sub_queries,
+            "filters": filters
         }
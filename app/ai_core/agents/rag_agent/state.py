@@ -2,7 +2,7 @@
 
 from typing import Optional, List, Any
 from app.ai_core.agents.base.state import BaseAgentState
-from app.types import VectorStoreFilter
+from app.types import RAGReasoning, VectorStoreFilter
 
 
 class RAGAgentState(BaseAgentState, total=False):
@@ -10,11 +10,11 @@ class RAGAgentState(BaseAgentState, total=False):
     State for RAG agent workflow.
     
     The RAG agent handles document retrieval and generation by:
-    1. Analyzing the query to determine retrieval strategy
-    2. Planning the retrieval approach
-    3. Retrieving relevant documents from vector store
-    4. Reranking documents for relevance
-    5. Generating answers based on retrieved context
+    1. Analyzing the query and planning the retrieval approach (one fused
+       structured call, or separate think and plan steps)
+    2. Retrieving relevant documents from vector store
+    3. Reranking documents for relevance
+    4. Generating answers based on retrieved context
     
     Attributes:
         Inherits all fields from BaseAgentState:
@@ -25,21 +25,25 @@ class RAGAgentState(BaseAgentState, total=False):
             - metadata: Additional metadata
         
         RAG-specific fields:
+            reasoning: Structured intent, sub-queries and filters
             thinking: Analytical reasoning about retrieval strategy
             plan: Retrieval strategy plan
             retrieved_docs: Retrieved documents with relevance scores
             reranked_docs: Reranked documents after reranking step
             answer: Generated answer based on context
             context_used: Number of documents used in generation
+            context_tokens: Tokens of retrieved context in the generation prompt
             retrieval_count: Total number of documents retrieved
             metadata_filter: Metadata filters applied during retrieval
     """
     
+    reasoning: Optional[RAGReasoning]
     thinking: Optional[str]
     plan: Optional[dict]
     retrieved_docs: Optional[List[tuple]]
     reranked_docs: Optional[List[tuple]]
     answer: Optional[str]
     context_used: Optional[int]
+    context_tokens: Optional[int]
     retrieval_count: Optional[int]
     metadata_filter: Optional[VectorStoreFilter]
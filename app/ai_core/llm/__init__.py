@@ -3,13 +3,19 @@
 from .base import BaseLLMProvider
 from .openai_provider import OpenAIProvider
 from .bedrock_provider import BedrockProvider
+from .fake_provider import FakeLLMProvider
 from .llm_factory import LLMFactory, LLMProviderType
+from .circuit_breaker import CircuitBreaker, CircuitState, get_circuit_breaker
 
 __all__ = [
     "BaseLLMProvider",
     "OpenAIProvider", 
     "BedrockProvider",
+    "FakeLLMProvider",
     "LLMFactory",
-    "LLMProviderType"
+    "LLMProviderType",
+    "CircuitBreaker",
+    "CircuitState",
+    "get_circuit_breaker",
 ]
 
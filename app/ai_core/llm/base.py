@@ -1,13 +1,24 @@
 """Base LLM provider interface."""
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Any
+from typing import AsyncIterator, List, Optional, Any
+import asyncio
+import time
 from langchain_core.messages import BaseMessage, AIMessage
 from app.ai_core.guardrail.manager import GuardrailManager
+from app.ai_core.llm.circuit_breaker import CircuitBreaker, CircuitState, get_circuit_breaker
+from app.ai_core.llm.metering import extract_token_usage, merge_token_usage, get_usage_meter
 from app.config.settings import settings, Environment
 from app.core.logger import logger
-from app.middleware.metrics import llm_request_count, llm_inference_duration_seconds
-from app.types import LLMValidationResult, LLMConfig
+from app.exceptions.service import CircuitOpenException
+from app.middleware.metrics import (
+    llm_request_count,
+    llm_inference_duration_seconds,
+    llm_stream_duration_seconds,
+    llm_batch_items_total,
+    llm_batch_size,
+)
+from app.types import LLMValidationResult, LLMConfig, LLMBatchResult, TokenUsage
 
 base_logger = logger.bind(module="llm_provider")
 
@@ -15,6 +26,9 @@ base_logger = logger.bind(module="llm_provider")
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers with integrated guardrails."""
     
+    # Providers whose ``_abatch_internal`` sends a batch in one client call set this to True
+    supports_native_batch = False
+    
     def __init__(
         self,
         model: str,
@@ -23,6 +37,7 @@ class BaseLLMProvider(ABC):
         enable_guardrail: bool = True,
         fallback_model: Optional[str] = None,
         max_retries: int = 3,
+        enable_circuit_breaker: Optional[bool] = None,
         **kwargs
     ):
         """Initialize the LLM provider."""
@@ -32,6 +47,11 @@ class BaseLLMProvider(ABC):
         self.enable_guardrail = enable_guardrail
         self.fallback_model = fallback_model
         self.max_retries = max_retries
+        self.enable_circuit_breaker = (
+            settings.LLM_CIRCUIT_BREAKER_ENABLED
+            if enable_circuit_breaker is None
+            else enable_circuit_breaker
+        )
         self.kwargs = kwargs
         self._client = None
         self._guardrail_manager = GuardrailManager() if enable_guardrail else None
@@ -49,6 +69,48 @@ class BaseLLMProvider(ABC):
             self._client = self._initialize_client()
         return self._client
     
+    def _get_endpoint(self) -> str:
+        """Endpoint identifier used to key the shared circuit breakers."""
+        return self.__class__.__name__
+    
+    @property
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        """Get the process-wide circuit breaker for the current endpoint and model."""
+        if not self.enable_circuit_breaker:
+            return None
+        return get_circuit_breaker(self._get_endpoint(), self.model)
+    
+    def _acquire_circuit(self) -> Optional[CircuitBreaker]:
+        """
+        Reserve a call slot on the circuit breaker, routing to the fallback model if open.
+        
+        Returns:
+            Breaker the call must report to, or None when breakers are disabled
+        
+        Raises:
+            CircuitOpenException: If neither the model nor its fallback accepts calls
+        """
+        breaker = self.circuit_breaker
+        if breaker is None or breaker.allow_request():
+            return breaker
+        
+        if self.fallback_model and self.fallback_model != self.model:
+            fallback_breaker = get_circuit_breaker(self._get_endpoint(), self.fallback_model)
+            if fallback_breaker.allow_request():
+                base_logger.warning(
+                    "circuit_open_switching_to_fallback_model",
+                    from_model=self.model,
+                    to_model=self.fallback_model
+                )
+                self.model = self.fallback_model
+                self._client = None  # Force reinit
+                return fallback_breaker
+        
+        raise CircuitOpenException(
+            f"Circuit breaker open for model {self.model} at {self._get_endpoint()}, "
+            f"retry in {breaker.retry_after():.0f}s"
+        )
+    
     @abstractmethod
     async def _ainvoke_internal(self, messages: List[BaseMessage]) -> Any:
         """Internal async invoke method to be implemented by subclasses."""
@@ -59,6 +121,21 @@ class BaseLLMProvider(ABC):
         """Internal sync invoke method to be implemented by subclasses."""
         pass
     
+    async def _astream_internal(self, messages: List[BaseMessage]) -> AsyncIterator[Any]:
+        """Internal streaming method; providers without native streaming yield one chunk."""
+        yield await self._ainvoke_internal(messages)
+    
+    def _record_usage(self, response: Any, duration: float) -> None:
+        """Report token usage of a call to the usage meter."""
+        if not settings.USAGE_METERING_ENABLED:
+            return
+        
+        try:
+            usage = response if isinstance(response, dict) else extract_token_usage(response)
+            get_usage_meter().record(self.model, usage, latency=duration)
+        except Exception as e:
+            base_logger.warning("llm_usage_record_failed", model=self.model, error=str(e))
+    
     async def _validate_input(self, messages: List[BaseMessage]) -> LLMValidationResult:
         """Validate input messages using guardrails."""
         if not self._guardrail_manager:
@@ -86,6 +163,42 @@ class BaseLLMProvider(ABC):
             "reason": result.get("reason")
         }
     
+    async def _ainvoke_with_circuit(self, messages: List[BaseMessage]) -> Any:
+        """
+        Make one call through the circuit breaker, recording latency and usage.
+        
+        Args:
+            messages: List of messages to send
+        
+        Returns:
+            Provider response
+        
+        Raises:
+            CircuitOpenException: If the circuit is open for the model and its fallback
+        """
+        breaker = self._acquire_circuit()
+        start_time = time.monotonic()
+        try:
+            with llm_inference_duration_seconds.labels(
+                model=self.model,
+                environment=self._environment.value
+            ).time():
+                response = await self._ainvoke_internal(messages)
+        except asyncio.CancelledError:
+            if breaker:
+                breaker.release()
+            raise
+        except Exception:
+            if breaker:
+                breaker.record_failure(time.monotonic() - start_time)
+            raise
+        
+        duration = time.monotonic() - start_time
+        if breaker:
+            breaker.record_success(duration)
+        self._record_usage(response, duration)
+        return response
+    
     async def ainvoke(self, messages: List[BaseMessage]) -> Any:
         """Asynchronously invoke the LLM with messages (with guardrails + retry + fallback)."""
         for attempt in range(self.max_retries):
@@ -94,11 +207,7 @@ class BaseLLMProvider(ABC):
                 if not input_validation["valid"]:
                     raise ValueError(f"Input blocked by guardrail: {input_validation['reason']}")
                 
-                with llm_inference_duration_seconds.labels(
-                    model=self.model,
-                    environment=self._environment.value
-                ).time():
-                    response = await self._ainvoke_internal(messages)
+                response = await self._ainvoke_with_circuit(messages)
                 
                 response_text = response.content if hasattr(response, 'content') else str(response)
                 output_validation = await self._validate_output(response_text)
@@ -111,7 +220,23 @@ class BaseLLMProvider(ABC):
                 ).inc()
                 
                 return response
+            
+            except CircuitOpenException as e:
+                base_logger.warning(
+                    "llm_call_rejected_circuit_open",
+                    model=self.model,
+                    attempt=attempt + 1,
+                    error=str(e)
+                )
+                llm_request_count.labels(
+                    model=self.model,
+                    status="circuit_open"
+                ).inc()
                 
+                if self._environment == Environment.PRODUCTION:
+                    return self._get_fallback_response(e)
+                raise
+            
             except Exception as e:
                 base_logger.error(
                     "llm_call_failed",
@@ -148,7 +273,326 @@ class BaseLLMProvider(ABC):
     
     def invoke(self, messages: List[BaseMessage]) -> Any:
         """Synchronously invoke the LLM (guardrails work only with ainvoke)."""
-        return self._invoke_internal(messages)
+        breaker = self._acquire_circuit()
+        start_time = time.monotonic()
+        try:
+            response = self._invoke_internal(messages)
+        except Exception:
+            if breaker:
+                breaker.record_failure(time.monotonic() - start_time)
+            raise
+        
+        duration = time.monotonic() - start_time
+        if breaker:
+            breaker.record_success(duration)
+        self._record_usage(response, duration)
+        return response
+    
+    async def astream(self, messages: List[BaseMessage]) -> AsyncIterator[Any]:
+        """
+        Stream the LLM response chunk by chunk (with guardrails + circuit breaker).
+        
+        Streams are not retried: once chunks have been yielded a retry would
+        duplicate output. Token usage is summed over the chunks and metered
+        when the stream ends.
+        
+        Args:
+            messages: List of messages to send
+        
+        Yields:
+            Message chunks as produced by the provider
+        """
+        input_validation = await self._validate_input(messages)
+        if not input_validation["valid"]:
+            raise ValueError(f"Input blocked by guardrail: {input_validation['reason']}")
+        
+        breaker = self._acquire_circuit()
+        start_time = time.monotonic()
+        usage: TokenUsage = {}
+        response_text = ""
+        
+        try:
+            async for chunk in self._astream_internal(messages):
+                merge_token_usage(usage, extract_token_usage(chunk))
+                content = getattr(chunk, "content", None)
+                if isinstance(content, str):
+                    response_text += content
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            if breaker:
+                breaker.release()
+            raise
+        except Exception as e:
+            if breaker:
+                breaker.record_failure(time.monotonic() - start_time)
+            llm_request_count.labels(
+                model=self.model,
+                status="error"
+            ).inc()
+            base_logger.error("llm_stream_failed", model=self.model, error=str(e))
+            raise
+        
+        duration = time.monotonic() - start_time
+        if breaker:
+            breaker.record_success(duration)
+        self._record_usage(usage, duration)
+        
+        llm_stream_duration_seconds.labels(
+            model=self.model,
+            environment=self._environment.value
+        ).observe(duration)
+        
+        output_validation = await self._validate_output(response_text)
+        if not output_validation["valid"]:
+            raise ValueError(f"Output blocked by guardrail: {output_validation['reason']}")
+        
+        llm_request_count.labels(
+            model=self.model,
+            status="success"
+        ).inc()
+    
+    async def _abatch_internal(self, batch: List[List[BaseMessage]], max_concurrency: int) -> List[Any]:
+        """
+        Send a whole batch in one client call.
+        
+        ``abatch`` uses it when ``supports_native_batch`` is True. The default
+        runs ``_ainvoke_internal`` concurrently; providers override it with
+        their client's batch call.
+        
+        Args:
+            batch: One message list per item
+            max_concurrency: Concurrency limit the client should respect
+        
+        Returns:
+            One response or exception per item, in input order
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def bounded(messages: List[BaseMessage]) -> Any:
+            async with semaphore:
+                return await self._ainvoke_internal(messages)
+        
+        return await asyncio.gather(*(bounded(messages) for messages in batch), return_exceptions=True)
+    
+    async def abatch(
+        self,
+        batch: List[List[BaseMessage]],
+        max_concurrency: Optional[int] = None,
+        use_native: Optional[bool] = None,
+    ) -> List[LLMBatchResult]:
+        """
+        Invoke the LLM on many prompts (with guardrails + circuit breaker + retry).
+        
+        Items run with at most ``max_concurrency`` calls in flight. Every item
+        gets its own guardrail results, and a failing or blocked item never
+        fails the batch: it is reported in its result instead. Results are
+        returned in input order. When the provider has a native batch call it
+        is used for all items that pass the input guardrail; items that fail
+        in it get the remaining retries one by one, like single calls, and if
+        that call fails as a whole every item is retried one by one.
+        
+        Args:
+            batch: One message list per item
+            max_concurrency: Concurrent calls (default LLM_BATCH_MAX_CONCURRENCY)
+            use_native: Use the native batch call when available (default LLM_BATCH_USE_NATIVE)
+        
+        Returns:
+            One result per item, in input order
+        """
+        max_concurrency = max(1, max_concurrency or settings.LLM_BATCH_MAX_CONCURRENCY)
+        use_native = settings.LLM_BATCH_USE_NATIVE if use_native is None else use_native
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def bounded(func, *args):
+            async with semaphore:
+                return await func(*args)
+        
+        llm_batch_size.labels(model=self.model).observe(len(batch))
+        results: List[LLMBatchResult] = [
+            {
+                "index": index,
+                "success": False,
+                "response": None,
+                "error": None,
+                "error_type": None,
+                "output_validation": None,
+            }
+            for index in range(len(batch))
+        ]
+        
+        input_validations = await asyncio.gather(
+            *(bounded(self._validate_input, messages) for messages in batch),
+            return_exceptions=True
+        )
+        
+        pending: List[int] = []
+        for result, validation in zip(results, input_validations):
+            if isinstance(validation, Exception):
+                result["input_validation"] = {
+                    "valid": False,
+                    "is_safe": False,
+                    "blocked": False,
+                    "reason": str(validation)
+                }
+                result.update(error=str(validation), error_type=type(validation).__name__)
+            elif not validation["valid"]:
+                result["input_validation"] = validation
+                result.update(
+                    error=f"Input blocked by guardrail: {validation['reason']}",
+                    error_type="GuardrailBlocked"
+                )
+            else:
+                result["input_validation"] = validation
+                pending.append(result["index"])
+        
+        responses = None
+        if use_native and len(pending) > 1 and self.supports_native_batch:
+            responses = await self._abatch_native([batch[i] for i in pending], max_concurrency)
+            if responses is not None and self.max_retries > 1:
+                # The native call was the first attempt; an open circuit is never retried
+                failed = [
+                    position for position, response in enumerate(responses)
+                    if isinstance(response, Exception) and not isinstance(response, CircuitOpenException)
+                ]
+                retried = await asyncio.gather(
+                    *(
+                        bounded(self._ainvoke_with_retry, batch[pending[position]], self.max_retries - 1)
+                        for position in failed
+                    ),
+                    return_exceptions=True
+                )
+                for position, response in zip(failed, retried):
+                    responses[position] = response
+        if responses is None:
+            responses = await asyncio.gather(
+                *(bounded(self._ainvoke_with_retry, batch[i]) for i in pending),
+                return_exceptions=True
+            )
+        
+        async def finish(index: int, response: Any) -> None:
+            result = results[index]
+            if isinstance(response, BaseException):
+                result.update(error=str(response), error_type=type(response).__name__)
+                return
+            
+            response_text = response.content if hasattr(response, 'content') else str(response)
+            try:
+                output_validation = await self._validate_output(response_text)
+            except Exception as e:
+                result.update(error=str(e), error_type=type(e).__name__)
+                return
+            result["output_validation"] = output_validation
+            if not output_validation["valid"]:
+                result.update(
+                    error=f"Output blocked by guardrail: {output_validation['reason']}",
+                    error_type="GuardrailBlocked"
+                )
+                return
+            
+            result.update(success=True, response=response)
+        
+        await asyncio.gather(*(bounded(finish, i, r) for i, r in zip(pending, responses)))
+        
+        for result in results:
+            if result["success"]:
+                status = "success"
+            elif result["error_type"] == "GuardrailBlocked":
+                status = "blocked"
+            elif result["error_type"] == CircuitOpenException.__name__:
+                status = "circuit_open"
+            else:
+                status = "error"
+            llm_batch_items_total.labels(model=self.model, status=status).inc()
+            if status in ("success", "error", "circuit_open"):
+                llm_request_count.labels(model=self.model, status=status).inc()
+        
+        failed = sum(1 for result in results if not result["success"])
+        if failed:
+            base_logger.warning(
+                "llm_batch_partial_failure",
+                model=self.model,
+                batch_size=len(batch),
+                failed=failed
+            )
+        
+        return results
+    
+    async def _ainvoke_with_retry(self, messages: List[BaseMessage], attempts: Optional[int] = None) -> Any:
+        """One batch item: retry transient errors, never retry an open circuit."""
+        attempts = attempts or self.max_retries
+        for attempt in range(attempts):
+            try:
+                return await self._ainvoke_with_circuit(messages)
+            except CircuitOpenException:
+                raise
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise
+                base_logger.debug(
+                    "llm_batch_item_retry",
+                    model=self.model,
+                    attempt=attempt + 1,
+                    error=str(e)
+                )
+        
+        raise RuntimeError(f"Failed after {attempts} attempts")
+    
+    async def _abatch_native(
+        self,
+        batch: List[List[BaseMessage]],
+        max_concurrency: int
+    ) -> Optional[List[Any]]:
+        """
+        Run the native batch call through the circuit breaker.
+        
+        Only a closed breaker takes a batch: a half-open one allows a few
+        probe calls, and one batch would send all its items as a single probe.
+        Items are then recorded one by one, as they are separate requests.
+        
+        Args:
+            batch: One message list per item
+            max_concurrency: Concurrency limit the client should respect
+        
+        Returns:
+            One response or exception per item, or None if the call failed as
+            a whole or the breaker is not closed (items then go one by one)
+        """
+        try:
+            breaker = self._acquire_circuit()
+        except CircuitOpenException as e:
+            return [e] * len(batch)
+        if breaker is not None and breaker.state != CircuitState.CLOSED:
+            breaker.release()
+            return None
+        
+        start_time = time.monotonic()
+        try:
+            responses = await self._abatch_internal(batch, max_concurrency)
+        except asyncio.CancelledError:
+            if breaker:
+                breaker.release()
+            raise
+        except Exception as e:
+            if breaker:
+                breaker.record_failure(time.monotonic() - start_time)
+            base_logger.warning(
+                "llm_native_batch_failed_falling_back",
+                model=self.model,
+                batch_size=len(batch),
+                error=str(e)
+            )
+            return None
+        
+        duration = time.monotonic() - start_time
+        for response in responses:
+            if isinstance(response, Exception):
+                if breaker:
+                    breaker.record_failure(duration)
+            else:
+                if breaker:
+                    breaker.record_success(duration)
+                self._record_usage(response, duration)
+        return responses
     
     def _get_fallback_response(self, error: Exception) -> AIMessage:
         """Production fallback response when all retries fail."""
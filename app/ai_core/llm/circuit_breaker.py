@@ -0,0 +1,278 @@
+"""Circuit breaker for LLM endpoints.
+
+One breaker exists per (endpoint, model) pair and is shared by every provider
+instance in the process, so a degraded endpoint is detected once instead of
+being rediscovered by each request through its full retry budget.
+"""
+
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, Optional, Tuple
+import threading
+import time
+
+from app.config.settings import settings
+from app.core.logger import logger
+from app.middleware.metrics import (
+    llm_circuit_breaker_state,
+    llm_circuit_breaker_transitions_total,
+    llm_circuit_breaker_rejections_total,
+)
+
+breaker_logger = logger.bind(module="llm_circuit_breaker")
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states."""
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+_STATE_GAUGE_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+class CircuitBreaker:
+    """
+    Count-based sliding window circuit breaker.
+    
+    The breaker trips when, over the last ``window_size`` calls (and at least
+    ``min_calls``), the error rate or the slow-call rate reaches its threshold.
+    While open, calls are rejected immediately. After ``open_seconds`` the
+    breaker lets a limited number of probe calls through (half-open); enough
+    successful probes close it again, any failed probe re-opens it.
+    """
+    
+    def __init__(
+        self,
+        endpoint: str,
+        model: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.8,
+        slow_call_seconds: float = 20.0,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 2,
+    ):
+        """
+        Initialize circuit breaker.
+        
+        Args:
+            endpoint: LLM endpoint (base URL) this breaker guards
+            model: Model name this breaker guards
+            failure_rate_threshold: Error rate (0-1) that opens the circuit
+            slow_call_rate_threshold: Slow-call rate (0-1) that opens the circuit
+            slow_call_seconds: Latency above which a call counts as slow
+            window_size: Number of recent calls considered
+            min_calls: Minimum calls in window before the rates are evaluated
+            open_seconds: Time to stay open before probing
+            half_open_max_calls: Probe calls allowed (and required) in half-open state
+        """
+        self.endpoint = endpoint
+        self.model = model
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        
+        self._lock = threading.Lock()
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        
+        llm_circuit_breaker_state.labels(endpoint=endpoint, model=model).set(0)
+    
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving OPEN to HALF_OPEN once the open period elapsed."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+    
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go through, reserving a probe slot if half-open.
+        
+        Returns:
+            True if the call is allowed
+        """
+        with self._lock:
+            self._maybe_half_open()
+            
+            if self._state == CircuitState.CLOSED:
+                return True
+            
+            if (self._state == CircuitState.HALF_OPEN
+                    and self._half_open_in_flight < self.half_open_max_calls):
+                self._half_open_in_flight += 1
+                return True
+        
+        llm_circuit_breaker_rejections_total.labels(
+            endpoint=self.endpoint,
+            model=self.model
+        ).inc()
+        return False
+    
+    def record_success(self, duration: float) -> None:
+        """
+        Record a successful call.
+        
+        Args:
+            duration: Call latency in seconds
+        """
+        slow = duration >= self.slow_call_seconds
+        
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if slow:
+                    self._transition(CircuitState.OPEN)
+                    return
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._transition(CircuitState.CLOSED)
+                return
+            
+            self._window.append((False, slow))
+            self._evaluate()
+    
+    def record_failure(self, duration: float) -> None:
+        """
+        Record a failed call.
+        
+        Args:
+            duration: Call latency in seconds
+        """
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._transition(CircuitState.OPEN)
+                return
+            
+            self._window.append((True, duration >= self.slow_call_seconds))
+            self._evaluate()
+    
+    def release(self) -> None:
+        """Release a reserved half-open probe slot without recording an outcome."""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+    
+    def retry_after(self) -> float:
+        """Seconds until the breaker will accept probe calls (0 if not open)."""
+        with self._lock:
+            if self._state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+    
+    def reset(self) -> None:
+        """Force the breaker back to closed with an empty window."""
+        with self._lock:
+            self._transition(CircuitState.CLOSED)
+    
+    def _evaluate(self) -> None:
+        """Open the circuit if the window exceeds a threshold (lock held)."""
+        if self._state != CircuitState.CLOSED:
+            return
+        
+        calls = len(self._window)
+        if calls < self.min_calls:
+            return
+        
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow_calls = sum(1 for _, slow in self._window if slow)
+        
+        if (failures / calls >= self.failure_rate_threshold
+                or slow_calls / calls >= self.slow_call_rate_threshold):
+            self._transition(CircuitState.OPEN)
+    
+    def _maybe_half_open(self) -> None:
+        """Move from OPEN to HALF_OPEN after the open period (lock held)."""
+        if (self._state == CircuitState.OPEN
+                and time.monotonic() - self._opened_at >= self.open_seconds):
+            self._transition(CircuitState.HALF_OPEN)
+    
+    def _transition(self, new_state: CircuitState) -> None:
+        """Switch state, resetting counters and publishing metrics (lock held)."""
+        old_state = self._state
+        self._state = new_state
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        
+        if new_state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        elif new_state == CircuitState.CLOSED:
+            self._window.clear()
+        
+        llm_circuit_breaker_state.labels(
+            endpoint=self.endpoint,
+            model=self.model
+        ).set(_STATE_GAUGE_VALUES[new_state])
+        
+        if old_state != new_state:
+            llm_circuit_breaker_transitions_total.labels(
+                endpoint=self.endpoint,
+                model=self.model,
+                state=new_state.value
+            ).inc()
+            
+            breaker_logger.warning(
+                "llm_circuit_breaker_transition",
+                endpoint=self.endpoint,
+                model=self.model,
+                from_state=old_state.value,
+                to_state=new_state.value
+            )
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint: Optional[str], model: str) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for an endpoint and model.
+    
+    Args:
+        endpoint: LLM endpoint (base URL); None means the provider default
+        model: Model name
+    
+    Returns:
+        Shared CircuitBreaker instance
+    """
+    key = (endpoint or "default", model)
+    
+    breaker = _breakers.get(key)
+    if breaker is not None:
+        return breaker
+    
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(
+                endpoint=key[0],
+                model=model,
+                failure_rate_threshold=settings.LLM_CIRCUIT_FAILURE_RATE_THRESHOLD,
+                slow_call_rate_threshold=settings.LLM_CIRCUIT_SLOW_CALL_RATE_THRESHOLD,
+                slow_call_seconds=settings.LLM_CIRCUIT_SLOW_CALL_SECONDS,
+                window_size=settings.LLM_CIRCUIT_WINDOW_SIZE,
+                min_calls=settings.LLM_CIRCUIT_MIN_CALLS,
+                open_seconds=settings.LLM_CIRCUIT_OPEN_SECONDS,
+                half_open_max_calls=settings.LLM_CIRCUIT_HALF_OPEN_MAX_CALLS,
+            )
+        return _breakers[key]
+
+
+def reset_circuit_breakers() -> None:
+    """Drop all breakers (used when settings change or between test runs)."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,364 @@
+"""Deterministic fake LLM provider for offline load testing."""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+from app.ai_core.llm.base import BaseLLMProvider
+from app.config.settings import settings
+from app.core.logger import logger
+
+fake_logger = logger.bind(module="fake_llm_provider")
+
+DEFAULT_SCRIPT: List[Dict[str, str]] = [
+    {
+        "pattern": r"You are an intent classifier",
+        "response": "chat 0.9",
+    },
+    {
+        "pattern": r"^<retrieval_plan>",
+        "response": (
+            '{{"intent": "factual", "analysis": "The user wants a direct answer from the documents.", '
+            '"sub_queries": [], "filters": {{}}}}'
+        ),
+    },
+    {
+        "pattern": r"^<plan>",
+        "response": (
+            "1. Identify the key concepts in the question\n"
+            "2. Search for documents matching those concepts\n"
+            "3. Rank the results by relevance\n"
+            "4. Compose an answer citing the best matches"
+        ),
+    },
+    {
+        "pattern": r"^<think>",
+        "response": (
+            "The user is asking a factual question. The key concepts should be "
+            "searched directly, and the answer should stay close to the sources."
+        ),
+    },
+]
+
+DEFAULT_TEMPLATE = (
+    "This is a simulated response from {model}. "
+    "You asked: {query}. "
+    "The fake provider replays scripted answers so the service can be benchmarked "
+    "without calling a paid endpoint."
+)
+
+_TOKEN_PATTERN = re.compile(r"\S+\s*")
+
+_rngs: Dict[int, random.Random] = {}
+_rngs_lock = threading.Lock()
+
+
+def _get_rng(seed: int) -> random.Random:
+    """Process-wide RNG per seed, so runs replay the same sequence of draws."""
+    with _rngs_lock:
+        if seed not in _rngs:
+            _rngs[seed] = random.Random(seed)
+        return _rngs[seed]
+
+
+class _SafeFormatDict(dict):
+    """Leave unknown template placeholders untouched."""
+    
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
+
+
+class FakeLLMProvider(BaseLLMProvider):
+    """
+    Fake LLM provider that replays scripted or templated responses.
+    
+    Responses come from an ordered list of regex rules matched against the
+    last message (first match wins) with a template fallback. Timing follows
+    a configurable time-to-first-token distribution plus a fixed token rate,
+    and a fraction of calls can fail with realistic 429 / 5xx errors. All
+    randomness comes from a seeded process-wide RNG, so a run is repeatable.
+    
+    Select it with ``LLM_PROVIDER=fake``; every ``FAKE_LLM_*`` setting is a
+    default that can be overridden per instance.
+    """
+    
+    supports_native_batch = True
+    
+    def __init__(
+        self,
+        model: str = "fake-model",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        enable_guardrail: bool = True,
+        script: Optional[List[Dict[str, str]]] = None,
+        script_path: Optional[str] = None,
+        response_template: Optional[str] = None,
+        latency_distribution: Optional[str] = None,
+        ttft_ms: Optional[float] = None,
+        ttft_stddev_ms: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        error_rate_429: Optional[float] = None,
+        error_rate_5xx: Optional[float] = None,
+        seed: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        Initialize fake provider.
+        
+        Args:
+            model: Reported model name
+            temperature: Ignored, kept for interface compatibility
+            max_tokens: Maximum tokens in response (responses are truncated)
+            enable_guardrail: Enable guardrail validation
+            script: Ordered rules ``{"pattern": regex, "response": template}``
+            script_path: JSON file with ``{"rules": [...], "default": template}``
+            response_template: Template used when no rule matches
+            latency_distribution: "constant", "uniform", "normal" or "lognormal"
+            ttft_ms: Mean time to first token in milliseconds
+            ttft_stddev_ms: Spread of the time to first token in milliseconds
+            tokens_per_second: Generation speed after the first token
+            error_rate_429: Fraction of calls failing with 429 Too Many Requests
+            error_rate_5xx: Fraction of calls failing with 503 Service Unavailable
+            seed: RNG seed for latency and error draws
+            **kwargs: Accepted and ignored (api_key, base_url, ...)
+        """
+        kwargs.pop("api_key", None)
+        kwargs.pop("base_url", None)
+        super().__init__(model, temperature, max_tokens, enable_guardrail, **kwargs)
+        
+        script_path = script_path if script_path is not None else settings.FAKE_LLM_SCRIPT_PATH
+        file_rules, file_default = self._load_script(script_path) if script_path else ([], None)
+        
+        rules = (script or []) + file_rules + DEFAULT_SCRIPT
+        self._rules = [(re.compile(rule["pattern"], re.MULTILINE), rule["response"]) for rule in rules]
+        self.response_template = (
+            response_template
+            or file_default
+            or settings.FAKE_LLM_RESPONSE_TEMPLATE
+            or DEFAULT_TEMPLATE
+        )
+        
+        self.latency_distribution = latency_distribution or settings.FAKE_LLM_LATENCY_DISTRIBUTION
+        self.ttft_ms = ttft_ms if ttft_ms is not None else settings.FAKE_LLM_TTFT_MS
+        self.ttft_stddev_ms = ttft_stddev_ms if ttft_stddev_ms is not None else settings.FAKE_LLM_TTFT_STDDEV_MS
+        self.tokens_per_second = tokens_per_second or settings.FAKE_LLM_TOKENS_PER_SECOND
+        self.error_rate_429 = error_rate_429 if error_rate_429 is not None else settings.FAKE_LLM_ERROR_RATE_429
+        self.error_rate_5xx = error_rate_5xx if error_rate_5xx is not None else settings.FAKE_LLM_ERROR_RATE_5XX
+        self._rng = _get_rng(seed if seed is not None else settings.FAKE_LLM_SEED)
+        
+        if self.latency_distribution not in ("constant", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unsupported latency distribution: {self.latency_distribution}")
+    
+    def _get_endpoint(self) -> str:
+        """Endpoint identifier used to key the shared circuit breakers."""
+        return "fake://local"
+    
+    def _initialize_client(self) -> Any:
+        """No client is needed; return the provider itself."""
+        return self
+    
+    async def _ainvoke_internal(self, messages: List[BaseMessage]) -> Any:
+        """
+        Simulate a full completion: wait TTFT plus generation time, then answer.
+        
+        Args:
+            messages: List of messages to send
+        
+        Returns:
+            AI response message with token usage
+        """
+        ttft, error = self._draw_call()
+        tokens = self._render_tokens(messages)
+        
+        await asyncio.sleep(ttft)
+        if error:
+            raise error
+        await asyncio.sleep(len(tokens) / self.tokens_per_second)
+        
+        return AIMessage(
+            content="".join(tokens),
+            usage_metadata=self._usage(messages, tokens),
+            response_metadata={"model_name": self.model, "finish_reason": "stop"},
+        )
+    
+    async def _astream_internal(self, messages: List[BaseMessage]) -> AsyncIterator[Any]:
+        """
+        Simulate a streamed completion: first token after TTFT, then one per tick.
+        
+        Args:
+            messages: List of messages to send
+        
+        Yields:
+            AI message chunks (the last one carries token usage)
+        """
+        ttft, error = self._draw_call()
+        tokens = self._render_tokens(messages)
+        
+        await asyncio.sleep(ttft)
+        if error:
+            raise error
+        
+        interval = 1.0 / self.tokens_per_second
+        for index, token in enumerate(tokens):
+            if index:
+                await asyncio.sleep(interval)
+            yield AIMessageChunk(content=token)
+        
+        yield AIMessageChunk(
+            content="",
+            usage_metadata=self._usage(messages, tokens),
+            response_metadata={"model_name": self.model, "finish_reason": "stop"},
+        )
+    
+    async def _abatch_internal(self, batch: List[List[BaseMessage]], max_concurrency: int) -> List[Any]:
+        """
+        Simulate a native batch request: one TTFT and error draw for the whole batch.
+        
+        Args:
+            batch: One message list per item
+            max_concurrency: Ignored, the batch is served as a single request
+            
+        Returns:
+            One AI response message per item, in input order
+        """
+        ttft, error = self._draw_call()
+        rendered = [self._render_tokens(messages) for messages in batch]
+        
+        await asyncio.sleep(ttft)
+        if error:
+            raise error
+        await asyncio.sleep(max(len(tokens) for tokens in rendered) / self.tokens_per_second)
+        
+        return [
+            AIMessage(
+                content="".join(tokens),
+                usage_metadata=self._usage(messages, tokens),
+                response_metadata={"model_name": self.model, "finish_reason": "stop"},
+            )
+            for messages, tokens in zip(batch, rendered)
+        ]
+    
+    def _invoke_internal(self, messages: List[BaseMessage]) -> Any:
+        """
+        Synchronous variant of the simulated completion.
+        
+        Args:
+            messages: List of messages to send
+        
+        Returns:
+            AI response message with token usage
+        """
+        ttft, error = self._draw_call()
+        tokens = self._render_tokens(messages)
+        
+        time.sleep(ttft)
+        if error:
+            raise error
+        time.sleep(len(tokens) / self.tokens_per_second)
+        
+        return AIMessage(
+            content="".join(tokens),
+            usage_metadata=self._usage(messages, tokens),
+            response_metadata={"model_name": self.model, "finish_reason": "stop"},
+        )
+    
+    def _draw_call(self) -> tuple[float, Optional[Exception]]:
+        """
+        Draw time to first token (seconds) and an optional injected error.
+        
+        Returns:
+            Tuple of (ttft_seconds, error or None)
+        """
+        mean = self.ttft_ms / 1000
+        spread = self.ttft_stddev_ms / 1000
+        
+        if self.latency_distribution == "constant":
+            ttft = mean
+        elif self.latency_distribution == "uniform":
+            ttft = self._rng.uniform(mean - spread, mean + spread)
+        elif self.latency_distribution == "normal":
+            ttft = self._rng.gauss(mean, spread)
+        elif mean > 0:
+            sigma_squared = math.log(1 + (spread / mean) ** 2)
+            ttft = self._rng.lognormvariate(math.log(mean) - sigma_squared / 2, math.sqrt(sigma_squared))
+        else:
+            ttft = 0.0
+        
+        roll = self._rng.random()
+        if roll < self.error_rate_429:
+            return max(0.0, ttft), self._make_error(429)
+        if roll < self.error_rate_429 + self.error_rate_5xx:
+            return max(0.0, ttft), self._make_error(503)
+        return max(0.0, ttft), None
+    
+    def _make_error(self, status_code: int) -> Exception:
+        """Build the same exception type the OpenAI client raises for a status code."""
+        request = httpx.Request("POST", "http://fake.local/v1/chat/completions")
+        response = httpx.Response(status_code, request=request)
+        
+        if status_code == 429:
+            return openai.RateLimitError("Fake rate limit exceeded", response=response, body=None)
+        return openai.InternalServerError("Fake upstream unavailable", response=response, body=None)
+    
+    def _render_tokens(self, messages: List[BaseMessage]) -> List[str]:
+        """Pick the scripted response for the last message and split it into tokens."""
+        query = self._content(messages[-1]) if messages else ""
+        
+        template = self.response_template
+        for pattern, response in self._rules:
+            if pattern.search(query):
+                template = response
+                break
+        
+        text = template.format_map(_SafeFormatDict(
+            query=query[:200],
+            model=self.model,
+            message_count=len(messages),
+        ))
+        return _TOKEN_PATTERN.findall(text)[:self.max_tokens] or [text]
+    
+    def _usage(self, messages: List[BaseMessage], tokens: List[str]) -> dict[str, int]:
+        """Approximate token usage (about four characters per prompt token)."""
+        prompt_chars = sum(len(self._content(msg)) for msg in messages)
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = len(tokens)
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+    
+    @staticmethod
+    def _content(message: Any) -> str:
+        """Text of a message object or ``{"role", "content"}`` dict."""
+        if isinstance(message, dict):
+            return str(message.get("content", ""))
+        return str(getattr(message, "content", message))
+    
+    @staticmethod
+    def _load_script(path: str) -> tuple[List[Dict[str, str]], Optional[str]]:
+        """
+        Load scripted rules from a JSON file.
+        
+        Args:
+            path: File with ``{"rules": [{"pattern", "response"}], "default": str}``
+        
+        Returns:
+            Tuple of (rules, default template)
+        """
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if isinstance(data, list):
+            return data, None
+        
+        fake_logger.info("fake_llm_script_loaded", path=path, rules=len(data.get("rules", [])))
+        return data.get("rules", []), data.get("default")
@@ -7,12 +7,14 @@ import logging
 from app.ai_core.llm.base import BaseLLMProvider
 from app.ai_core.llm.openai_provider import OpenAIProvider
 from app.ai_core.llm.bedrock_provider import BedrockProvider
+from app.ai_core.llm.fake_provider import FakeLLMProvider
 
 
 class LLMProviderType(str, Enum):
     """Supported LLM provider types."""
     OPENAI = "openai"
     BEDROCK = "bedrock"
+    FAKE = "fake"
 
 
 class LLMFactory:
@@ -102,3 +104,11 @@ class LLMFactory:
             List of available provider types
         """
         return list(cls._providers.keys())
+
+
+def _register_builtin_providers():
+    """Register providers that are not part of the default mapping."""
+    LLMFactory.register_provider(LLMProviderType.FAKE, FakeLLMProvider)
+
+
+_register_builtin_providers()
@@ -0,0 +1,414 @@
+"""Token usage metering for LLM calls.
+
+Every ``BaseLLMProvider`` call and stream reports its token usage here. Usage is
+attributed to the current user, session, agent and graph node, counted in
+Prometheus immediately, and buffered for asynchronous batch inserts into the
+``llm_usage`` table so the request path never waits on the database.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+import asyncio
+import time
+
+from app.config.settings import settings
+from app.core.logger import logger
+from app.middleware.metrics import (
+    llm_token_count,
+    llm_agent_token_count,
+    llm_usage_records_dropped_total,
+)
+from app.types import TokenUsage, UsageAttribution
+
+metering_logger = logger.bind(module="llm_metering")
+
+_usage_attribution: ContextVar[UsageAttribution] = ContextVar("usage_attribution", default={})
+
+
+@contextmanager
+def usage_context(
+    user_id: Optional[int] = None,
+    session_id: Optional[int | str] = None,
+    agent_type: Optional[str] = None,
+    node: Optional[str] = None,
+) -> Iterator[UsageAttribution]:
+    """
+    Attribute LLM calls made inside the block to a user, session, agent or node.
+    
+    Unset arguments inherit from the enclosing context, so nested blocks only
+    need to name what they change.
+    
+    Args:
+        user_id: User to charge
+        session_id: Session to charge
+        agent_type: Agent making the calls
+        node: Graph node or step making the calls
+    
+    Yields:
+        The effective attribution
+    """
+    current = dict(_usage_attribution.get())
+    updates = {
+        "user_id": user_id,
+        "session_id": _to_int(session_id),
+        "agent_type": agent_type,
+        "node": node,
+    }
+    current.update({key: value for key, value in updates.items() if value is not None})
+    
+    token = _usage_attribution.set(current)
+    try:
+        yield current
+    finally:
+        _usage_attribution.reset(token)
+
+
+def get_usage_attribution() -> UsageAttribution:
+    """
+    Resolve the attribution for an LLM call.
+    
+    Values set with ``usage_context`` take precedence; gaps are filled from the
+    LangGraph run config (``BaseAgent`` puts user, session and agent into its
+    metadata and LangGraph adds the executing node).
+    
+    Returns:
+        Attribution for the current call
+    """
+    attribution: UsageAttribution = {}
+    
+    try:
+        from langgraph.config import get_config
+        metadata = get_config().get("metadata", {})
+        attribution = {
+            "user_id": _to_int(metadata.get("user_id")),
+            "session_id": _to_int(metadata.get("session_id")),
+            "agent_type": metadata.get("agent_type"),
+            "node": metadata.get("langgraph_node"),
+        }
+    except Exception:
+        pass
+    
+    attribution.update({
+        key: value for key, value in _usage_attribution.get().items() if value is not None
+    })
+    return attribution
+
+
+def extract_token_usage(message: Any) -> TokenUsage:
+    """
+    Extract token counts from a LangChain message or chunk.
+    
+    Prefers the provider-neutral ``usage_metadata`` and falls back to the
+    OpenAI-style ``response_metadata["token_usage"]``.
+    
+    Args:
+        message: AIMessage, AIMessageChunk or any object returned by a provider
+    
+    Returns:
+        Token usage (all zeros if the provider reported nothing)
+    """
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if usage_metadata:
+        input_details = usage_metadata.get("input_token_details") or {}
+        prompt_tokens = usage_metadata.get("input_tokens", 0) or 0
+        completion_tokens = usage_metadata.get("output_tokens", 0) or 0
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": input_details.get("cache_read", 0) or 0,
+            "total_tokens": usage_metadata.get("total_tokens") or prompt_tokens + completion_tokens,
+        }
+    
+    response_metadata = getattr(message, "response_metadata", None) or {}
+    token_usage = response_metadata.get("token_usage") or {}
+    prompt_details = token_usage.get("prompt_tokens_details") or {}
+    prompt_tokens = token_usage.get("prompt_tokens", 0) or 0
+    completion_tokens = token_usage.get("completion_tokens", 0) or 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": prompt_details.get("cached_tokens", 0) or 0,
+        "total_tokens": token_usage.get("total_tokens") or prompt_tokens + completion_tokens,
+    }
+
+
+def merge_token_usage(total: TokenUsage, usage: TokenUsage) -> TokenUsage:
+    """
+    Add one usage report to a running total (used for stream chunks).
+    
+    Args:
+        total: Running total
+        usage: Usage to add
+    
+    Returns:
+        Updated total
+    """
+    for key in ("prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens"):
+        total[key] = total.get(key, 0) + usage.get(key, 0)
+    return total
+
+
+class UsageMeter:
+    """
+    Buffers usage records and writes them to the database in batches.
+    
+    ``record`` is synchronous and never blocks: it updates Prometheus counters
+    and appends to an in-memory buffer. A background task flushes the buffer
+    every ``flush_interval`` seconds or as soon as ``batch_size`` records are
+    waiting. When the buffer is full, new records are dropped and counted
+    rather than slowing down requests.
+    """
+    
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        max_buffer_size: int = 10000,
+        persist: bool = True,
+    ):
+        """
+        Initialize usage meter.
+        
+        Args:
+            batch_size: Records per database insert
+            flush_interval: Maximum seconds a record waits in the buffer
+            max_buffer_size: Records kept before new ones are dropped
+            persist: Write records to the database (False keeps metrics only)
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer_size = max_buffer_size
+        self.persist = persist
+        
+        self._buffer: List[dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+    
+    def record(
+        self,
+        model: str,
+        usage: TokenUsage,
+        latency: Optional[float] = None,
+        attribution: Optional[UsageAttribution] = None,
+    ) -> None:
+        """
+        Record token usage of one LLM call.
+        
+        Args:
+            model: Model that served the call
+            usage: Token counts
+            latency: Call latency in seconds
+            attribution: Attribution (resolved from context when omitted)
+        """
+        attribution = attribution if attribution is not None else get_usage_attribution()
+        agent_type = attribution.get("agent_type") or "none"
+        node = attribution.get("node") or "none"
+        
+        for token_type in ("prompt", "completion", "cached"):
+            count = usage.get(f"{token_type}_tokens", 0)
+            if not count:
+                continue
+            llm_token_count.labels(model=model, type=token_type).inc(count)
+            llm_agent_token_count.labels(
+                model=model,
+                agent_type=agent_type,
+                node=node,
+                type=token_type
+            ).inc(count)
+        
+        if not self.persist or self._stopping:
+            return
+        
+        if len(self._buffer) >= self.max_buffer_size:
+            llm_usage_records_dropped_total.inc()
+            return
+        
+        self._buffer.append({
+            "user_id": attribution.get("user_id"),
+            "session_id": attribution.get("session_id"),
+            "agent_type": attribution.get("agent_type"),
+            "node": attribution.get("node"),
+            "model": model,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "cached_tokens": usage.get("cached_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+            "latency_ms": latency * 1000 if latency is not None else None,
+        })
+        
+        self._ensure_started()
+        if len(self._buffer) >= self.batch_size and self._wakeup:
+            self._wakeup.set()
+    
+    async def flush(self) -> int:
+        """
+        Write all buffered records to the database.
+        
+        Returns:
+            Number of records written
+        """
+        written = 0
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            written += await self._write_batch(batch)
+        return written
+    
+    async def stop(self) -> None:
+        """Stop the background task and flush what is left."""
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._stopping = False
+    
+    def _ensure_started(self) -> None:
+        """Start the flush task on the running event loop if needed."""
+        if self._task is not None and not self._task.done():
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+    
+    async def _run(self) -> None:
+        """Flush periodically or when a full batch is waiting."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                metering_logger.error("usage_flush_failed", error=str(e))
+    
+    async def _write_batch(self, batch: List[dict[str, Any]], clear_missing: bool = False) -> int:
+        """
+        Insert one batch of usage rows.
+        
+        A user or session deleted since the call (or never valid) fails the
+        whole insert on its foreign key. The batch is then retried once with
+        those references cleared, so other rows in it are not lost.
+        
+        Args:
+            batch: Usage rows
+            clear_missing: Clear references to missing users and sessions first
+        
+        Returns:
+            Number of rows written
+        """
+        from sqlalchemy.exc import IntegrityError
+        from app.database.session import async_session_factory
+        from app.models.llm_usage import LLMUsage
+        from app.repositories.llm_usage import LLMUsageRepository
+        
+        start_time = time.monotonic()
+        try:
+            if clear_missing:
+                batch = await self._clear_missing_references(batch)
+            async with async_session_factory() as session:
+                repository = LLMUsageRepository(session)
+                written = await repository.bulk_create([LLMUsage(**row) for row in batch])
+                await session.commit()
+            
+            metering_logger.debug(
+                "usage_batch_written",
+                records=written,
+                duration_ms=int((time.monotonic() - start_time) * 1000)
+            )
+            return written
+        
+        except IntegrityError as e:
+            if not clear_missing:
+                metering_logger.warning("usage_batch_references_missing", records=len(batch), error=str(e))
+                return await self._write_batch(batch, clear_missing=True)
+            llm_usage_records_dropped_total.inc(len(batch))
+            metering_logger.error("usage_batch_write_failed", records=len(batch), error=str(e))
+            return 0
+        
+        except Exception as e:
+            llm_usage_records_dropped_total.inc(len(batch))
+            metering_logger.error(
+                "usage_batch_write_failed",
+                records=len(batch),
+                error=str(e)
+            )
+            return 0
+    
+    async def _clear_missing_references(self, batch: List[dict[str, Any]]) -> List[dict[str, Any]]:
+        """Copy of ``batch`` with user and session ids that no longer exist set to None."""
+        from app.database.session import async_session_factory
+        from app.models.session import Session
+        from app.models.user import User
+        
+        async with async_session_factory() as session:
+            users = await _existing_ids(session, User, {row["user_id"] for row in batch if row["user_id"] is not None})
+            sessions = await _existing_ids(
+                session, Session, {row["session_id"] for row in batch if row["session_id"] is not None}
+            )
+        
+        return [
+            {
+                **row,
+                "user_id": row["user_id"] if row["user_id"] in users else None,
+                "session_id": row["session_id"] if row["session_id"] in sessions else None,
+            }
+            for row in batch
+        ]
+
+
+async def _existing_ids(session: Any, model: Any, ids: set[int]) -> set[int]:
+    """Subset of ``ids`` that are primary keys of ``model``."""
+    from sqlalchemy import select
+    
+    if not ids:
+        return set()
+    result = await session.execute(select(model.id).where(model.id.in_(ids)))
+    return set(result.scalars().all())
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Convert ids that may arrive as strings (e.g. thread ids) to int."""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_usage_meter: Optional[UsageMeter] = None
+
+
+def get_usage_meter() -> UsageMeter:
+    """
+    Get usage meter instance (singleton).
+    
+    Returns:
+        UsageMeter instance
+    """
+    global _usage_meter
+    
+    if _usage_meter is None:
+        _usage_meter = UsageMeter(
+            batch_size=settings.USAGE_METERING_BATCH_SIZE,
+            flush_interval=settings.USAGE_METERING_FLUSH_INTERVAL_SECONDS,
+            max_buffer_size=settings.USAGE_METERING_MAX_BUFFER_SIZE,
+            persist=settings.USAGE_METERING_PERSIST,
+        )
+    
+    return _usage_meter
@@ -1,6 +1,6 @@
 """OpenAI LLM Provider implementation."""
 
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, List, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import BaseMessage
 import logging
@@ -17,6 +17,9 @@ logger = logging.getLogger(__name__)
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI LLM provider using langchain_openai."""
     
+    # ChatOpenAI.abatch runs concurrent ainvoke calls (there is no batch endpoint behind it)
+    supports_native_batch = True
+    
     def __init__(
         self,
         model: str = "gpt-4",
@@ -43,6 +46,10 @@ class OpenAIProvider(BaseLLMProvider):
         self.api_key = api_key
         self.base_url = base_url
     
+    def _get_endpoint(self) -> str:
+        """Endpoint identifier used to key the shared circuit breakers."""
+        return self.base_url or "https://api.openai.com/v1"
+    
     def _initialize_client(self) -> ChatOpenAI:
         """
         Initialize the ChatOpenAI client with optional Langfuse tracing.
@@ -54,6 +61,7 @@ class OpenAIProvider(BaseLLMProvider):
             "model": self.model,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
+            "stream_usage": True,
         }
         
         if self.api_key:
@@ -80,19 +88,53 @@ class OpenAIProvider(BaseLLMProvider):
         
         Args:
             messages: List of messages to send
-            
+        
         Returns:
             AI response message
         """
         return await self.client.ainvoke(messages)
     
+    async def _astream_internal(self, messages: List[BaseMessage]) -> AsyncIterator[Any]:
+        """
+        Internal streaming implementation for OpenAI.
+        
+        Args:
+            messages: List of messages to send
+        
+        Yields:
+            AI message chunks (the last one carries token usage)
+        """
+        async for chunk in self.client.astream(messages):
+            yield chunk
+    
+    async def _abatch_internal(self, batch: List[List[BaseMessage]], max_concurrency: int) -> List[Any]:
+        """
+        Internal batch implementation for OpenAI.
+        
+        ``ChatOpenAI.abatch`` is not a batch endpoint: it runs one ``ainvoke``
+        per prompt concurrently, bounded by ``max_concurrency``, through one
+        client so they share its connection pool and tracing callbacks.
+        
+        Args:
+            batch: One message list per item
+            max_concurrency: Maximum concurrent requests
+        
+        Returns:
+            One AI response message or exception per item, in input order
+        """
+        return await self.client.abatch(
+            batch,
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
+        )
+    
     def _invoke_internal(self, messages: List[BaseMessage]) -> Any:
         """
         Internal sync invoke implementation for OpenAI.
         
         Args:
             messages: List of messages to send
-            
+        
         Returns:
             AI response message
         """
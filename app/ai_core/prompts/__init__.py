@@ -6,6 +6,7 @@ from .rag_prompts import (
     get_rag_generation_prompt,
     get_rag_thinking_prompt,
     get_rag_planning_prompt,
+    get_rag_reasoning_prompt,
     RAG_SYSTEM_PROMPT,
 )
 from .neo4j_prompts import (
@@ -21,6 +22,7 @@ __all__ = [
     "get_rag_generation_prompt",
     "get_rag_thinking_prompt",
     "get_rag_planning_prompt",
+    "get_rag_reasoning_prompt",
     "RAG_SYSTEM_PROMPT",
     "get_neo4j_analysis_prompt",
     "get_neo4j_generation_prompt",
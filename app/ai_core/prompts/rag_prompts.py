@@ -98,4 +98,38 @@ Create a detailed retrieval and answer plan with numbered steps:
 Format: Use numbered list (1., 2., 3., etc.) with sub-points."""
 
 
+def get_rag_reasoning_prompt(query: str) -> str:
+    """Generate fused RAG analysis-and-plan prompt (single structured call).
+    
+    Args:
+        query: User's question
+        
+    Returns:
+        Formatted reasoning prompt asking for a JSON retrieval plan
+    """
+    return f"""<retrieval_plan>
+User Query: {query}
+
+Instructions:
+Analyze the query and plan the document search in one step.
+Return the retrieval plan as JSON only, with no text before or after it:
+
+{{
+  "intent": "factual" | "comparison" | "procedural" | "exploratory" | "other",
+  "analysis": "One or two sentences on what the user needs",
+  "sub_queries": ["Up to 3 focused search queries, empty if the query is already precise"],
+  "filters": {{
+    "document_type": null,
+    "tags": [],
+    "date_from": null,
+    "date_to": null
+  }}
+}}
+
+Rules:
+- Only add sub_queries that cover parts of the question the raw query would miss
+- Only set filters the user explicitly asked for; dates use YYYY-MM-DD
+</retrieval_plan>"""
+
+
 RAG_GENERATION_PROMPT = get_rag_generation_prompt
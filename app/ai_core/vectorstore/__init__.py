@@ -1,11 +1,39 @@
 """Vector store implementations."""
 
-from .base import BaseVectorStore
+from .ann_store import ANNVectorStore
+from .base import BaseVectorStore, fuse_query_rankings, reciprocal_rank_fusion
+from .factory import create_vector_store
+from .ivf_index import IVFIndex
+from .lexical_index import BM25Index
+from .matrix_index import MatrixIndex
+from .memory_store import InMemoryVectorStore
+from .metadata_index import MetadataIndex
+from .packing import pack_context
 from .pgvector_store import PgVectorStore
-from .embeddings import get_embedding_function
+from .query_expansion import expand_query
+from .rerank import Reranker, maximal_marginal_relevance
+from .retrieval_cache import RetrievalCache
+from .embeddings import create_embedding_function, get_embedding_function
+from .hashing_embeddings import HashingEmbeddingFunction
 
 __all__ = [
+    "ANNVectorStore",
+    "BM25Index",
     "BaseVectorStore",
+    "HashingEmbeddingFunction",
+    "IVFIndex",
+    "InMemoryVectorStore",
+    "MatrixIndex",
+    "MetadataIndex",
     "PgVectorStore",
+    "Reranker",
+    "RetrievalCache",
+    "create_embedding_function",
+    "create_vector_store",
+    "expand_query",
+    "fuse_query_rankings",
     "get_embedding_function",
+    "maximal_marginal_relevance",
+    "pack_context",
+    "reciprocal_rank_fusion",
 ]
@@ -0,0 +1,499 @@
+"""In-process approximate nearest-neighbor vector store."""
+
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+import time
+
+from app.ai_core.vectorstore.base import BaseVectorStore, Document
+from app.ai_core.vectorstore.embeddings import get_embedding_function
+from app.ai_core.vectorstore.ivf_index import IVFIndex
+from app.ai_core.vectorstore.lexical_index import BM25Index
+from app.ai_core.vectorstore.metadata_index import POSTFILTER, UNFILTERED, MetadataIndex
+from app.ai_core.vectorstore.snapshot import Snapshot, current_name, open_snapshot, write_snapshot
+from app.config.settings import settings
+from app.types import VectorStoreConfig, VectorStoreFilter, DocumentWithScore, VectorStoreStats
+
+logger = logging.getLogger(__name__)
+
+
+class ANNVectorStore(BaseVectorStore):
+    """
+    Vector store backed by an in-process IVF index.
+    
+    Retrieval never leaves the process, which suits single-node and dev
+    deployments; use PgVectorStore when several workers share the data.
+    
+    Features:
+    - Approximate top-k with per-query ``nprobe`` (recall vs latency)
+    - Incremental inserts, tombstone deletes and ``compact``
+    - ``save``/``load`` as memory-mapped snapshots: workers loading the same
+      snapshot share its pages, and a worker that has not written since
+      loading switches to a newer snapshot automatically
+    - Metadata filtering (same semantics as PgVectorStore) through an
+      inverted index, built on the first filtered search after a load
+    - BM25 keyword search for ``hybrid_search_with_score``, indexed on the
+      first keyword search after a load
+    """
+    
+    backend = "ann"
+    
+    def __init__(self, config: Optional[VectorStoreConfig] = None):
+        """
+        Initialize ANN store.
+        
+        Opens the current snapshot under ``index_path`` (or ANN_INDEX_PATH) if there is one.
+        
+        Args:
+            config: Store configuration (embedding_dimension, nlist, nprobe, index_path)
+        """
+        super().__init__(config)
+        config = self.config
+        
+        self._dimension = config.get("embedding_dimension", settings.PGVECTOR_DIMENSION)
+        self.nprobe = config.get("nprobe", settings.ANN_NPROBE)
+        self.index_path = config.get("index_path", settings.ANN_INDEX_PATH) or None
+        self.embeddings = get_embedding_function(self._dimension)
+        self._index = IVFIndex(
+            self._dimension,
+            nlist=config.get("nlist", settings.ANN_NLIST),
+            nprobe=self.nprobe,
+        )
+        
+        # Documents added since loading; the rest are decoded from the snapshot on access
+        self._documents: Dict[str, Document] = {}
+        self._snapshot: Optional[Snapshot] = None
+        self._snapshot_rows: Dict[str, int] = {}
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._lexical_index: Optional[BM25Index] = None
+        self._dirty = False
+        self._checked_at = time.monotonic()
+        self._skipped_snapshot: Optional[str] = None
+        
+        if self.index_path and current_name(self.index_path):
+            self.load(self.index_path)
+        
+        logger.info(
+            f"Initialized ANNVectorStore dimension={self._dimension} "
+            f"nlist={self._index.nlist} nprobe={self.nprobe} documents={len(self._index)}"
+        )
+    
+    async def add_documents(
+        self,
+        documents: List[Document],
+        **kwargs
+    ) -> List[str]:
+        """
+        Add or overwrite documents.
+        
+        Documents without an embedding are embedded first in one call. The
+        batch that crosses the training threshold also trains the index.
+        
+        Args:
+            documents: List of documents to add
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of added document IDs
+        """
+        if not documents:
+            return []
+        
+        missing = [doc for doc in documents if not doc.embedding]
+        if missing:
+            embeddings = await self.embeddings.embed_documents([doc.content for doc in missing])
+            for doc, embedding in zip(missing, embeddings):
+                doc.embedding = embedding
+        
+        self._index.add([doc.id for doc in documents], [doc.embedding for doc in documents])
+        for doc in documents:
+            self._documents[doc.id] = Document(id=doc.id, content=doc.content, metadata=doc.metadata)
+            self._snapshot_rows.pop(doc.id, None)
+            if self._metadata_index is not None:
+                self._metadata_index.add(doc.id, doc.metadata)
+            if self._lexical_index is not None:
+                self._lexical_index.add(doc.id, doc.content)
+        self._dirty = True
+        self._index_changed()
+        
+        logger.info(f"Added {len(documents)} documents to ANN index ({len(self._index)} total)")
+        return [doc.id for doc in documents]
+    
+    async def similarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[Document]:
+        """
+        Search for similar documents.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: See ``similarity_search_by_vector``
+        
+        Returns:
+            List of similar documents
+        """
+        results = await self.similarity_search_with_score(
+            query=query,
+            k=k,
+            filter_dict=filter_dict,
+            **kwargs
+        )
+        return [doc for doc, _ in results]
+    
+    async def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Search for similar documents with scores.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: See ``similarity_search_by_vector``
+        
+        Returns:
+            List of (document, score) tuples, best first
+        """
+        query_embedding = await self.embeddings.embed_query(query)
+        return await self.similarity_search_by_vector(query_embedding, k, filter_dict, **kwargs)
+    
+    async def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        nprobe: Optional[int] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Approximate top-k for a query embedding.
+        
+        Selective filters restrict the scan to matching documents; a filtered
+        search that finds fewer than k of them in the probed cells is retried
+        over every cell, so selective filters still fill k. Broad filters run
+        an oversampled unfiltered search and drop non-matching results.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            filter_dict: Metadata filters
+            nprobe: Cells to scan (default: the store's ``nprobe``)
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, score) tuples, best first
+        """
+        self._maybe_refresh()
+        
+        nprobe = nprobe or self.nprobe
+        metadata_index = self._filter_index() if filter_dict else None
+        plan = metadata_index.plan(filter_dict, settings.VECTOR_FILTER_PREFILTER_BELOW) if filter_dict else None
+        
+        if plan is None or plan.strategy == UNFILTERED:
+            hits = self._index.search(embedding, k, nprobe)
+        else:
+            hits = []
+            if plan.strategy == POSTFILTER:
+                hits = self._index.search(embedding, plan.fetch_size(k, len(self._index)), nprobe)
+                hits = [hit for hit in hits if metadata_index.matches(hit[0], filter_dict)][:k]
+                if len(hits) < k:
+                    plan.candidates = metadata_index.candidates(filter_dict)
+            
+            if len(hits) < k and plan.candidates:
+                allowed = self._index.allowed(plan.candidates)
+                hits = self._index.search(embedding, k, nprobe, allowed)
+                if len(hits) < min(k, len(plan.candidates)):
+                    hits = self._index.search(embedding, k, self._index.cells, allowed)
+        
+        return [(self._document(doc_id), max(0.0, min(1.0, score))) for doc_id, score in hits]
+    
+    async def lexical_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        BM25 keyword search.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, BM25 score) tuples, best first
+        """
+        self._maybe_refresh()
+        
+        candidates = self._filter_index().candidates(filter_dict) if filter_dict else None
+        hits = self._text_index().search(query, k, candidates)
+        return [(self._document(doc_id), score) for doc_id, score in hits]
+    
+    async def delete_by_ids(self, ids: List[str]) -> bool:
+        """
+        Delete documents by IDs (tombstoned in the index until ``compact``).
+        
+        Args:
+            ids: Document IDs to delete
+        
+        Returns:
+            True if successful
+        """
+        for doc_id in ids:
+            self._documents.pop(doc_id, None)
+            self._snapshot_rows.pop(doc_id, None)
+            if self._metadata_index is not None:
+                self._metadata_index.remove(doc_id)
+            if self._lexical_index is not None:
+                self._lexical_index.remove(doc_id)
+        removed = self._index.delete(ids)
+        self._dirty = True
+        self._index_changed()
+        
+        logger.info(f"Deleted {removed} documents from ANN index ({self._index.tombstones} tombstones)")
+        return True
+    
+    async def get_by_ids(self, ids: List[str]) -> List[Document]:
+        """
+        Get documents by IDs.
+        
+        Args:
+            ids: Document IDs to retrieve
+        
+        Returns:
+            List of documents (without embeddings)
+        """
+        return [self._document(doc_id) for doc_id in ids if doc_id in self._index]
+    
+    async def get_by_document_id(self, document_id: int) -> List[Document]:
+        """
+        Get the chunks of a source document.
+        
+        Args:
+            document_id: ``document_id`` metadata of the chunks
+        
+        Returns:
+            List of chunks (without embeddings)
+        """
+        self._maybe_refresh()
+        ids = self._filter_index().candidates({"metadata": {"document_id": document_id}})
+        return [self._document(doc_id) for doc_id in ids]
+    
+    async def update_metadata(self, metadata: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace the metadata of stored documents, keeping their embeddings.
+        
+        Args:
+            metadata: New metadata by document id (unknown ids are ignored)
+        """
+        for doc_id, doc_metadata in metadata.items():
+            if doc_id not in self._index:
+                continue
+            doc = self._document(doc_id)
+            self._documents[doc_id] = Document(id=doc_id, content=doc.content, metadata=doc_metadata)
+            self._snapshot_rows.pop(doc_id, None)
+            if self._metadata_index is not None:
+                self._metadata_index.add(doc_id, doc_metadata)
+        self._dirty = True
+        self._index_changed()
+    
+    async def get_tombstone_ratio(self) -> float:
+        """
+        Fraction of index slots held by deleted or overwritten documents.
+        
+        Returns:
+            Ratio between 0 and 1
+        """
+        slots = len(self._index) + self._index.tombstones
+        return self._index.tombstones / slots if slots else 0.0
+    
+    async def rebuild_index(self) -> None:
+        """
+        Drop tombstones and re-cluster the remaining vectors.
+        
+        Cells trained before heavy churn no longer fit the data; retraining
+        restores recall at the same ``nprobe``.
+        """
+        removed = self.compact()
+        if self._index.is_trained:
+            self.train()
+        logger.info(f"Rebuilt ANN index: {removed} tombstones dropped, {len(self._index)} documents")
+    
+    def compact(self) -> int:
+        """
+        Drop index tombstones.
+        
+        Returns:
+            Number of tombstones removed
+        """
+        return self._index.compact()
+    
+    def train(self) -> None:
+        """Re-cluster the index on the current documents."""
+        self._index.train()
+        self._index_changed()
+    
+    def save(self, path: Optional[str] = None, dtype: Optional[str] = None) -> str:
+        """
+        Write the index and documents as a new snapshot and make it current.
+        
+        The store then reopens the snapshot, so its vectors move from private
+        memory to the shared mapping.
+        
+        Args:
+            path: Snapshot root (default: the store's ``index_path``)
+            dtype: Vector storage type (default: ANN_SNAPSHOT_DTYPE)
+        
+        Returns:
+            Snapshot name
+        """
+        root = path or self.index_path
+        if not root:
+            raise ValueError("No snapshot path given and ANN_INDEX_PATH is not set")
+        
+        ids, vectors, arrays, meta = self._index.export()
+        documents = []
+        for doc_id in ids:
+            doc = self._document(doc_id)
+            documents.append({"content": doc.content, "metadata": doc.metadata})
+        
+        name = write_snapshot(
+            root,
+            ids,
+            vectors,
+            documents=documents,
+            arrays=arrays,
+            meta=meta,
+            dtype=dtype or settings.ANN_SNAPSHOT_DTYPE,
+        )
+        logger.info(f"Saved ANN snapshot {name} with {len(ids)} documents to {root}")
+        
+        self.load(root)
+        return name
+    
+    def load(self, path: Optional[str] = None) -> None:
+        """
+        Replace the store contents with the current snapshot under a root.
+        
+        Args:
+            path: Snapshot root (default: the store's ``index_path``)
+        """
+        root = path or self.index_path
+        snapshot = open_snapshot(root)
+        index = IVFIndex.from_snapshot(snapshot)
+        if index.dimension != self._dimension:
+            raise ValueError(
+                f"Snapshot dimension {index.dimension} does not match store dimension {self._dimension}"
+            )
+        
+        if self._snapshot is not None:
+            self._snapshot.close()
+        
+        index.nprobe = self.nprobe
+        self._index = index
+        self._snapshot = snapshot
+        self._snapshot_rows = dict(index._slots)
+        self._documents = {}
+        self._metadata_index = None
+        self._lexical_index = None
+        self._dirty = False
+        self._checked_at = time.monotonic()
+        self._index_changed()
+        logger.info(f"Loaded ANN snapshot {snapshot.name} with {len(index)} documents from {root}")
+    
+    def refresh(self) -> bool:
+        """
+        Switch to a newer snapshot if one was published.
+        
+        Skipped when this store has unsaved writes, which a reload would drop.
+        
+        Returns:
+            True if a newer snapshot was loaded
+        """
+        self._checked_at = time.monotonic()
+        if not self.index_path or (self._snapshot and self._snapshot.is_current()):
+            return False
+        if current_name(self.index_path) is None:
+            return False
+        if self._dirty:
+            latest = current_name(self.index_path)
+            if latest != self._skipped_snapshot:
+                logger.warning(f"Not loading ANN snapshot {latest}: this store has unsaved writes")
+                self._skipped_snapshot = latest
+            return False
+        
+        self.load(self.index_path)
+        return True
+    
+    @property
+    def index_version(self) -> int:
+        """Write counter, after switching to a newer snapshot if one is due."""
+        self._maybe_refresh()
+        return super().index_version
+    
+    def _maybe_refresh(self) -> None:
+        interval = settings.ANN_SNAPSHOT_REFRESH_SECONDS
+        if interval > 0 and time.monotonic() - self._checked_at >= interval:
+            self.refresh()
+    
+    def _document(self, doc_id: str) -> Document:
+        """Document by id, decoded from the snapshot if it came from there."""
+        doc = self._documents.get(doc_id)
+        if doc is None:
+            record = self._snapshot.document(self._snapshot_rows[doc_id])
+            doc = Document(id=doc_id, content=record["content"], metadata=record["metadata"])
+        return doc
+    
+    def _filter_index(self) -> MetadataIndex:
+        """Metadata index over all live documents, built on first use."""
+        if self._metadata_index is None:
+            metadata_index = MetadataIndex()
+            for doc in self._iter_documents():
+                metadata_index.add(doc.id, doc.metadata)
+            self._metadata_index = metadata_index
+            logger.info(f"Built metadata index over {len(metadata_index)} documents")
+        return self._metadata_index
+    
+    def _text_index(self) -> BM25Index:
+        """BM25 index over all live documents, built on first use."""
+        if self._lexical_index is None:
+            lexical_index = BM25Index()
+            lexical_index.add_many((doc.id, doc.content) for doc in self._iter_documents())
+            self._lexical_index = lexical_index
+            logger.info(f"Built lexical index over {len(lexical_index)} documents")
+        return self._lexical_index
+    
+    def _iter_documents(self) -> Iterator[Document]:
+        """All live documents."""
+        yield from self._documents.values()
+        for doc_id in self._snapshot_rows:
+            yield self._document(doc_id)
+    
+    async def get_stats(self) -> VectorStoreStats:
+        """
+        Get store statistics.
+        
+        Returns:
+            Statistics dictionary
+        """
+        return {
+            "total_documents": len(self._index),
+            "total_embeddings": len(self._index),
+            "embedding_dimension": self._dimension,
+            "backend": "ann",
+            "index_type": "ivf" if self._index.is_trained else "flat",
+            "index_bytes": self._index.nbytes,
+        }
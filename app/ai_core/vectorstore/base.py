@@ -1,10 +1,14 @@
 """Base vector store interface."""
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, Hashable, List, Optional, Sequence
 from dataclasses import dataclass
+import asyncio
 
-from app.types import VectorStoreConfig, VectorStoreFilter, DocumentWithScore
+from app.ai_core.vectorstore.lexical_index import tokenize
+from app.ai_core.vectorstore.retrieval_cache import get_retrieval_cache
+from app.config.settings import settings
+from app.types import VectorStoreConfig, VectorStoreFilter, DocumentWithScore, RetrievalScope, VectorStoreStats
 
 
 @dataclass
@@ -16,13 +20,141 @@ class Document:
     embedding: Optional[List[float]] = None
 
 
+def matches_filter(metadata: Dict[str, Any], filter_dict: Optional[VectorStoreFilter]) -> bool:
+    """
+    Check document metadata against a store filter.
+    
+    Semantics shared by every store (PgVectorStore pushes the same rules into SQL):
+    ``tags`` matches any overlapping tag, ``date_from``/``date_to`` bound the
+    ISO ``date`` metadata key, ``metadata`` is a nested dict of equality
+    checks, ``scope`` matches documents attached to its session or owned by
+    its user (see ``in_scope``), and every other key is an equality check.
+    ``None`` values are ignored.
+    
+    Args:
+        metadata: Document metadata
+        filter_dict: Metadata filters
+    
+    Returns:
+        True if the document passes the filter
+    """
+    for key, value in (filter_dict or {}).items():
+        if value is None:
+            continue
+        if key == "tags":
+            if not set(value) & set(metadata.get("tags") or []):
+                return False
+        elif key in ("date_from", "date_to"):
+            date = metadata.get("date")
+            if date is None or (date < value if key == "date_from" else date > value):
+                return False
+        elif key == "metadata":
+            if any(metadata.get(k) != v for k, v in value.items()):
+                return False
+        elif key == "scope":
+            if not in_scope(metadata, value):
+                return False
+        elif metadata.get(key) != value:
+            return False
+    return True
+
+
+def in_scope(metadata: Dict[str, Any], scope: RetrievalScope) -> bool:
+    """
+    Check whether a document falls in a retrieval scope.
+    
+    A document is in scope if the scope's session is among its
+    ``session_ids`` (or is its ``session_id``), or if the scope's user is its
+    ``user_id``; a scope naming neither matches everything.
+    
+    Args:
+        metadata: Document metadata (as written by ``IngestionPipeline``)
+        scope: Session and user to match
+    
+    Returns:
+        True if the document is in scope
+    """
+    session_id, user_id = scope.get("session_id"), scope.get("user_id")
+    if session_id is None and user_id is None:
+        return True
+    if session_id is not None and (
+        session_id in (metadata.get("session_ids") or []) or metadata.get("session_id") == session_id
+    ):
+        return True
+    return user_id is not None and metadata.get("user_id") == user_id
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[List[DocumentWithScore]],
+    weights: Sequence[float],
+    k: int = 60,
+) -> List[DocumentWithScore]:
+    """
+    Merge ranked result lists with weighted reciprocal rank fusion.
+    
+    A document scores ``sum(weight / (k + rank))`` over the lists it appears
+    in (rank starting at 1), so only positions matter and scores of different
+    retrievers never need to be comparable. Fused scores are divided by
+    their maximum, ``sum(weights) / (k + 1)``: 1.0 means ranked first by
+    every retriever.
+    
+    Args:
+        rankings: Result lists, best first
+        weights: Weight of each list
+        k: Rank smoothing constant (larger flattens the head of each list)
+    
+    Returns:
+        List of (document, fused score) tuples, best first
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (doc, _) in enumerate(ranking, 1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + weight / (k + rank)
+            documents.setdefault(doc.id, doc)
+    
+    best = sum(weights) / (k + 1) or 1.0
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(documents[doc_id], score / best) for doc_id, score in fused]
+
+
+def fuse_query_rankings(rankings: Sequence[List[DocumentWithScore]], k: int = 60) -> List[DocumentWithScore]:
+    """
+    Merge the results of several queries over the same store.
+    
+    Documents are deduplicated by id and ordered by reciprocal rank fusion,
+    so ones found by several queries rise; each keeps its best score from
+    any single query, so scores stay on the scale of that search (cosine
+    similarity or fused hybrid score) and thresholds still apply.
+    
+    Args:
+        rankings: Result list of each query, best first
+        k: Rank smoothing constant
+    
+    Returns:
+        List of (document, best score) tuples, best first
+    """
+    best: Dict[str, float] = {}
+    for ranking in rankings:
+        for doc, score in ranking:
+            best[doc.id] = max(score, best.get(doc.id, score))
+    fused = reciprocal_rank_fusion(rankings, [1.0] * len(rankings), k)
+    return [(doc, best[doc.id]) for doc, _ in fused]
+
+
 class BaseVectorStore(ABC):
     """
     Abstract base class for vector stores.
     
     Provides interface for document storage and similarity search.
+    Implementations embed queries with their ``embeddings`` attribute
+    (an EmbeddingFunction) and call ``_index_changed`` after every write,
+    which invalidates the results held in ``retrieval_cache``, shared by
+    every instance of the same backend and collection.
     """
     
+    backend = "base"
+    
     def __init__(self, config: Optional[VectorStoreConfig] = None):
         """
         Initialize vector store.
@@ -31,6 +163,21 @@ class BaseVectorStore(ABC):
             config: Store configuration
         """
         self.config = config or {}
+        self.retrieval_cache = get_retrieval_cache(
+            self.backend,
+            self.config.get("collection_name", "default"),
+            self.config.get("retrieval_cache_size"),
+        )
+    
+    @property
+    def index_version(self) -> int:
+        """Write counter of the collection, part of every retrieval cache key."""
+        return self.retrieval_cache.version if self.retrieval_cache is not None else 0
+    
+    def _index_changed(self) -> None:
+        """Record a write, so searches cached before it (through any instance) no longer match."""
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.invalidate()
     
     @abstractmethod
     async def add_documents(
@@ -44,7 +191,7 @@ class BaseVectorStore(ABC):
         Args:
             documents: List of documents to add
             **kwargs: Additional arguments
-            
+        
         Returns:
             List of added document IDs
         """
@@ -66,7 +213,7 @@ class BaseVectorStore(ABC):
             k: Number of results to return
             filter_dict: Metadata filters
             **kwargs: Additional arguments
-            
+        
         Returns:
             List of similar documents
         """
@@ -88,12 +235,202 @@ class BaseVectorStore(ABC):
             k: Number of results to return
             filter_dict: Metadata filters
             **kwargs: Additional arguments
-            
+        
         Returns:
             List of (document, score) tuples
         """
         pass
     
+    @abstractmethod
+    async def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Search for documents similar to a query embedding.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, score) tuples, best first
+        """
+        pass
+    
+    async def lexical_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Keyword search, for exact identifiers, codes and names.
+        
+        Stores without a lexical index return nothing, which makes
+        ``hybrid_search_with_score`` fall back to vector search.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, score) tuples, best first (scores are
+            store-specific and only meaningful within one result list)
+        """
+        return []
+    
+    async def hybrid_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        vector_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        embedding: Optional[List[float]] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Vector and lexical search run concurrently and merged with RRF.
+        
+        Each retriever returns ``k * VECTOR_HYBRID_OVERSAMPLE`` candidates so
+        documents ranked moderately by both can overtake ones ranked high by
+        only one. A weight of 0 skips that retriever.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters (applied by both retrievers)
+            vector_weight: Weight of the vector ranking
+            lexical_weight: Weight of the lexical ranking
+            embedding: Query embedding, if already computed
+            **kwargs: Passed to the vector search
+        
+        Returns:
+            List of (document, fused score) tuples, best first; see
+            ``reciprocal_rank_fusion`` for the score scale
+        """
+        fetch = k * max(1, settings.VECTOR_HYBRID_OVERSAMPLE)
+        searches, weights = [], []
+        if vector_weight > 0:
+            if embedding is None:
+                searches.append(self.similarity_search_with_score(query, k=fetch, filter_dict=filter_dict, **kwargs))
+            else:
+                searches.append(self.similarity_search_by_vector(embedding, k=fetch, filter_dict=filter_dict, **kwargs))
+            weights.append(vector_weight)
+        if lexical_weight > 0:
+            searches.append(self.lexical_search_with_score(query, k=fetch, filter_dict=filter_dict))
+            weights.append(lexical_weight)
+        
+        rankings = await asyncio.gather(*searches)
+        return reciprocal_rank_fusion(rankings, weights, settings.VECTOR_HYBRID_RRF_K)[:k]
+    
+    async def multi_query_rankings(
+        self,
+        queries: Sequence[str],
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        hybrid: bool = False,
+        vector_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        **kwargs
+    ) -> List[List[DocumentWithScore]]:
+        """
+        Search several queries at once.
+        
+        All queries are embedded in one batched call and searched
+        concurrently, so n queries cost about one round trip instead of n.
+        Results are served from ``retrieval_cache`` when an identical or
+        near-identical query was searched with the same filter, k and
+        parameters since the last write.
+        
+        Args:
+            queries: Search queries (duplicates are searched once)
+            k: Results per query
+            filter_dict: Metadata filters
+            hybrid: Use ``hybrid_search_with_score`` for each query
+            vector_weight: Hybrid weight of the vector ranking
+            lexical_weight: Hybrid weight of the lexical ranking
+            **kwargs: Passed to the vector search
+        
+        Returns:
+            Result list of each distinct query, in query order
+        """
+        queries = list(dict.fromkeys(query for query in queries if query.strip()))
+        if not queries:
+            return []
+        
+        needs_vectors = not hybrid or vector_weight > 0
+        embeddings = await self.embeddings.embed_queries(queries) if needs_vectors else [None] * len(queries)
+        
+        cache = self.retrieval_cache if needs_vectors else None
+        keys: List[Optional[Hashable]] = [None] * len(queries)
+        rankings: List[Optional[List[DocumentWithScore]]] = [None] * len(queries)
+        if cache is not None:
+            # Read before searching: results of a search overlapping a write are keyed to the old version
+            version = self.index_version
+            params = repr(sorted(kwargs.items()))
+            for position, (query, embedding) in enumerate(zip(queries, embeddings)):
+                # Keyword results depend on the query's terms, not its embedding
+                mode = (
+                    ("hybrid", vector_weight, lexical_weight, tuple(sorted(set(tokenize(query)))))
+                    if hybrid else ("dense",)
+                )
+                keys[position] = cache.key(embedding, filter_dict, k, version, *mode, params)
+                rankings[position] = cache.get(keys[position])
+        
+        misses = [position for position, ranking in enumerate(rankings) if ranking is None]
+        if hybrid:
+            searches = [
+                self.hybrid_search_with_score(
+                    queries[position], k, filter_dict, vector_weight, lexical_weight,
+                    embedding=embeddings[position], **kwargs
+                )
+                for position in misses
+            ]
+        else:
+            searches = [
+                self.similarity_search_by_vector(embeddings[position], k, filter_dict, **kwargs)
+                for position in misses
+            ]
+        
+        for position, ranking in zip(misses, await asyncio.gather(*searches)):
+            rankings[position] = ranking
+            if cache is not None:
+                cache.set(keys[position], ranking)
+        return rankings
+    
+    async def multi_query_search_with_score(
+        self,
+        queries: Sequence[str],
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Fan-out retrieval: search several phrasings of a question and fuse them.
+        
+        Args:
+            queries: Search queries, e.g. a question and its rewrites
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: See ``multi_query_rankings``
+        
+        Returns:
+            Deduplicated (document, score) tuples, best first (see
+            ``fuse_query_rankings``)
+        """
+        rankings = await self.multi_query_rankings(queries, k, filter_dict, **kwargs)
+        return fuse_query_rankings(rankings, settings.VECTOR_HYBRID_RRF_K)[:k]
+    
     @abstractmethod
     async def delete_by_ids(self, ids: List[str]) -> bool:
         """
@@ -101,7 +438,7 @@ class BaseVectorStore(ABC):
         
         Args:
             ids: Document IDs to delete
-            
+        
         Returns:
             True if successful
         """
@@ -114,8 +451,72 @@ class BaseVectorStore(ABC):
         
         Args:
             ids: Document IDs to retrieve
-            
+        
         Returns:
             List of documents
         """
         pass
+    
+    @abstractmethod
+    async def get_by_document_id(self, document_id: int) -> List[Document]:
+        """
+        Get the chunks of a source document.
+        
+        Args:
+            document_id: ``document_id`` metadata of the chunks
+        
+        Returns:
+            List of chunks (without embeddings)
+        """
+        pass
+    
+    @abstractmethod
+    async def update_metadata(self, metadata: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace the metadata of stored documents, keeping their embeddings.
+        
+        Args:
+            metadata: New metadata by document id (unknown ids are ignored)
+        """
+        pass
+    
+    async def delete_by_document_id(self, document_id: int) -> int:
+        """
+        Delete every chunk of a source document.
+        
+        Args:
+            document_id: ``document_id`` metadata of the chunks
+        
+        Returns:
+            Number of chunks deleted
+        """
+        ids = [doc.id for doc in await self.get_by_document_id(document_id)]
+        if ids:
+            await self.delete_by_ids(ids)
+        return len(ids)
+    
+    async def get_tombstone_ratio(self) -> float:
+        """
+        Fraction of the index held by deleted or overwritten entries.
+        
+        Stores that reclaim space on delete report 0.
+        
+        Returns:
+            Ratio between 0 and 1
+        """
+        return 0.0
+    
+    @abstractmethod
+    async def get_stats(self) -> VectorStoreStats:
+        """
+        Get store statistics.
+        
+        Async because server-backed stores have to query for them.
+        
+        Returns:
+            Statistics dictionary
+        """
+        pass
+    
+    async def rebuild_index(self) -> None:
+        """Rebuild the index without deleted entries (no-op for stores that need none)."""
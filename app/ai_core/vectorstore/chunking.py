@@ -0,0 +1,169 @@
+"""Token-aware text chunking for ingestion."""
+
+from functools import lru_cache
+from typing import Callable, Iterator, List, Tuple
+import logging
+import re
+import zlib
+
+from app.types import TextChunk
+
+logger = logging.getLogger(__name__)
+
+# Sentence-like units: up to terminal punctuation, a blank line or the end of the text
+_UNIT_PATTERN = re.compile(r"\S.*?(?:[.!?]+(?=\s)|(?=\n\s*\n)|\Z)", re.DOTALL)
+_WORD_PATTERN = re.compile(r"\S+")
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_END = re.compile(r"[ \t]*(?:\n\s*\n|\Z)")
+
+# About one sentence in ANCHOR_EVERY ends a chunk once it is half full
+ANCHOR_EVERY = 8
+
+TokenCounter = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate BPE token count without a tokenizer.
+    
+    Counts one token per punctuation mark and per word, plus one per seven
+    characters of long words; slightly over-counts English, which keeps
+    chunks under their budget.
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Estimated token count
+    """
+    return sum(1 + len(piece) // 7 for piece in _PIECE_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(encoding_name: str = "cl100k_base") -> TokenCounter:
+    """
+    Token counter for a tiktoken encoding, or ``estimate_tokens`` if unavailable.
+    
+    tiktoken downloads encodings on first use, so offline deployments fall
+    back to the estimate.
+    
+    Args:
+        encoding_name: tiktoken encoding ("" to always estimate)
+    
+    Returns:
+        Function returning the token count of a text
+    """
+    if not encoding_name:
+        return estimate_tokens
+    try:
+        import tiktoken
+        
+        encoding = tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"Tokenizer {encoding_name} unavailable, estimating token counts: {e}")
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def chunk_text(
+    text: str,
+    chunk_tokens: int = 400,
+    overlap_tokens: int = 50,
+    count_tokens: TokenCounter = estimate_tokens,
+    anchored: bool = True,
+) -> Iterator[TextChunk]:
+    """
+    Split text into overlapping chunks of at most ``chunk_tokens`` tokens.
+    
+    Chunks are packed from whole sentences (whole words for sentences longer
+    than a chunk), and each chunk repeats up to ``overlap_tokens`` tokens of
+    trailing sentences from the previous one. Chunk contents are slices of
+    the original text, so offsets map back to the source. Chunks are
+    yielded as they are built, so long documents stream through.
+    
+    Boundaries are content-defined: once a chunk holds half its budget, it
+    ends after the next anchor, a sentence closing a paragraph or one whose
+    hash falls in a fixed class (about one in ``ANCHOR_EVERY``). Where a
+    boundary falls then depends only on the text around it, so after an
+    edit the boundaries realign at the first anchor both versions cut at,
+    and later chunks keep their text (and, in ``IngestionPipeline``, their
+    embeddings). Purely greedy packing would shift every later boundary.
+    
+    Args:
+        text: Text to split
+        chunk_tokens: Token budget per chunk
+        overlap_tokens: Tokens shared with the previous chunk
+        count_tokens: Token counter (see ``get_token_counter``)
+        anchored: End chunks at anchors (False packs each chunk full)
+    
+    Yields:
+        Chunks in document order
+    """
+    if chunk_tokens <= 0:
+        raise ValueError("chunk_tokens must be positive")
+    overlap_tokens = max(0, min(overlap_tokens, chunk_tokens // 2))
+    min_tokens = chunk_tokens // 2 if anchored else chunk_tokens + 1
+    
+    window: List[Tuple[int, int, int]] = []
+    size = 0
+    index = 0
+    pending = False
+    for start, end, tokens, anchor in _units(text, chunk_tokens, count_tokens):
+        if size + tokens > chunk_tokens:
+            if pending:
+                yield _chunk(text, window, size, index)
+                index += 1
+                window, size = _overlap(window, overlap_tokens)
+            while window and size + tokens > chunk_tokens:
+                size -= window.pop(0)[2]
+        
+        window.append((start, end, tokens))
+        size += tokens
+        pending = True
+        if anchor and size >= min_tokens:
+            yield _chunk(text, window, size, index)
+            index += 1
+            window, size = _overlap(window, overlap_tokens)
+            pending = False
+    
+    if pending:
+        yield _chunk(text, window, size, index)
+
+
+def _units(text: str, chunk_tokens: int, count_tokens: TokenCounter) -> Iterator[Tuple[int, int, int, bool]]:
+    """(start, end, tokens, anchor) of sentences, split into words when longer than a chunk."""
+    for match in _UNIT_PATTERN.finditer(text):
+        sentence = match.group()
+        tokens = count_tokens(sentence)
+        if tokens <= chunk_tokens:
+            anchor = _PARAGRAPH_END.match(text, match.end()) is not None or _is_anchor(sentence)
+            yield match.start(), match.end(), tokens, anchor
+            continue
+        for word in _WORD_PATTERN.finditer(text, match.start(), match.end()):
+            yield word.start(), word.end(), max(1, count_tokens(word.group())), _is_anchor(word.group())
+
+
+def _is_anchor(unit: str) -> bool:
+    # crc32 rather than hash(): boundaries must not change between processes
+    return zlib.crc32(unit.encode("utf-8")) % ANCHOR_EVERY == 0
+
+
+def _overlap(window: List[Tuple[int, int, int]], overlap_tokens: int) -> Tuple[List[Tuple[int, int, int]], int]:
+    """Trailing units of a finished chunk repeated at the start of the next."""
+    kept = 0
+    keep_from = len(window)
+    while keep_from > 0 and kept + window[keep_from - 1][2] <= overlap_tokens:
+        keep_from -= 1
+        kept += window[keep_from][2]
+    return window[keep_from:], kept
+
+
+def _chunk(text: str, window: List[Tuple[int, int, int]], size: int, index: int) -> TextChunk:
+    start, end = window[0][0], window[-1][1]
+    return {
+        "index": index,
+        "content": text[start:end],
+        "start": start,
+        "end": end,
+        "token_count": size,
+    }
@@ -0,0 +1,331 @@
+"""Content-addressed embedding cache: in-process LRU over an optional persistent tier."""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Sequence
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from app.config.settings import settings
+from app.middleware.metrics import embedding_cache_lookups_total
+from app.types import EmbeddingCacheStats
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ("memory", "redis", "disk")
+CACHE_DTYPES = ("float32", "float16")
+
+# Keys per MGET / SELECT ... IN round trip
+LOOKUP_BATCH_SIZE = 500
+
+# After a persistent-tier error, serve from the LRU only for this long
+STORE_RETRY_SECONDS = 30.0
+
+
+def embedding_key(model: str, dimension: int, text: str) -> str:
+    """
+    Cache key for an embedding.
+    
+    Args:
+        model: Embedding model name
+        dimension: Embedding dimension
+        text: Embedded text
+    
+    Returns:
+        ``emb:<model>:<dimension>:<sha256 of text>``
+    """
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"emb:{model}:{dimension}:{digest}"
+
+
+class PersistentEmbeddingStore(Protocol):
+    """Byte-valued key-value tier behind the in-process LRU."""
+    
+    name: str
+    
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        ...
+    
+    async def set_many(self, items: Dict[str, bytes]) -> None:
+        ...
+
+
+class RedisEmbeddingStore:
+    """Redis tier, shared by every worker pointing at the same server."""
+    
+    name = "redis"
+    
+    def __init__(self, url: str, ttl_seconds: int = 0):
+        """
+        Initialize Redis tier.
+        
+        Args:
+            url: Redis URL
+            ttl_seconds: Expiry per entry (0 = never)
+        """
+        from redis.asyncio import Redis
+        
+        self._client = Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+    
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        values: List[Optional[bytes]] = []
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            values.extend(await self._client.mget(keys[start:start + LOOKUP_BATCH_SIZE]))
+        return values
+    
+    async def set_many(self, items: Dict[str, bytes]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ex=self.ttl_seconds or None)
+            await pipe.execute()
+
+
+class DiskEmbeddingStore:
+    """Local SQLite tier for single-node deployments; queries run in a worker thread."""
+    
+    name = "disk"
+    
+    def __init__(self, path: str | Path):
+        """
+        Initialize disk tier.
+        
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self._connection.commit()
+    
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return await asyncio.to_thread(self._get_many, list(keys))
+    
+    async def set_many(self, items: Dict[str, bytes]) -> None:
+        await asyncio.to_thread(self._set_many, items)
+    
+    def _get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + LOOKUP_BATCH_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT key, value FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                found.update(rows)
+        return [found.get(key) for key in keys]
+    
+    def _set_many(self, items: Dict[str, bytes]) -> None:
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", items.items())
+            self._connection.commit()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by (model, dimension, text hash).
+    
+    Vectors are held as compact float32/float16 arrays in an in-process LRU
+    and as raw bytes in the persistent tier (4 or 2 bytes per dimension
+    instead of a JSON float list). Lookups are batched: one round trip to
+    the persistent tier per ``get_many`` for everything the LRU missed.
+    Persistent-tier errors are logged and treated as misses, and the tier is
+    skipped for ``STORE_RETRY_SECONDS`` afterwards, so an unavailable Redis
+    only costs recomputation.
+    """
+    
+    def __init__(
+        self,
+        model: str,
+        dimension: int,
+        capacity: int = 10000,
+        store: Optional[PersistentEmbeddingStore] = None,
+        dtype: str = "float32",
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            model: Embedding model name (part of the key)
+            dimension: Embedding dimension (part of the key)
+            capacity: Vectors kept in the in-process LRU
+            store: Optional persistent tier
+            dtype: ``float32`` or ``float16`` storage
+        """
+        if dtype not in CACHE_DTYPES:
+            raise ValueError(f"Unsupported cache dtype: {dtype}. Available dtypes: {list(CACHE_DTYPES)}")
+        
+        self.model = model
+        self.dimension = dimension
+        self.capacity = capacity
+        self.store = store
+        self.dtype = np.dtype(dtype)
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._hits = {"memory": 0, "persistent": 0}
+        self._misses = 0
+        self._errors = 0
+        self._store_retry_at = 0.0
+    
+    async def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for texts.
+        
+        Args:
+            texts: Texts to look up
+        
+        Returns:
+            One embedding per text, None for misses
+        """
+        keys = [embedding_key(self.model, self.dimension, text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(keys)
+        
+        missing: Dict[str, List[int]] = {}
+        for position, key in enumerate(keys):
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                vectors[position] = vector
+            else:
+                missing.setdefault(key, []).append(position)
+        memory_hits = len(keys) - sum(len(positions) for positions in missing.values())
+        
+        persistent_hits = 0
+        if missing and self._store_available():
+            try:
+                values = await self.store.get_many(list(missing))
+            except Exception as e:
+                self._store_failed("lookup", e)
+                values = [None] * len(missing)
+            
+            for key, value in zip(list(missing), values):
+                if value is None or len(value) != self.dimension * self.dtype.itemsize:
+                    continue
+                vector = np.frombuffer(value, dtype=self.dtype)
+                self._remember(key, vector)
+                for position in missing.pop(key):
+                    vectors[position] = vector
+                    persistent_hits += 1
+        
+        misses = len(keys) - memory_hits - persistent_hits
+        self._record(memory_hits, persistent_hits, misses)
+        return [None if vector is None else vector.astype(np.float32).tolist() for vector in vectors]
+    
+    async def set_many(self, texts: Sequence[str], embeddings: Sequence[Sequence[float]]) -> None:
+        """
+        Store embeddings for texts in both tiers.
+        
+        Args:
+            texts: Embedded texts
+            embeddings: One embedding per text
+        """
+        items: Dict[str, bytes] = {}
+        for text, embedding in zip(texts, embeddings):
+            key = embedding_key(self.model, self.dimension, text)
+            vector = np.asarray(embedding, dtype=self.dtype)
+            self._remember(key, vector)
+            items[key] = vector.tobytes()
+        
+        if items and self._store_available():
+            try:
+                await self.store.set_many(items)
+            except Exception as e:
+                self._store_failed("write", e)
+    
+    def clear(self) -> None:
+        """Drop the in-process tier and reset counters (the persistent tier is kept)."""
+        self._lru.clear()
+        self._hits = {"memory": 0, "persistent": 0}
+        self._misses = 0
+        self._errors = 0
+    
+    def get_stats(self) -> EmbeddingCacheStats:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Statistics dictionary
+        """
+        hits = self._hits["memory"] + self._hits["persistent"]
+        lookups = hits + self._misses
+        return {
+            "model": self.model,
+            "backend": self.store.name if self.store is not None else "memory",
+            "size": len(self._lru),
+            "capacity": self.capacity,
+            "memory_hits": self._hits["memory"],
+            "persistent_hits": self._hits["persistent"],
+            "misses": self._misses,
+            "errors": self._errors,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+    
+    def _store_available(self) -> bool:
+        return self.store is not None and time.monotonic() >= self._store_retry_at
+    
+    def _store_failed(self, operation: str, error: Exception) -> None:
+        self._errors += 1
+        self._store_retry_at = time.monotonic() + STORE_RETRY_SECONDS
+        logger.warning(
+            f"Embedding cache {self.store.name} {operation} failed, "
+            f"using the in-process tier only for {STORE_RETRY_SECONDS:.0f}s: {error}"
+        )
+    
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if self.capacity <= 0:
+            return
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+    
+    def _record(self, memory_hits: int, persistent_hits: int, misses: int) -> None:
+        self._hits["memory"] += memory_hits
+        self._hits["persistent"] += persistent_hits
+        self._misses += misses
+        for result, count in (("memory_hit", memory_hits), ("persistent_hit", persistent_hits), ("miss", misses)):
+            if count:
+                embedding_cache_lookups_total.labels(model=self.model, result=result).inc(count)
+
+
+def create_embedding_cache(model: str, dimension: int) -> Optional[EmbeddingCache]:
+    """
+    Build the embedding cache configured in settings.
+    
+    Args:
+        model: Embedding model name
+        dimension: Embedding dimension
+    
+    Returns:
+        EmbeddingCache, or None if EMBEDDING_CACHE_ENABLED is off
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    
+    backend = settings.EMBEDDING_CACHE_BACKEND
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unsupported embedding cache backend: {backend}. Available backends: {list(CACHE_BACKENDS)}")
+    
+    store: Optional[PersistentEmbeddingStore] = None
+    if backend == "redis":
+        store = RedisEmbeddingStore(settings.REDIS_URL, settings.EMBEDDING_CACHE_TTL_SECONDS)
+    elif backend == "disk":
+        store = DiskEmbeddingStore(settings.EMBEDDING_CACHE_PATH)
+    
+    logger.info(f"Embedding cache backend={backend} capacity={settings.EMBEDDING_CACHE_SIZE}")
+    return EmbeddingCache(
+        model,
+        dimension,
+        capacity=settings.EMBEDDING_CACHE_SIZE,
+        store=store,
+        dtype=settings.EMBEDDING_CACHE_DTYPE,
+    )
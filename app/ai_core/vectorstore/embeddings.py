@@ -1,54 +1,274 @@
 """Embedding generation utilities."""
 
-from typing import List, Optional
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import logging
 import asyncio
+import hashlib
 import random
 import math
 
+from app.ai_core.vectorstore.embedding_cache import EmbeddingCache, create_embedding_cache
+from app.config.settings import settings
+from app.middleware.metrics import embedding_batch_requests, embedding_batch_size
+
 logger = logging.getLogger(__name__)
 
 
+class EmbeddingDispatcher:
+    """
+    Coalesces concurrent embedding calls into batched backend calls.
+    
+    Calls arriving within ``max_wait`` seconds of the first pending one are
+    merged (duplicate texts embedded once) and sent as one backend call; a
+    batch is sent early as soon as ``max_batch_size`` texts are waiting.
+    Larger requests are split into ``max_batch_size`` chunks. Each caller
+    gets its own embeddings back in order; when a shared batch fails, its
+    callers are retried separately so an error only reaches the caller
+    whose input caused it.
+    """
+    
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        model: str = "mock",
+    ):
+        """
+        Initialize dispatcher.
+        
+        Args:
+            embed_batch: Backend call embedding a list of texts
+            max_batch_size: Texts per backend call
+            max_wait: Maximum seconds a call waits for others to join its batch
+            model: Model name for metrics
+        """
+        self.embed_batch = embed_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.model = model
+        
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts as part of the next batch.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One embedding per text
+        """
+        if not texts:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pending work of a previous (closed) event loop can never complete
+            self._loop = loop
+            self._pending, self._pending_texts, self._timer = [], 0, None
+        
+        future = loop.create_future()
+        self._pending.append((list(texts), future))
+        self._pending_texts += len(texts)
+        
+        if self._pending_texts >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Send everything pending, packing whole calls into batches."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_texts = self._pending, [], 0
+        
+        batch: List[Tuple[List[str], asyncio.Future]] = []
+        size = 0
+        for request in pending:
+            if batch and size + len(request[0]) > self.max_batch_size:
+                self._start(batch)
+                batch, size = [], 0
+            batch.append(request)
+            size += len(request[0])
+        if batch:
+            self._start(batch)
+    
+    def _start(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        task = self._loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        """Embed one batch and resolve its callers."""
+        requests = [(texts, future) for texts, future in batch if not future.done()]
+        if not requests:
+            return
+        
+        unique = list(dict.fromkeys(text for texts, _ in requests for text in texts))
+        embedding_batch_requests.labels(model=self.model).observe(len(requests))
+        try:
+            by_text = await self._embed_chunks(unique)
+        except Exception as e:
+            if len(requests) == 1:
+                requests[0][1].set_exception(e)
+                return
+            # Retry callers one by one so a bad input only fails its own caller
+            logger.warning(f"Batched embedding of {len(requests)} calls failed, retrying individually: {e}")
+            await asyncio.gather(*(self._run([request]) for request in requests))
+            return
+        
+        for texts, future in requests:
+            if not future.done():
+                future.set_result([by_text[text] for text in texts])
+    
+    async def _embed_chunks(self, texts: List[str]) -> Dict[str, List[float]]:
+        """Backend calls of at most ``max_batch_size`` texts."""
+        by_text: Dict[str, List[float]] = {}
+        for start in range(0, len(texts), self.max_batch_size):
+            chunk = texts[start:start + self.max_batch_size]
+            embedding_batch_size.labels(model=self.model).observe(len(chunk))
+            by_text.update(zip(chunk, await self.embed_batch(chunk)))
+        return by_text
+
+
 class EmbeddingFunction:
     """
     Mock embedding function for development.
     
     This is a MOCK implementation.
     Replace with real embedding model (OpenAI, etc.) when needed.
+    
+    With a cache, texts embedded before (by this or, with a persistent
+    tier, any worker) are served from it and only misses are computed,
+    each distinct text once per call. With a dispatcher, misses from
+    concurrent calls share batched model calls.
     """
     
-    def __init__(self, dimension: int = 1536):
+    model = "mock"
+    
+    def __init__(
+        self,
+        dimension: int = 1536,
+        cache: Optional[EmbeddingCache] = None,
+        dispatcher: Optional[EmbeddingDispatcher] = None,
+    ):
         """
         Initialize embedding function.
         
         Args:
             dimension: Embedding dimension
+            cache: Optional embedding cache
+            dispatcher: Optional micro-batching dispatcher (built over
+                ``_compute_documents`` by ``get_embedding_function``)
         """
         self.dimension = dimension
+        self.cache = cache
+        self.dispatcher = dispatcher
         logger.info(f"Initialized EmbeddingFunction (MOCK) with dimension={dimension}")
     
     async def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
-        Generate embeddings for documents (mocked).
+        Generate embeddings for documents.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            List of embedding vectors
+        """
+        if self.cache is None:
+            return await self._embed(texts)
+        
+        embeddings = await self.cache.get_many(texts)
+        misses = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        if not misses:
+            return embeddings
+        
+        computed = await self._embed(misses)
+        await self.cache.set_many(misses, computed)
+        by_text = dict(zip(misses, computed))
+        return [by_text[text] if embedding is None else embedding for text, embedding in zip(texts, embeddings)]
+    
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Generate embedding for query.
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding vector
+        """
+        if self.cache is None:
+            return await self._embed_one(text)
+        
+        [embedding] = await self.cache.get_many([text])
+        if embedding is None:
+            embedding = await self._embed_one(text)
+            await self.cache.set_many([text], [embedding])
+        return embedding
+    
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several queries in one batch.
+        
+        Queries and documents share one embedding space with these models,
+        so this goes through ``embed_documents`` (cache and batching
+        included); models that embed queries differently override it.
+        
+        Args:
+            texts: Query texts
+        
+        Returns:
+            List of embedding vectors
+        """
+        return await self.embed_documents(texts)
+    
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the dispatcher when there is one."""
+        if self.dispatcher is None:
+            return await self._compute_documents(texts)
+        return await self.dispatcher.submit(texts)
+    
+    async def _embed_one(self, text: str) -> List[float]:
+        """Embed a query through the dispatcher when there is one."""
+        if self.dispatcher is None:
+            return await self._compute_query(text)
+        [embedding] = await self.dispatcher.submit([text])
+        return embedding
+    
+    async def _compute_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents with the model (mocked).
         
         Args:
             texts: List of texts to embed
-            
+        
         Returns:
             List of embedding vectors
         """
         logger.info(f"Generating embeddings for {len(texts)} documents (MOCK)")
-        await asyncio.sleep(0.1 * len(texts))  # Simulate API call
+        await asyncio.sleep(0.05 + 0.001 * len(texts))  # Simulate API call: round trip plus per-text cost
         
         return [self._generate_embedding(text) for text in texts]
     
-    async def embed_query(self, text: str) -> List[float]:
+    async def _compute_query(self, text: str) -> List[float]:
         """
-        Generate embedding for query (mocked).
+        Embed a query with the model (mocked).
         
         Args:
             text: Query text
-            
+        
         Returns:
             Embedding vector
         """
@@ -63,35 +283,71 @@ class EmbeddingFunction:
         
         Args:
             text: Input text
-            
+        
         Returns:
             Normalized embedding vector
         """
-        seed = hash(text) % (2 ** 32)
-        random.seed(seed)
+        # Stable across processes (unlike hash()) and leaves the global RNG alone
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
         
-        vector = [random.gauss(0, 1) for _ in range(self.dimension)]
+        vector = [rng.gauss(0, 1) for _ in range(self.dimension)]
         
         norm = math.sqrt(sum(x ** 2 for x in vector))
         return [x / norm for x in vector]
 
 
-_embedding_function: Optional[EmbeddingFunction] = None
+EMBEDDING_BACKENDS = ("hashing", "mock")
 
+_embedding_functions: Dict[int, EmbeddingFunction] = {}
 
-def get_embedding_function(dimension: int = 1536) -> EmbeddingFunction:
+
+def create_embedding_function(dimension: int = 1536, backend: Optional[str] = None) -> EmbeddingFunction:
     """
-    Get embedding function instance (singleton).
+    Build an embedding function with the configured cache and dispatcher.
     
     Args:
         dimension: Embedding dimension
-        
+        backend: ``hashing`` (local feature hashing, see HashingEmbeddingFunction)
+            or ``mock`` (default: EMBEDDING_BACKEND)
+    
     Returns:
         EmbeddingFunction instance
     """
-    global _embedding_function
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unsupported embedding backend: {backend}. Available backends: {list(EMBEDDING_BACKENDS)}")
     
-    if _embedding_function is None:
-        _embedding_function = EmbeddingFunction(dimension=dimension)
+    if backend == "hashing":
+        from app.ai_core.vectorstore.hashing_embeddings import HashingEmbeddingFunction
+        
+        embedding_function = HashingEmbeddingFunction(dimension=dimension)
+        if settings.EMBEDDING_IDF_PATH and Path(settings.EMBEDDING_IDF_PATH).exists():
+            embedding_function.load_idf(settings.EMBEDDING_IDF_PATH)
+    else:
+        embedding_function = EmbeddingFunction(dimension=dimension)
+    
+    embedding_function.cache = create_embedding_cache(embedding_function.model, dimension)
+    if settings.EMBEDDING_BATCH_ENABLED:
+        embedding_function.dispatcher = EmbeddingDispatcher(
+            embedding_function._compute_documents,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait=settings.EMBEDDING_BATCH_MAX_WAIT_SECONDS,
+            model=embedding_function.model,
+        )
+    return embedding_function
+
+
+def get_embedding_function(dimension: int = 1536) -> EmbeddingFunction:
+    """
+    Get embedding function instance (one per dimension).
+    
+    Args:
+        dimension: Embedding dimension
+    
+    Returns:
+        EmbeddingFunction instance
+    """
+    if dimension not in _embedding_functions:
+        _embedding_functions[dimension] = create_embedding_function(dimension)
     
-    return _embedding_function
+    return _embedding_functions[dimension]
@@ -0,0 +1,51 @@
+"""Vector store backend selection."""
+
+from typing import Dict, Optional, Tuple
+
+from app.ai_core.vectorstore.base import BaseVectorStore
+from app.config.settings import settings
+from app.types import VectorStoreConfig
+
+BACKENDS = ("pgvector", "ann", "memory")
+
+# In-process stores hold their data in memory, so agents must share them
+_shared_stores: Dict[Tuple[str, str], BaseVectorStore] = {}
+
+
+def create_vector_store(
+    config: Optional[VectorStoreConfig] = None,
+    backend: Optional[str] = None,
+) -> BaseVectorStore:
+    """
+    Create the configured vector store.
+    
+    ``ann`` and ``memory`` stores are created once per collection and shared.
+    
+    Args:
+        config: Store configuration
+        backend: ``pgvector``, ``ann`` or ``memory`` (default: VECTOR_STORE_BACKEND)
+    
+    Returns:
+        Vector store instance
+    
+    Raises:
+        ValueError: If the backend is not supported
+    """
+    backend = backend or settings.VECTOR_STORE_BACKEND
+    
+    if backend == "pgvector":
+        from app.ai_core.vectorstore.pgvector_store import PgVectorStore
+        return PgVectorStore(config)
+    
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported vector store backend: {backend}. Available backends: {list(BACKENDS)}")
+    
+    key = (backend, (config or {}).get("collection_name", "default"))
+    if key not in _shared_stores:
+        if backend == "ann":
+            from app.ai_core.vectorstore.ann_store import ANNVectorStore
+            _shared_stores[key] = ANNVectorStore(config)
+        else:
+            from app.ai_core.vectorstore.memory_store import InMemoryVectorStore
+            _shared_stores[key] = InMemoryVectorStore(config)
+    return _shared_stores[key]
@@ -0,0 +1,297 @@
+"""Local feature-hashing embedding model (no network, no GPU, deterministic)."""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import re
+import zlib
+
+import numpy as np
+
+from app.ai_core.vectorstore.embedding_cache import EmbeddingCache
+from app.ai_core.vectorstore.embeddings import EmbeddingDispatcher, EmbeddingFunction
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Batches at least this large are encoded in a worker thread
+THREAD_MIN_TEXTS = 32
+
+_MULTIPLIER = np.uint64(0x100000001B3)
+_MIX_1 = np.uint64(0xFF51AFD7ED558CCD)
+_MIX_2 = np.uint64(0xC4CEB9FE1A85EC53)
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    """Murmur3 finalizer: spreads every input bit over the 64-bit hash."""
+    hashes = hashes ^ (hashes >> np.uint64(33))
+    hashes = hashes * _MIX_1
+    hashes = hashes ^ (hashes >> np.uint64(33))
+    hashes = hashes * _MIX_2
+    return hashes ^ (hashes >> np.uint64(33))
+
+
+class HashingEmbeddingFunction(EmbeddingFunction):
+    """
+    Signed feature hashing of word and character n-grams.
+    
+    Each text becomes a bag of word n-grams and character n-grams (inside
+    word boundaries, so spelling variants still overlap). Every feature is
+    hashed with a fixed 64-bit hash into one of ``dimension`` buckets with a
+    +1/-1 sign, so collisions cancel out on average instead of piling up.
+    Counts are damped with ``log1p``, optionally weighted by per-bucket IDF
+    (see ``fit_idf``) and L2-normalized, so cosine similarity measures
+    lexical overlap.
+    
+    Hashing is vectorized over the whole batch: character n-grams are hashed
+    directly on the UTF-8 bytes with NumPy, and one ``bincount`` builds the
+    batch matrix. Embeddings depend only on the text, dimension, n-gram
+    settings and IDF weights, never on ``PYTHONHASHSEED`` or global RNG state.
+    """
+    
+    def __init__(
+        self,
+        dimension: int = 1536,
+        cache: Optional[EmbeddingCache] = None,
+        dispatcher: Optional[EmbeddingDispatcher] = None,
+        word_ngrams: Tuple[int, int] = (1, 2),
+        char_ngrams: Tuple[int, int] = (3, 5),
+        char_weight: float = 0.5,
+        idf: Optional[np.ndarray] = None,
+    ):
+        """
+        Initialize hashing embedding model.
+        
+        Args:
+            dimension: Embedding dimension (number of hash buckets)
+            cache: Optional embedding cache
+            dispatcher: Optional micro-batching dispatcher
+            word_ngrams: Smallest and largest word n-gram length
+            char_ngrams: Smallest and largest character n-gram length
+                ((0, 0) disables character features)
+            char_weight: Weight of character features relative to word features
+            idf: Optional per-bucket IDF weights (see ``fit_idf``)
+        """
+        self.dimension = dimension
+        self.cache = cache
+        self.dispatcher = dispatcher
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = char_ngrams
+        self.char_weight = char_weight
+        self.idf: Optional[np.ndarray] = None
+        self._token_hashes: Dict[str, int] = {}
+        self.model = self._model_name()
+        if idf is not None:
+            self.set_idf(idf)
+        logger.info(f"Initialized HashingEmbeddingFunction dimension={dimension} model={self.model}")
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts synchronously.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            float32 matrix, one L2-normalized row per text (zero rows for
+            texts without features)
+        """
+        counts = self._counts(texts, signed=True)
+        vectors = np.sign(counts) * np.log1p(np.abs(counts))
+        if self.idf is not None:
+            vectors *= self.idf
+        
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+    
+    def fit_idf(self, corpus: Iterable[str], batch_size: int = 1000) -> np.ndarray:
+        """
+        Learn per-bucket IDF weights from a corpus and start using them.
+        
+        Embeddings change, so documents already indexed should be re-embedded.
+        
+        Args:
+            corpus: Representative texts (e.g. the documents being indexed)
+            batch_size: Texts hashed per step
+        
+        Returns:
+            IDF weights, one per bucket
+        """
+        document_frequency = np.zeros(self.dimension, dtype=np.int64)
+        total = 0
+        batch: List[str] = []
+        for text in corpus:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                document_frequency += (self._counts(batch, signed=False) > 0).sum(axis=0)
+                total += len(batch)
+                batch = []
+        if batch:
+            document_frequency += (self._counts(batch, signed=False) > 0).sum(axis=0)
+            total += len(batch)
+        
+        idf = np.log((1 + total) / (1 + document_frequency)) + 1.0
+        self.set_idf(idf)
+        logger.info(f"Fitted IDF on {total} texts (model={self.model})")
+        return self.idf
+    
+    def set_idf(self, idf: np.ndarray) -> None:
+        """Use IDF weights (the model name, and so cache keys, change with them)."""
+        idf = np.asarray(idf, dtype=np.float32)
+        if idf.shape != (self.dimension,):
+            raise ValueError(f"IDF has shape {idf.shape}, expected ({self.dimension},)")
+        self.idf = idf
+        self.model = self._model_name()
+        if self.cache is not None:
+            self.cache.model = self.model
+        if self.dispatcher is not None:
+            self.dispatcher.model = self.model
+    
+    def save_idf(self, path: str | Path) -> None:
+        """Write the IDF weights as a ``.npy`` file."""
+        if self.idf is None:
+            raise ValueError("No IDF weights to save; call fit_idf first")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.save(f, self.idf, allow_pickle=False)
+    
+    def load_idf(self, path: str | Path) -> None:
+        """Read IDF weights written by ``save_idf``."""
+        self.set_idf(np.load(path, allow_pickle=False))
+    
+    async def _compute_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents with the hashing model.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            List of embedding vectors
+        """
+        if len(texts) >= THREAD_MIN_TEXTS:
+            return (await asyncio.to_thread(self.encode, texts)).tolist()
+        return self.encode(texts).tolist()
+    
+    async def _compute_query(self, text: str) -> List[float]:
+        """
+        Embed a query with the hashing model.
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding vector
+        """
+        return self.encode([text])[0].tolist()
+    
+    def _counts(self, texts: List[str], signed: bool) -> np.ndarray:
+        """Hashed feature counts per text, signed (+1/-1 per feature) or plain."""
+        rows, hashes, weights = [], [], []
+        for features in (self._word_features(texts), self._char_features(texts)):
+            if features is not None:
+                rows.append(features[0])
+                hashes.append(features[1])
+                weights.append(features[2])
+        
+        counts = np.zeros((len(texts), self.dimension), dtype=np.float64)
+        if not rows:
+            return counts
+        
+        rows = np.concatenate(rows)
+        hashes = np.concatenate(hashes)
+        weights = np.concatenate(weights)
+        buckets = (hashes % np.uint64(self.dimension)).astype(np.int64)
+        if signed:
+            weights = np.where((hashes >> np.uint64(63)) == 1, -weights, weights)
+        
+        counts.ravel()[:] = np.bincount(
+            rows * self.dimension + buckets,
+            weights=weights,
+            minlength=len(texts) * self.dimension,
+        )
+        return counts
+    
+    def _word_features(self, texts: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(row, hash, weight) of every word n-gram."""
+        low, high = self.word_ngrams
+        if high < 1:
+            return None
+        
+        token_hashes, rows = [], []
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            token_hashes.extend(self._token_hash(token) for token in tokens)
+            rows.extend([row] * len(tokens))
+        if not token_hashes:
+            return None
+        
+        token_hashes = np.array(token_hashes, dtype=np.uint64)
+        rows = np.array(rows, dtype=np.int64)
+        out_rows, out_hashes = [], []
+        for n in range(max(1, low), high + 1):
+            if n > len(token_hashes):
+                break
+            # An n-gram is valid when all its tokens belong to the same text
+            valid = rows[n - 1:] == rows[:len(rows) - n + 1]
+            combined = np.full(len(token_hashes) - n + 1, n, dtype=np.uint64)
+            for offset in range(n):
+                combined = combined * _MULTIPLIER + token_hashes[offset:len(token_hashes) - n + 1 + offset]
+            out_rows.append(rows[:len(rows) - n + 1][valid])
+            out_hashes.append(_mix(combined[valid]))
+        
+        hashes = np.concatenate(out_hashes)
+        return np.concatenate(out_rows), hashes, np.ones(len(hashes))
+    
+    def _char_features(self, texts: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(row, hash, weight) of every character n-gram within word boundaries."""
+        low, high = self.char_ngrams
+        if high < 1 or self.char_weight <= 0:
+            return None
+        
+        # Words padded with spaces, texts separated by NUL bytes
+        encoded = [(" " + " ".join(TOKEN_PATTERN.findall(text.lower())) + " ").encode("utf-8") for text in texts]
+        data = np.frombuffer(b"\0".join(encoded), dtype=np.uint8).astype(np.uint64)
+        lengths = np.array([len(chunk) for chunk in encoded], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]])
+        
+        out_rows, out_hashes = [], []
+        for n in range(max(1, low), high + 1):
+            count = len(data) - n + 1
+            if count <= 0:
+                break
+            positions = np.arange(count)
+            rows = np.searchsorted(starts, positions, side="right") - 1
+            valid = positions + n <= starts[rows] + lengths[rows]
+            combined = np.full(count, n + 0x9E37, dtype=np.uint64)
+            for offset in range(n):
+                combined = combined * _MULTIPLIER + data[offset:offset + count]
+            out_rows.append(rows[valid])
+            out_hashes.append(_mix(combined[valid]))
+        if not out_hashes:
+            return None
+        
+        hashes = np.concatenate(out_hashes)
+        return np.concatenate(out_rows), hashes, np.full(len(hashes), self.char_weight)
+    
+    def _token_hash(self, token: str) -> int:
+        token_hash = self._token_hashes.get(token)
+        if token_hash is None:
+            encoded = token.encode("utf-8")
+            token_hash = (zlib.crc32(encoded) << 32) | zlib.crc32(encoded, 0x5BD1E995)
+            if len(self._token_hashes) < 1_000_000:
+                self._token_hashes[token] = token_hash
+        return token_hash
+    
+    def _model_name(self) -> str:
+        """Model id for cache keys: changes whenever the embedding would."""
+        params = f"{self.word_ngrams}:{self.char_ngrams}:{self.char_weight}"
+        name = f"hashing-v1-{hashlib.sha256(params.encode()).hexdigest()[:8]}"
+        if self.idf is not None:
+            name += f"-idf{hashlib.sha256(self.idf.tobytes()).hexdigest()[:8]}"
+        return name
@@ -0,0 +1,449 @@
+"""Approximate nearest-neighbor index (IVF-Flat) on NumPy."""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ai_core.vectorstore.matrix_index import MatrixIndex
+from app.ai_core.vectorstore.snapshot import Snapshot, open_snapshot, write_snapshot
+
+
+class IVFIndex:
+    """
+    Inverted-file index over L2-normalized float32 vectors.
+    
+    A spherical k-means quantizer splits the space into ``nlist`` cells and
+    each cell keeps its vectors in its own contiguous matrix. A query scores
+    the centroids, then scans only the ``nprobe`` closest cells, so latency
+    grows with ``nprobe / nlist`` of the data instead of all of it. Raising
+    ``nprobe`` trades latency for recall; ``nprobe == nlist`` is exact.
+    
+    Until ``train_size`` vectors have been added the index holds a single
+    cell (exact search); it then trains the quantizer and redistributes.
+    Later inserts go to their nearest cell without retraining. Deletes and
+    overwrites leave tombstones that searches skip; ``compact`` drops them
+    and ``train`` re-clusters when the data has drifted.
+    
+    ``save``/``load`` use the memory-mapped snapshot format, so a loaded
+    index searches the shared file pages directly.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        train_size: Optional[int] = None,
+        kmeans_iterations: int = 10,
+        seed: int = 0,
+    ):
+        """
+        Initialize index.
+        
+        Args:
+            dimension: Embedding dimension
+            nlist: Number of cells once trained (fewer while there are fewer vectors)
+            nprobe: Default number of cells scanned per query
+            train_size: Vectors needed before training (default: 39 * nlist)
+            kmeans_iterations: Lloyd iterations when training
+            seed: Seed for training samples and initial centroids
+        """
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size if train_size is not None else 39 * nlist
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._list_slots: List[np.ndarray] = []
+        self._list_sizes: List[int] = []
+        self._reset_lists(1)
+        
+        # Internal slots are never reused until compaction; ``_alive`` has spare
+        # capacity beyond ``len(self._ids)``, all False
+        self._ids: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+    
+    def __len__(self) -> int:
+        return len(self._slots)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._slots
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+    
+    @property
+    def cells(self) -> int:
+        """Cells in use: at most ``nlist``, fewer if trained on fewer vectors."""
+        return len(self._lists)
+    
+    @property
+    def tombstones(self) -> int:
+        """Dead slots still stored in the cells."""
+        return len(self._ids) - len(self._slots)
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory held by cell matrices and centroids."""
+        centroids = self.centroids.nbytes if self.centroids is not None else 0
+        return centroids + sum(vectors.nbytes + slots.nbytes for vectors, slots in zip(self._lists, self._list_slots))
+    
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]] | np.ndarray) -> None:
+        """
+        Insert or overwrite vectors.
+        
+        Args:
+            ids: Document ids
+            vectors: One embedding per id
+        """
+        matrix = MatrixIndex._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dimension}"
+            )
+        
+        # A repeated id within one call keeps its last vector
+        last = {doc_id: position for position, doc_id in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids = [ids[position] for position in keep]
+            matrix = matrix[keep]
+        
+        self.delete(ids)
+        
+        start = len(self._ids)
+        self._reserve_slots(start + len(ids))
+        self._ids.extend(ids)
+        for offset, doc_id in enumerate(ids):
+            self._slots[doc_id] = start + offset
+        self._alive[start:start + len(ids)] = True
+        self._append(np.arange(start, start + len(ids)), matrix)
+        
+        if not self.is_trained and len(self) >= self.train_size:
+            self.train()
+    
+    def delete(self, ids: Iterable[str]) -> int:
+        """
+        Tombstone vectors by id.
+        
+        Args:
+            ids: Document ids (unknown ids are ignored)
+        
+        Returns:
+            Number of vectors removed
+        """
+        removed = 0
+        for doc_id in ids:
+            slot = self._slots.pop(doc_id, None)
+            if slot is None:
+                continue
+            self._alive[slot] = False
+            self._ids[slot] = None
+            removed += 1
+        return removed
+    
+    def allowed(self, ids: Iterable[str]) -> np.ndarray:
+        """
+        Boolean slot mask selecting the given ids (for filtered search).
+        
+        Args:
+            ids: Document ids allowed in a search
+        
+        Returns:
+            Mask over internal slots
+        """
+        mask = np.zeros(len(self._ids), dtype=bool)
+        mask[[self._slots[doc_id] for doc_id in ids if doc_id in self._slots]] = True
+        return mask
+    
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        allowed: Optional[np.ndarray] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Approximate top-k by cosine similarity.
+        
+        Args:
+            query: Query embedding
+            k: Number of results
+            nprobe: Cells to scan (default: the index's ``nprobe``)
+            allowed: Optional slot mask (see ``allowed``) restricting candidates
+        
+        Returns:
+            (id, similarity) pairs, best first
+        """
+        return self.search_batch(np.asarray(query, dtype=np.float32).reshape(1, -1), k, nprobe, allowed)[0]
+    
+    def search_batch(
+        self,
+        queries: Sequence[Sequence[float]] | np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        allowed: Optional[np.ndarray] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Approximate top-k for several queries.
+        
+        Args:
+            queries: Query embeddings, one per row
+            k: Number of results per query
+            nprobe: Cells to scan per query
+            allowed: Optional slot mask restricting candidates
+        
+        Returns:
+            One list of (id, similarity) pairs per query, best first
+        """
+        queries = MatrixIndex._normalize(np.asarray(queries, dtype=np.float32).reshape(-1, self.dimension))
+        if len(self) == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        
+        valid = self._alive
+        if allowed is not None:
+            valid = np.zeros_like(self._alive)
+            size = min(len(allowed), len(valid))
+            valid[:size] = self._alive[:size] & allowed[:size]
+        
+        if self.is_trained:
+            nprobe = min(nprobe or self.nprobe, self.cells)
+            centroid_scores = queries @ self.centroids.T
+            probes = [MatrixIndex.top_k(row, nprobe) for row in centroid_scores]
+        else:
+            probes = [np.zeros(1, dtype=np.int64)] * len(queries)
+        
+        results = []
+        for query, cells in zip(queries, probes):
+            scores = []
+            slots = []
+            for cell in cells:
+                size = self._list_sizes[cell]
+                if size:
+                    scores.append(self._lists[cell][:size] @ query)
+                    slots.append(self._list_slots[cell][:size])
+            
+            if not scores:
+                results.append([])
+                continue
+            
+            scores = np.concatenate(scores)
+            slots = np.concatenate(slots)
+            keep = valid[slots]
+            scores, slots = scores[keep], slots[keep]
+            
+            top = MatrixIndex.top_k(scores, k)
+            results.append([(self._ids[slot], float(score)) for slot, score in zip(slots[top], scores[top])])
+        return results
+    
+    def train(self, sample_size: Optional[int] = None) -> None:
+        """
+        (Re)train the quantizer on live vectors and redistribute them.
+        
+        Uses ``nlist`` cells, or one per vector when there are fewer, so a
+        retrain after the corpus grows goes back up to ``nlist``.
+        
+        Args:
+            sample_size: Vectors used for k-means (default: 64 * nlist)
+        """
+        slots, vectors = self._live_vectors()
+        nlist = min(self.nlist, len(slots))
+        if nlist == 0:
+            return
+        
+        rng = np.random.default_rng(self.seed)
+        sample_size = sample_size or 64 * nlist
+        sample = vectors if len(vectors) <= sample_size else vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        
+        self.centroids = self._kmeans(sample, nlist, rng)
+        self._reset_lists(nlist)
+        self._append(slots, vectors)
+    
+    def compact(self) -> int:
+        """
+        Drop tombstones and renumber slots.
+        
+        Returns:
+            Number of tombstones removed
+        """
+        removed = self.tombstones
+        if removed == 0:
+            return 0
+        
+        slots, vectors = self._live_vectors()
+        self._ids = [self._ids[slot] for slot in slots]
+        self._slots = {doc_id: slot for slot, doc_id in enumerate(self._ids)}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._reset_lists(len(self._lists))
+        self._append(np.arange(len(self._ids)), vectors)
+        return removed
+    
+    def export(self) -> Tuple[List[str], np.ndarray, Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Snapshot contents: rows grouped by cell, tombstones compacted away.
+        
+        Returns:
+            (ids in row order, vectors, extra arrays, metadata) for ``write_snapshot``
+        """
+        self.compact()
+        sizes = np.asarray(self._list_sizes, dtype=np.int64)
+        vectors = np.concatenate([cell[:size] for cell, size in zip(self._lists, sizes)])
+        slots = np.concatenate([cell_slots[:size] for cell_slots, size in zip(self._list_slots, sizes)])
+        
+        arrays = {"list_sizes": sizes}
+        if self.centroids is not None:
+            arrays["centroids"] = self.centroids
+        meta = {
+            "index": "ivf",
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "train_size": self.train_size,
+        }
+        return [self._ids[slot] for slot in slots], vectors, arrays, meta
+    
+    def save(self, root: str | Path, dtype: str = "float32") -> str:
+        """
+        Write the index as a new snapshot under ``root`` and make it current.
+        
+        Args:
+            root: Snapshot root directory
+            dtype: Vector storage type (``float32`` or ``float16``)
+        
+        Returns:
+            Snapshot name
+        """
+        ids, vectors, arrays, meta = self.export()
+        return write_snapshot(root, ids, vectors, arrays=arrays, meta=meta, dtype=dtype)
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> "IVFIndex":
+        """
+        Build an index whose cells are views into the snapshot's mapped matrix.
+        
+        Nothing is copied: searches read the shared pages. A cell is copied
+        into private memory only when an insert grows it.
+        
+        Args:
+            snapshot: Snapshot written by ``save`` (or by a store using ``export``)
+        
+        Returns:
+            Index over the snapshot
+        """
+        meta = snapshot.meta
+        if meta.get("index") != "ivf":
+            raise ValueError(f"Snapshot {snapshot.name} does not hold an IVF index")
+        
+        index = cls(meta["dimension"], nlist=meta["nlist"], nprobe=meta["nprobe"], train_size=meta["train_size"])
+        index.centroids = snapshot.arrays.get("centroids")
+        index._ids = snapshot.id_list()
+        index._slots = {doc_id: slot for slot, doc_id in enumerate(index._ids)}
+        index._alive = np.ones(len(index._ids), dtype=bool)
+        
+        sizes = snapshot.arrays["list_sizes"]
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        index._reset_lists(len(sizes))
+        for cell in range(len(sizes)):
+            index._lists[cell] = snapshot.vectors[offsets[cell]:offsets[cell + 1]]
+            index._list_slots[cell] = np.arange(offsets[cell], offsets[cell + 1], dtype=np.int64)
+            index._list_sizes[cell] = int(sizes[cell])
+        return index
+    
+    @classmethod
+    def load(cls, root: str | Path) -> "IVFIndex":
+        """
+        Open the current snapshot under ``root`` (memory-mapped).
+        
+        Args:
+            root: Snapshot root directory given to ``save``
+        
+        Returns:
+            Loaded index
+        """
+        return cls.from_snapshot(open_snapshot(root))
+    
+    def _reserve_slots(self, slots: int) -> None:
+        """Grow (by doubling) the liveness mask to hold at least ``slots`` slots."""
+        capacity = max(1, len(self._alive))
+        if slots <= len(self._alive):
+            return
+        while capacity < slots:
+            capacity *= 2
+        
+        alive = np.zeros(capacity, dtype=bool)
+        used = len(self._ids)
+        alive[:used] = self._alive[:used]
+        self._alive = alive
+    
+    def _reset_lists(self, count: int) -> None:
+        self._lists = [np.zeros((0, self.dimension), dtype=np.float32) for _ in range(count)]
+        self._list_slots = [np.zeros(0, dtype=np.int64) for _ in range(count)]
+        self._list_sizes = [0] * count
+    
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: Optional[np.ndarray], chunk: int = 16384) -> np.ndarray:
+        """Nearest cell of each vector (cell 0 before training)."""
+        if centroids is None or len(vectors) == 0:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), chunk)
+        ])
+    
+    def _append(self, slots: np.ndarray, vectors: np.ndarray) -> None:
+        """Append vectors to their cells, growing cell matrices by doubling."""
+        cells = self._assign(vectors, self.centroids)
+        order = np.argsort(cells, kind="stable")
+        cells, slots, vectors = cells[order], slots[order], vectors[order]
+        bounds = np.flatnonzero(np.diff(cells)) + 1
+        
+        for start, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(cells)]])):
+            if start == end:
+                continue
+            cell = cells[start]
+            size = self._list_sizes[cell]
+            needed = size + (end - start)
+            if needed > len(self._lists[cell]):
+                capacity = max(needed, 2 * len(self._lists[cell]), 16)
+                grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+                grown[:size] = self._lists[cell][:size]
+                grown_slots = np.zeros(capacity, dtype=np.int64)
+                grown_slots[:size] = self._list_slots[cell][:size]
+                self._lists[cell] = grown
+                self._list_slots[cell] = grown_slots
+            self._lists[cell][size:needed] = vectors[start:end]
+            self._list_slots[cell][size:needed] = slots[start:end]
+            self._list_sizes[cell] = needed
+    
+    def _live_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Live (slot, vector) pairs ordered by slot."""
+        slots = np.concatenate([s[:n] for s, n in zip(self._list_slots, self._list_sizes)])
+        vectors = np.concatenate([v[:n] for v, n in zip(self._lists, self._list_sizes)])
+        keep = self._alive[slots]
+        slots, vectors = slots[keep], vectors[keep]
+        order = np.argsort(slots)
+        return slots[order], vectors[order]
+    
+    def _kmeans(self, sample: np.ndarray, nlist: int, rng: np.random.Generator) -> np.ndarray:
+        """Spherical k-means (cosine) returning unit-norm centroids."""
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignment = self._assign(sample, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=nlist)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            
+            sums = np.zeros_like(centroids)
+            sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = counts == 0
+            if empty.any():
+                # Reseed empty cells from random samples
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            centroids = MatrixIndex._normalize(sums)
+        return centroids
@@ -0,0 +1,146 @@
+"""In-process BM25 inverted index for lexical (keyword) retrieval."""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+import math
+import re
+
+# Words, and compounds such as error codes, versions or paths ("ERR-1234", "v2.1", "api/v1")
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-.:/]\w+)*", re.UNICODE)
+_PART_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms of a text.
+    
+    Compounds are kept whole and also split into their parts, so an exact
+    identifier matches best while its parts still match on their own.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        Terms in text order
+    """
+    terms = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(_PART_PATTERN.findall(token))
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index of term postings.
+    
+    Each term maps to the ids and term frequencies of the documents that
+    contain it, so a query only touches the postings of its own terms.
+    Corpus statistics (document count, average length) are kept up to date
+    on every add and remove, so scores need no rebuild. Re-adding an id
+    replaces its previous text.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize index.
+        
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization (0 = none, 1 = full)
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_length = 0
+    
+    def __len__(self) -> int:
+        return len(self._lengths)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+    
+    def add(self, doc_id: str, text: str) -> None:
+        """
+        Index a document's text.
+        
+        Args:
+            doc_id: Document id
+            text: Text to index
+        """
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        
+        terms = tokenize(text)
+        counts = Counter(terms)
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        self._terms[doc_id] = tuple(counts)
+        self._lengths[doc_id] = len(terms)
+        self._total_length += len(terms)
+    
+    def add_many(self, documents: Iterable[Tuple[str, str]]) -> None:
+        """Index (id, text) pairs."""
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+    
+    def remove(self, doc_id: str) -> None:
+        """
+        Drop a document from the index (no-op if absent).
+        
+        Args:
+            doc_id: Document id
+        """
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+    
+    def search(
+        self,
+        query: str,
+        k: int,
+        candidates: Optional[Set[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k documents by BM25 score.
+        
+        Args:
+            query: Query text
+            k: Number of results to return
+            candidates: Only score these ids (e.g. the ids passing a filter)
+        
+        Returns:
+            List of (document id, score) tuples, best first; documents
+            sharing no term with the query are not returned
+        """
+        if not self._lengths or k <= 0:
+            return []
+        
+        total = len(self._lengths)
+        average_length = self._total_length / total
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            if candidates is not None and len(candidates) < len(postings):
+                postings = {doc_id: postings[doc_id] for doc_id in candidates if doc_id in postings}
+            for doc_id, frequency in postings.items():
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,244 @@
+"""Exact (brute-force) vector index on a contiguous float32 matrix."""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ai_core.vectorstore.quantization import VectorStorage
+
+
+class MatrixIndex:
+    """
+    In-memory exact nearest-neighbor index.
+    
+    Embeddings are L2-normalized and stored row by row in one contiguous
+    float32 matrix, so a search is a single matrix-vector product followed by
+    a partial top-k selection (``argpartition``) instead of a full sort.
+    
+    The matrix grows by doubling, so inserts are amortized O(d). Deletes move
+    the last row into the freed slot, keeping the live rows contiguous.
+    Re-adding an existing id overwrites its vector in place.
+    
+    With ``storage="float16"`` or ``"int8"`` the matrix holds compact codes
+    (2x / 4x smaller) and scores are approximate. A positive ``rescore``
+    oversampling factor keeps float32 originals on disk (see VectorStorage)
+    and re-ranks the top ``k * rescore`` candidates at full precision.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        initial_capacity: int = 1024,
+        storage: str = "float32",
+        rescore: int = 0,
+    ):
+        """
+        Initialize index.
+        
+        Args:
+            dimension: Embedding dimension
+            initial_capacity: Rows allocated up front
+            storage: ``float32``, ``float16`` or ``int8``
+            rescore: Candidate oversampling for full-precision rescoring
+                (0 disables; ignored for float32)
+        """
+        self.dimension = dimension
+        self.rescore = rescore if storage != "float32" else 0
+        self._storage = VectorStorage(dimension, initial_capacity, storage, keep_full=self.rescore > 0)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+    
+    @property
+    def ids(self) -> List[str]:
+        """Ids in row order."""
+        return list(self._ids)
+    
+    @property
+    def storage(self) -> str:
+        return self._storage.storage
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        """Live rows as float32 (a view for float32 storage, do not modify)."""
+        if not self._storage.quantized:
+            return self._storage.codes[:len(self._ids)]
+        return self._storage.get(np.arange(len(self._ids)))
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the vector matrix, including spare capacity."""
+        return self._storage.nbytes
+    
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]] | np.ndarray) -> None:
+        """
+        Insert or overwrite vectors.
+        
+        Args:
+            ids: Document ids
+            vectors: One embedding per id
+        """
+        matrix = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dimension}"
+            )
+        
+        new_rows = sum(1 for doc_id in set(ids) if doc_id not in self._rows)
+        self._storage.reserve(len(self._ids) + new_rows, len(self._ids))
+        
+        rows = []
+        for doc_id in ids:
+            row = self._rows.get(doc_id)
+            if row is None:
+                row = len(self._ids)
+                self._rows[doc_id] = row
+                self._ids.append(doc_id)
+            rows.append(row)
+        
+        # A repeated id within one call keeps its last vector
+        last = {row: position for position, row in enumerate(rows)}
+        self._storage.set_rows(list(last), matrix[list(last.values())])
+    
+    def delete(self, ids: Iterable[str]) -> int:
+        """
+        Remove vectors by id.
+        
+        Args:
+            ids: Document ids (unknown ids are ignored)
+        
+        Returns:
+            Number of vectors removed
+        """
+        removed = 0
+        for doc_id in ids:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                continue
+            
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._storage.move_row(last, row)
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+            removed += 1
+        
+        return removed
+    
+    def get(self, doc_id: str) -> Optional[np.ndarray]:
+        """Normalized vector of an id, or None."""
+        row = self._rows.get(doc_id)
+        return None if row is None else self._storage.get(row).copy()
+    
+    def mask(self, ids: Iterable[str]) -> np.ndarray:
+        """
+        Boolean row mask selecting the given ids.
+        
+        Args:
+            ids: Document ids allowed in a search
+        
+        Returns:
+            Mask of length ``len(self)``
+        """
+        mask = np.zeros(len(self._ids), dtype=bool)
+        rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+        mask[rows] = True
+        return mask
+    
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Exact top-k by cosine similarity.
+        
+        Args:
+            query: Query embedding
+            k: Number of results
+            mask: Optional boolean row mask (see ``mask``) restricting candidates
+        
+        Returns:
+            (id, similarity) pairs, best first
+        """
+        return self.search_batch(np.asarray(query, dtype=np.float32).reshape(1, -1), k, mask)[0]
+    
+    def search_batch(
+        self,
+        queries: Sequence[Sequence[float]] | np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Exact top-k for several queries with one matrix-matrix product.
+        
+        Args:
+            queries: Query embeddings, one per row
+            k: Number of results per query
+            mask: Optional boolean row mask restricting candidates
+        
+        Returns:
+            One list of (id, similarity) pairs per query, best first
+        """
+        queries = self._normalize(np.asarray(queries, dtype=np.float32).reshape(-1, self.dimension))
+        size = len(self._ids)
+        if size == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        
+        rows = None
+        if mask is not None:
+            rows = np.flatnonzero(mask[:size])
+            if len(rows) == 0:
+                return [[] for _ in range(len(queries))]
+        scores = self._storage.scores(queries, size, rows)
+        
+        results = []
+        for query, row_scores in zip(queries, scores):
+            top = self.top_k(row_scores, k * self.rescore if self.rescore else k)
+            candidates = top if rows is None else rows[top]
+            top_scores = row_scores[top]
+            
+            if self.rescore:
+                top_scores = self._storage.rescore(query, candidates)
+                best = self.top_k(top_scores, k)
+                candidates, top_scores = candidates[best], top_scores[best]
+            
+            results.append([
+                (self._ids[row], float(score))
+                for row, score in zip(candidates, top_scores)
+            ])
+        return results
+    
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Positions of the k highest scores, best first.
+        
+        Uses ``argpartition`` (O(n)) and only sorts the k winners.
+        
+        Args:
+            scores: 1-D score array
+            k: Number of positions
+        
+        Returns:
+            Positions into ``scores``
+        """
+        if k >= len(scores):
+            return np.argsort(-scores)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows (zero rows stay zero)."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
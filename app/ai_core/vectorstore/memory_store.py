@@ -0,0 +1,320 @@
+"""In-memory vector store for development, tests and benchmarks."""
+
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import math
+import random
+
+from app.ai_core.vectorstore.base import BaseVectorStore, Document
+from app.ai_core.vectorstore.embeddings import get_embedding_function
+from app.ai_core.vectorstore.lexical_index import BM25Index
+from app.ai_core.vectorstore.matrix_index import MatrixIndex
+from app.ai_core.vectorstore.metadata_index import POSTFILTER, UNFILTERED, MetadataIndex
+from app.config.settings import settings
+from app.types import VectorStoreConfig, VectorStoreFilter, DocumentWithScore, VectorStoreStats
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryVectorStore(BaseVectorStore):
+    """
+    In-memory vector store.
+    
+    Nothing is persisted and nothing is shared between processes; use
+    PgVectorStore for real deployments. Queries and documents without an
+    embedding are embedded with ``get_embedding_function``.
+    
+    Features:
+    - In-memory document storage
+    - Exact vectorized similarity search (see MatrixIndex)
+    - Metadata filtering (same semantics as PgVectorStore) through an
+      inverted index: selective filters score only matching vectors, broad
+      ones filter an oversampled result list
+    - BM25 keyword search for ``hybrid_search_with_score``
+    """
+    
+    backend = "memory"
+    
+    def __init__(self, config: Optional[VectorStoreConfig] = None):
+        """
+        Initialize in-memory store.
+        
+        Args:
+            config: Store configuration (embedding_dimension, quantization, rescore)
+        """
+        super().__init__(config)
+        self._documents: Dict[str, Document] = {}
+        self._metadata_index = MetadataIndex()
+        self._lexical_index = BM25Index()
+        config = config or {}
+        self._dimension = config.get("embedding_dimension", config.get("dimension", 1536))
+        self.embeddings = get_embedding_function(self._dimension)
+        self._index = MatrixIndex(
+            self._dimension,
+            storage=config.get("quantization", settings.VECTOR_QUANTIZATION),
+            rescore=config.get("rescore", settings.VECTOR_RESCORE_OVERSAMPLE),
+        )
+        logger.info(
+            f"Initialized InMemoryVectorStore with dimension={self._dimension} storage={self._index.storage}"
+        )
+    
+    async def add_documents(
+        self,
+        documents: List[Document],
+        **kwargs
+    ) -> List[str]:
+        """
+        Add documents to store.
+        
+        Args:
+            documents: List of documents to add
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of added document IDs
+        """
+        missing = [doc for doc in documents if not doc.embedding]
+        if missing:
+            embeddings = await self.embeddings.embed_documents([doc.content for doc in missing])
+            for doc, embedding in zip(missing, embeddings):
+                doc.embedding = embedding
+        
+        added_ids = []
+        embeddings = []
+        for doc in documents:
+            embeddings.append(doc.embedding)
+            # The index holds the vector; a List[float] copy would cost ~40 KB per 1536-dim chunk
+            self._documents[doc.id] = Document(id=doc.id, content=doc.content, metadata=doc.metadata)
+            self._metadata_index.add(doc.id, doc.metadata)
+            self._lexical_index.add(doc.id, doc.content)
+            added_ids.append(doc.id)
+        
+        self._index.add(added_ids, embeddings)
+        self._index_changed()
+        
+        logger.info(f"Added {len(added_ids)} documents to store")
+        return added_ids
+    
+    async def similarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[Document]:
+        """
+        Search for similar documents.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of similar documents
+        """
+        results = await self.similarity_search_with_score(
+            query=query,
+            k=k,
+            filter_dict=filter_dict,
+            **kwargs
+        )
+        return [doc for doc, _ in results]
+    
+    async def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Search for similar documents with scores.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, score) tuples
+        """
+        query_embedding = await self.embeddings.embed_query(query)
+        return await self.similarity_search_by_vector(query_embedding, k, filter_dict, **kwargs)
+    
+    async def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Exact top-k for a query embedding.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, score) tuples, best first
+        """
+        results = [
+            (self._documents[doc_id], max(0.0, min(1.0, similarity)))
+            for doc_id, similarity in self._search(embedding, k, filter_dict)
+        ]
+        
+        logger.debug(f"Found {len(results)} similar documents")
+        return results
+    
+    async def lexical_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        BM25 keyword search.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, BM25 score) tuples, best first
+        """
+        candidates = self._metadata_index.candidates(filter_dict) if filter_dict else None
+        return [
+            (self._documents[doc_id], score)
+            for doc_id, score in self._lexical_index.search(query, k, candidates)
+        ]
+    
+    async def delete_by_ids(self, ids: List[str]) -> bool:
+        """
+        Delete documents by IDs.
+        
+        Args:
+            ids: Document IDs to delete
+        
+        Returns:
+            True if successful
+        """
+        for doc_id in ids:
+            self._documents.pop(doc_id, None)
+            self._metadata_index.remove(doc_id)
+            self._lexical_index.remove(doc_id)
+        self._index.delete(ids)
+        self._index_changed()
+        
+        logger.info(f"Deleted {len(ids)} documents")
+        return True
+    
+    async def get_by_ids(self, ids: List[str]) -> List[Document]:
+        """
+        Get documents by IDs.
+        
+        Args:
+            ids: Document IDs to retrieve
+        
+        Returns:
+            List of documents
+        """
+        return [self._documents[doc_id] for doc_id in ids if doc_id in self._documents]
+    
+    async def get_by_document_id(self, document_id: int) -> List[Document]:
+        """
+        Get the chunks of a source document.
+        
+        Args:
+            document_id: ``document_id`` metadata of the chunks
+        
+        Returns:
+            List of chunks
+        """
+        ids = self._metadata_index.candidates({"metadata": {"document_id": document_id}})
+        return [self._documents[doc_id] for doc_id in ids]
+    
+    async def update_metadata(self, metadata: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace the metadata of stored documents, keeping their embeddings.
+        
+        Args:
+            metadata: New metadata by document id (unknown ids are ignored)
+        """
+        for doc_id, doc_metadata in metadata.items():
+            doc = self._documents.get(doc_id)
+            if doc is None:
+                continue
+            self._documents[doc_id] = Document(id=doc_id, content=doc.content, metadata=doc_metadata)
+            self._metadata_index.add(doc_id, doc_metadata)
+        self._index_changed()
+    
+    def _search(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filter_dict: Optional[VectorStoreFilter],
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k ids and scores, planning the filter through the metadata index.
+        
+        Args:
+            query_embedding: Query embedding
+            k: Number of results to return
+            filter_dict: Metadata filters
+        
+        Returns:
+            List of (document id, score) tuples
+        """
+        plan = self._metadata_index.plan(filter_dict, settings.VECTOR_FILTER_PREFILTER_BELOW)
+        if plan.strategy == UNFILTERED:
+            return self._index.search(query_embedding, k)
+        
+        if plan.strategy == POSTFILTER:
+            hits = self._index.search(query_embedding, plan.fetch_size(k, len(self._index)))
+            hits = [hit for hit in hits if self._metadata_index.matches(hit[0], filter_dict)]
+            if len(hits) >= k:
+                return hits[:k]
+            plan.candidates = self._metadata_index.candidates(filter_dict)
+        
+        if not plan.candidates:
+            return []
+        return self._index.search(query_embedding, k, self._index.mask(plan.candidates))
+    
+    def _generate_mock_embedding(self, seed: Optional[int] = None) -> List[float]:
+        """
+        Generate mock embedding vector.
+        
+        Args:
+            seed: Random seed for reproducibility (global RNG state is untouched)
+        
+        Returns:
+            Mock embedding vector
+        """
+        rng = random.Random(seed)
+        vector = [rng.gauss(0, 1) for _ in range(self._dimension)]
+        norm = math.sqrt(sum(x ** 2 for x in vector))
+        return [x / norm for x in vector]
+    
+    async def get_stats(self) -> VectorStoreStats:
+        """
+        Get store statistics.
+        
+        Returns:
+            Statistics dictionary
+        """
+        return {
+            "total_documents": len(self._documents),
+            "embedding_dimension": self._dimension,
+            "backend": "memory",
+            "storage": self._index.storage,
+            "index_bytes": self._index.nbytes,
+        }
+
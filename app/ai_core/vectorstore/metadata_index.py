@@ -0,0 +1,230 @@
+"""Inverted metadata index and filter planner for in-process vector stores."""
+
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+import math
+
+from app.ai_core.vectorstore.base import matches_filter
+from app.types import RetrievalScope, VectorStoreFilter
+
+# List-valued metadata keys with one posting per entry
+LIST_KEYS = ("tags", "session_ids")
+
+PREFILTER = "prefilter"
+POSTFILTER = "postfilter"
+UNFILTERED = "unfiltered"
+
+
+@dataclass
+class FilterPlan:
+    """How to run a filtered search."""
+    strategy: str
+    estimate: int
+    candidates: Optional[Set[str]] = None
+    filter_dict: Optional[VectorStoreFilter] = None
+    
+    def fetch_size(self, k: int, total: int) -> int:
+        """Unfiltered results to request so that about k survive a post-filter."""
+        return min(total, max(k, math.ceil(2 * k * total / max(1, self.estimate))))
+
+
+class MetadataIndex:
+    """
+    Postings from metadata values to document ids, plus a sorted date index.
+    
+    Follows ``matches_filter`` semantics: scalar metadata values get one
+    posting list per (key, value), each entry of ``tags`` and
+    ``session_ids`` gets its own posting, and the ISO ``date`` key is kept
+    in sorted order for ``date_from``/``date_to`` ranges. A ``scope``
+    resolves to the union of its session's and its user's postings, so
+    session- and user-scoped searches prefilter to exactly their documents.
+    Values that cannot be indexed (other lists, dicts) are checked with
+    ``matches_filter`` instead.
+    """
+    
+    def __init__(self):
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {}
+        self._dates: Dict[str, Set[str]] = {}
+        self._sorted_dates: List[str] = []
+        self._entries: Dict[str, List[Tuple[str, Any]]] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._metadata)
+    
+    def add(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        """
+        Index (or re-index) a document's metadata.
+        
+        Args:
+            doc_id: Document id
+            metadata: Document metadata
+        """
+        self.remove(doc_id)
+        
+        entries = []
+        for key, value in metadata.items():
+            if key in LIST_KEYS and isinstance(value, (list, tuple, set)):
+                entries.extend((key, entry) for entry in value if _hashable(entry))
+            elif _hashable(value):
+                entries.append((key, value))
+        
+        for key, value in entries:
+            self._postings.setdefault(key, {}).setdefault(value, set()).add(doc_id)
+        
+        date = metadata.get("date")
+        if isinstance(date, str):
+            if date not in self._dates:
+                self._dates[date] = set()
+                insort(self._sorted_dates, date)
+            self._dates[date].add(doc_id)
+        
+        self._entries[doc_id] = entries
+        self._metadata[doc_id] = metadata
+    
+    def remove(self, doc_id: str) -> None:
+        """
+        Drop a document from the index (unknown ids are ignored).
+        
+        Args:
+            doc_id: Document id
+        """
+        metadata = self._metadata.pop(doc_id, None)
+        if metadata is None:
+            return
+        
+        for key, value in self._entries.pop(doc_id):
+            postings = self._postings[key]
+            postings[value].discard(doc_id)
+            if not postings[value]:
+                del postings[value]
+        
+        date = metadata.get("date")
+        if isinstance(date, str) and date in self._dates:
+            self._dates[date].discard(doc_id)
+            if not self._dates[date]:
+                del self._dates[date]
+                del self._sorted_dates[bisect_left(self._sorted_dates, date)]
+    
+    def plan(self, filter_dict: Optional[VectorStoreFilter], prefilter_below: float = 0.1) -> FilterPlan:
+        """
+        Choose between pre- and post-filtering for a filter.
+        
+        Selectivity is estimated from the smallest posting set. Selective
+        filters are resolved to an exact candidate set so only those vectors
+        are scored; broad ones are checked on the search results instead.
+        
+        Args:
+            filter_dict: Metadata filters
+            prefilter_below: Estimated matching fraction below which to pre-filter
+        
+        Returns:
+            Plan for the search
+        """
+        total = len(self._metadata)
+        constraints, residual = self._constraints(filter_dict)
+        if not constraints and not residual:
+            return FilterPlan(UNFILTERED, total)
+        
+        estimate = min((len(ids) for ids in constraints), default=total)
+        if estimate == 0 or not constraints or estimate <= prefilter_below * total:
+            return FilterPlan(PREFILTER, estimate, self._resolve(constraints, residual, filter_dict), filter_dict)
+        return FilterPlan(POSTFILTER, estimate, filter_dict=filter_dict)
+    
+    def candidates(self, filter_dict: Optional[VectorStoreFilter]) -> Set[str]:
+        """
+        Exact set of ids matching a filter.
+        
+        Args:
+            filter_dict: Metadata filters
+        
+        Returns:
+            Matching ids
+        """
+        constraints, residual = self._constraints(filter_dict)
+        return self._resolve(constraints, residual, filter_dict)
+    
+    def matches(self, doc_id: str, filter_dict: Optional[VectorStoreFilter]) -> bool:
+        """Check one indexed document against a filter."""
+        metadata = self._metadata.get(doc_id)
+        return metadata is not None and matches_filter(metadata, filter_dict)
+    
+    def _constraints(self, filter_dict: Optional[VectorStoreFilter]) -> Tuple[List[Set[str]], bool]:
+        """Posting sets that must all contain a match, and whether unindexed checks remain."""
+        constraints = []
+        residual = False
+        
+        equalities = {}
+        for key, value in (filter_dict or {}).items():
+            if value is None:
+                continue
+            if key == "metadata":
+                equalities.update(value)
+            elif key == "tags":
+                tags = self._postings.get("tags", {})
+                constraints.append(set().union(*(tags.get(tag, set()) for tag in value if _hashable(tag))))
+            elif key == "scope":
+                scoped = self._scope_ids(value)
+                if scoped is not None:
+                    constraints.append(scoped)
+            elif key in ("date_from", "date_to"):
+                continue
+            else:
+                equalities[key] = value
+        
+        for key, value in equalities.items():
+            if value is None:
+                continue
+            if _hashable(value):
+                constraints.append(self._postings.get(key, {}).get(value, set()))
+            else:
+                residual = True
+        
+        date_from = (filter_dict or {}).get("date_from")
+        date_to = (filter_dict or {}).get("date_to")
+        if date_from is not None or date_to is not None:
+            start = bisect_left(self._sorted_dates, date_from) if date_from is not None else 0
+            end = bisect_right(self._sorted_dates, date_to) if date_to is not None else len(self._sorted_dates)
+            constraints.append(set().union(*(self._dates[date] for date in self._sorted_dates[start:end])))
+        
+        return constraints, residual
+    
+    def _scope_ids(self, scope: RetrievalScope) -> Optional[Set[str]]:
+        """Ids in a scope (see ``in_scope``), or None if it names neither session nor user."""
+        session_id, user_id = scope.get("session_id"), scope.get("user_id")
+        if session_id is None and user_id is None:
+            return None
+        
+        postings = []
+        if session_id is not None:
+            postings.append(self._postings.get("session_ids", {}).get(session_id, set()))
+            postings.append(self._postings.get("session_id", {}).get(session_id, set()))
+        if user_id is not None:
+            postings.append(self._postings.get("user_id", {}).get(user_id, set()))
+        return set().union(*postings)
+    
+    def _resolve(
+        self,
+        constraints: List[Set[str]],
+        residual: bool,
+        filter_dict: Optional[VectorStoreFilter],
+    ) -> Set[str]:
+        """Intersect constraint sets smallest first, then apply unindexed checks."""
+        if not constraints:
+            matched = set(self._metadata)
+        else:
+            ordered = sorted(constraints, key=len)
+            matched = set(ordered[0])
+            for ids in ordered[1:]:
+                if not matched:
+                    break
+                matched &= ids
+        
+        if residual:
+            matched = {doc_id for doc_id in matched if matches_filter(self._metadata[doc_id], filter_dict)}
+        return matched
+
+
+def _hashable(value: Any) -> bool:
+    return isinstance(value, (str, int, float, bool))
@@ -0,0 +1,165 @@
+"""Token-budget packing of retrieved chunks into a prompt context."""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.ai_core.vectorstore.base import Document
+from app.ai_core.vectorstore.chunking import TokenCounter, chunk_text, estimate_tokens
+from app.types import ContextSection, DocumentWithScore, PackedContext
+
+SECTION_SEPARATOR = "\n\n"
+GAP_MARKER = "\n[...]\n"
+
+
+@dataclass
+class _Span:
+    """A contiguous slice of a source document taken into the context."""
+    start: Optional[int]
+    end: Optional[int]
+    text: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Section:
+    source: str
+    title: Optional[str]
+    score: float
+    spans: List[_Span] = field(default_factory=list)
+
+
+def section_header(index: int, score: float, title: Optional[str] = None) -> str:
+    """Header line introducing one document in the context."""
+    label = f"{title}, relevance: {score:.2f}" if title else f"relevance: {score:.2f}"
+    return f"Document {index} ({label}):\n"
+
+
+def pack_context(
+    documents: Sequence[DocumentWithScore],
+    budget_tokens: int,
+    count_tokens: TokenCounter = estimate_tokens,
+    min_chunk_tokens: int = 32,
+) -> PackedContext:
+    """
+    Greedily fill a token budget with retrieved chunks, best first.
+    
+    Chunks that fit are taken whole; the first that does not is cut to
+    whole sentences filling the rest of the budget (if at least
+    ``min_chunk_tokens`` remain), and smaller chunks further down may still
+    fill the gap. Chunks from the same document become one section under a
+    single header: chunks carrying ``start``/``end`` offsets (see
+    ``IngestionPipeline``) have text already covered by another chunk cut
+    away, so overlapping and adjacent chunks merge into one passage in
+    document order, and non-adjacent ones are joined with a gap marker.
+    Sections keep the order of their best chunk.
+    
+    Args:
+        documents: Reranked (chunk, score) tuples, best first
+        budget_tokens: Token budget of the packed text, headers included
+        count_tokens: Token counter (see ``get_token_counter``)
+        min_chunk_tokens: Smallest remainder worth filling with a trimmed chunk
+    
+    Returns:
+        Packed context; ``token_count`` is the count of ``text``
+    """
+    sections: Dict[str, _Section] = {}
+    remaining = budget_tokens
+    used = trimmed = 0
+    
+    for doc, score in documents:
+        if remaining <= 0:
+            break
+        
+        source = str(doc.metadata.get("document_id", doc.id))
+        section = sections.get(source)
+        start, end, text = _uncovered(doc, section)
+        if not text.strip():
+            continue
+        
+        overhead = (
+            count_tokens(section_header(len(sections) + 1, score, doc.metadata.get("title")) + SECTION_SEPARATOR)
+            if section is None else 0
+        )
+        adjacent = section is not None and start is not None and any(
+            span.end == start or span.start == end for span in section.spans
+        )
+        if section is not None and not adjacent:
+            overhead += count_tokens(GAP_MARKER)
+        
+        cost = count_tokens(text) + overhead
+        if cost > remaining:
+            available = remaining - overhead
+            if available < min_chunk_tokens:
+                continue
+            head = next(chunk_text(text, available, 0, count_tokens, anchored=False), None)
+            if head is None:
+                continue
+            if start is not None:
+                start, end = start + head["start"], start + head["end"]
+            text = head["content"]
+            cost = head["token_count"] + overhead
+            trimmed += 1
+        
+        if section is None:
+            section = _Section(source=source, title=doc.metadata.get("title"), score=score)
+            sections[source] = section
+        section.spans.append(_Span(start, end, text, [doc.id]))
+        remaining -= cost
+        used += 1
+    
+    packed_sections: List[ContextSection] = []
+    parts = []
+    for index, section in enumerate(sections.values(), 1):
+        content = _join(section.spans)
+        packed_sections.append({
+            "source": section.source,
+            "title": section.title,
+            "score": section.score,
+            "content": content,
+            "chunk_ids": [chunk_id for span in section.spans for chunk_id in span.chunk_ids],
+        })
+        parts.append(section_header(index, section.score, section.title) + content)
+    
+    text = SECTION_SEPARATOR.join(parts)
+    return {
+        "text": text,
+        "token_count": count_tokens(text) if text else 0,
+        "sections": packed_sections,
+        "chunks_used": used,
+        "chunks_trimmed": trimmed,
+    }
+
+
+def _uncovered(doc: Document, section: Optional[_Section]) -> Tuple[Optional[int], Optional[int], str]:
+    """(start, end, text) of a chunk minus the parts its section already holds."""
+    text = doc.content
+    start, end = doc.metadata.get("start"), doc.metadata.get("end")
+    if not (isinstance(start, int) and isinstance(end, int) and end - start == len(text)):
+        return None, None, text
+    
+    for span in section.spans if section else []:
+        if span.start is None:
+            continue
+        if span.start <= start < span.end:
+            text, start = text[span.end - start:], span.end
+        if span.start < end <= span.end or start < span.start < end:
+            # Keep the part before the span (a chunk containing a span loses its tail)
+            text, end = text[:span.start - start], span.start
+        if start >= end:
+            return start, start, ""
+    return start, end, text
+
+
+def _join(spans: List[_Span]) -> str:
+    """Spans in document order, adjacent ones concatenated."""
+    ordered = sorted(spans, key=lambda span: (span.start is None, span.start or 0))
+    merged: List[_Span] = []
+    for span in ordered:
+        previous = merged[-1] if merged else None
+        if previous and previous.end is not None and previous.end == span.start:
+            previous.text += span.text
+            previous.end = span.end
+            previous.chunk_ids += span.chunk_ids
+        else:
+            merged.append(_Span(span.start, span.end, span.text, list(span.chunk_ids)))
+    return GAP_MARKER.join(span.text.strip() for span in merged)
@@ -1,41 +1,216 @@
-"""Mock pgvector store for development."""
+"""pgvector-backed vector store on the application Postgres database."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import json
 import logging
-import asyncio
-import math
-import random
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
 
 from app.ai_core.vectorstore.base import BaseVectorStore, Document
+from app.ai_core.vectorstore.embeddings import get_embedding_function
+from app.config.settings import settings
 from app.types import VectorStoreConfig, VectorStoreFilter, DocumentWithScore, VectorStoreStats
 
 logger = logging.getLogger(__name__)
 
+TABLE = "document_chunks"
+INDEX_NAME = "ix_document_chunks_embedding"
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+# Advisory lock held by the worker rebuilding the ANN index
+REBUILD_LOCK_KEY = 7462019
+
+# Bytes per row of the ANN index right after it was built, kept as the index comment
+DENSITY_COMMENT_PREFIX = "bytes_per_row="
+
+# Configuration of the generated content_tsv column (see the add_document_chunks_tsvector migration)
+TEXT_SEARCH_CONFIG = "simple"
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# metric -> (distance operator, index operator class)
+DISTANCE_METRICS: Dict[str, Tuple[str, str]] = {
+    "cosine": ("<=>", "vector_cosine_ops"),
+    "l2": ("<->", "vector_l2_ops"),
+    "inner_product": ("<#>", "vector_ip_ops"),
+}
+
+# Bound as text and cast server side: no client codec for the vector type needed
+VECTOR_PARAM = "CAST(CAST(:{name} AS text) AS vector)"
+
+UPSERT_SQL = f"""
+    INSERT INTO {TABLE} (collection, chunk_id, document_id, content, metadata, embedding)
+    VALUES (:collection, :chunk_id, :document_id, :content, CAST(:metadata AS jsonb), {VECTOR_PARAM.format(name="embedding")})
+    ON CONFLICT (collection, chunk_id) DO UPDATE SET
+        document_id = EXCLUDED.document_id,
+        content = EXCLUDED.content,
+        metadata = EXCLUDED.metadata,
+        embedding = EXCLUDED.embedding,
+        updated_at = now()
+"""
+
+
+def to_vector_literal(embedding: List[float]) -> str:
+    """Format an embedding as a pgvector text literal (``[x1,x2,...]``)."""
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+
+def parse_index_density(comment: Optional[str]) -> Optional[float]:
+    """
+    Bytes per row recorded in the ANN index comment.
+    
+    Args:
+        comment: Index comment (``obj_description``)
+    
+    Returns:
+        Bytes per row, or None if the comment holds none
+    """
+    if not comment or not comment.startswith(DENSITY_COMMENT_PREFIX):
+        return None
+    try:
+        density = float(comment[len(DENSITY_COMMENT_PREFIX):])
+    except ValueError:
+        return None
+    return density if density > 0 else None
+
+
+def build_tsquery(query: str) -> str:
+    """
+    OR-query over the words of a search query, in ``to_tsquery`` syntax.
+    
+    Words are matched with OR rather than AND (``plainto_tsquery``) so a
+    chunk containing only the identifier from a longer question still
+    matches; ``ts_rank_cd`` ranks chunks matching more words higher.
+    
+    Args:
+        query: Search query
+    
+    Returns:
+        tsquery text (empty if the query has no words)
+    """
+    words = dict.fromkeys(WORD_PATTERN.findall(query.lower()))
+    return " | ".join(f"'{word}'" for word in words)
+
+
+def build_filter_clause(filter_dict: Optional[VectorStoreFilter]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Translate a store filter into a SQL ``WHERE`` fragment.
+    
+    Mirrors ``matches_filter``: equality keys and the nested ``metadata`` dict
+    become one JSONB containment test (served by the GIN index), ``tags``
+    matches any overlapping tag and ``date_from``/``date_to`` bound the ISO
+    ``date`` metadata key. ``scope`` is resolved against the live
+    ``session_documents`` and ``documents`` tables rather than the metadata
+    copied at ingestion, so attaching a document to a session takes effect
+    without re-indexing.
+    
+    Args:
+        filter_dict: Metadata filters
+    
+    Returns:
+        (SQL fragment starting with `` AND`` or empty, bind parameters)
+    """
+    clauses = []
+    params: Dict[str, Any] = {}
+    contains: Dict[str, Any] = {}
+    
+    for key, value in (filter_dict or {}).items():
+        if value is None:
+            continue
+        if key == "tags":
+            clauses.append("(metadata -> 'tags') ?| CAST(:filter_tags AS text[])")
+            params["filter_tags"] = list(value)
+        elif key == "date_from":
+            clauses.append("(metadata ->> 'date') >= :filter_date_from")
+            params["filter_date_from"] = value
+        elif key == "date_to":
+            clauses.append("(metadata ->> 'date') <= :filter_date_to")
+            params["filter_date_to"] = value
+        elif key == "metadata":
+            contains.update(value)
+        elif key == "scope":
+            scoped = []
+            if value.get("session_id") is not None:
+                scoped.append("SELECT document_id FROM session_documents WHERE session_id = :scope_session_id")
+                params["scope_session_id"] = int(value["session_id"])
+            if value.get("user_id") is not None:
+                scoped.append("SELECT id FROM documents WHERE user_id = :scope_user_id")
+                params["scope_user_id"] = int(value["user_id"])
+            if scoped:
+                clauses.append(f"document_id IN ({' UNION '.join(scoped)})")
+        else:
+            contains[key] = value
+    
+    if contains:
+        clauses.append("metadata @> CAST(:filter_contains AS jsonb)")
+        params["filter_contains"] = json.dumps(contains)
+    
+    return "".join(f" AND {clause}" for clause in clauses), params
+
 
 class PgVectorStore(BaseVectorStore):
     """
-    Mock pgvector store implementation.
+    Vector store on Postgres with the pgvector extension.
     
-    This is a MOCK implementation for development.
-    Replace with real pgvector implementation when needed.
+    Chunks live in the ``document_chunks`` table (see the
+    ``add_document_chunks_table`` migration), partitioned by collection.
+    Top-k runs server side through the HNSW or IVFFlat index with metadata
+    filters pushed into the same query; ``ef_search`` (HNSW) and ``probes``
+    (IVFFlat) trade recall for latency per query. Keyword search uses the
+    GIN-indexed ``content_tsv`` column.
     
-    Features:
-    - In-memory document storage
-    - Mock embedding similarity search
-    - Metadata filtering
+    Embeddings are bound as text literals cast to ``vector``, so only asyncpg
+    is needed on the client. Point ``connection_string`` at a local
+    ``pgvector/pgvector`` container to run against a scratch database.
     """
     
-    def __init__(self, config: Optional[VectorStoreConfig] = None):
+    backend = "pgvector"
+    
+    def __init__(
+        self,
+        config: Optional[VectorStoreConfig] = None,
+        engine: Optional[AsyncEngine] = None,
+    ):
         """
         Initialize pgvector store.
         
         Args:
-            config: Store configuration (connection_string, collection_name, etc.)
+            config: Store configuration (connection_string, collection_name,
+                embedding_dimension, distance_metric, index_type, ef_search, probes)
+            engine: Engine to use; defaults to the application engine, or a
+                dedicated one when ``connection_string`` is set
         """
         super().__init__(config)
-        self._documents: Dict[str, Document] = {}
-        self._dimension = config.get("dimension", 1536) if config else 1536
-        logger.info(f"Initialized PgVectorStore (MOCK) with dimension={self._dimension}")
+        config = self.config
+        
+        self.collection = config.get("collection_name", "default")
+        self._dimension = config.get("embedding_dimension", settings.PGVECTOR_DIMENSION)
+        self.distance_metric = config.get("distance_metric", settings.PGVECTOR_DISTANCE_METRIC)
+        self.index_type = config.get("index_type", settings.PGVECTOR_INDEX_TYPE)
+        self.ef_search = config.get("ef_search", settings.PGVECTOR_HNSW_EF_SEARCH)
+        self.probes = config.get("probes", settings.PGVECTOR_IVFFLAT_PROBES)
+        
+        if self.distance_metric not in DISTANCE_METRICS:
+            raise ValueError(
+                f"Unsupported distance metric: {self.distance_metric}. "
+                f"Available metrics: {list(DISTANCE_METRICS)}"
+            )
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {self.index_type}. Available types: {list(INDEX_TYPES)}")
+        
+        if engine is None:
+            if config.get("connection_string"):
+                engine = create_async_engine(config["connection_string"], pool_pre_ping=True)
+            else:
+                from app.database.engine import engine
+        self.engine = engine
+        self.embeddings = get_embedding_function(self._dimension)
+        
+        logger.info(
+            f"Initialized PgVectorStore collection={self.collection} "
+            f"dimension={self._dimension} metric={self.distance_metric} index={self.index_type}"
+        )
     
     async def add_documents(
         self,
@@ -43,28 +218,51 @@ class PgVectorStore(BaseVectorStore):
         **kwargs
     ) -> List[str]:
         """
-        Add documents to store (mocked).
+        Upsert documents in batched ``INSERT ... ON CONFLICT`` statements.
+        
+        Documents without an embedding are embedded first in one call.
         
         Args:
             documents: List of documents to add
-            **kwargs: Additional arguments
-            
+            **kwargs: ``batch_size`` overrides PGVECTOR_INSERT_BATCH_SIZE
+        
         Returns:
             List of added document IDs
         """
-        logger.info(f"Adding {len(documents)} documents (MOCK)")
-        await asyncio.sleep(0.1)
+        if not documents:
+            return []
+        
+        missing = [doc for doc in documents if not doc.embedding]
+        if missing:
+            embeddings = await self.embeddings.embed_documents([doc.content for doc in missing])
+            for doc, embedding in zip(missing, embeddings):
+                doc.embedding = embedding
         
-        added_ids = []
+        rows = []
         for doc in documents:
-            if not doc.embedding:
-                doc.embedding = self._generate_mock_embedding()
-            
-            self._documents[doc.id] = doc
-            added_ids.append(doc.id)
+            if len(doc.embedding) != self._dimension:
+                raise ValueError(
+                    f"Embedding dimension {len(doc.embedding)} of document {doc.id} "
+                    f"does not match store dimension {self._dimension}"
+                )
+            document_id = doc.metadata.get("document_id")
+            rows.append({
+                "collection": self.collection,
+                "chunk_id": doc.id,
+                "document_id": document_id if isinstance(document_id, int) else None,
+                "content": doc.content,
+                "metadata": json.dumps(doc.metadata, default=str),
+                "embedding": to_vector_literal(doc.embedding),
+            })
+        
+        batch_size = kwargs.get("batch_size", settings.PGVECTOR_INSERT_BATCH_SIZE)
+        async with self.engine.begin() as conn:
+            for start in range(0, len(rows), batch_size):
+                await conn.execute(text(UPSERT_SQL), rows[start:start + batch_size])
+        self._index_changed()
         
-        logger.info(f"Added {len(added_ids)} documents to store (MOCK)")
-        return added_ids
+        logger.info(f"Upserted {len(rows)} documents into collection {self.collection}")
+        return [doc.id for doc in documents]
     
     async def similarity_search(
         self,
@@ -74,14 +272,14 @@ class PgVectorStore(BaseVectorStore):
         **kwargs
     ) -> List[Document]:
         """
-        Search for similar documents (mocked).
+        Search for similar documents.
         
         Args:
             query: Search query
             k: Number of results to return
             filter_dict: Metadata filters
-            **kwargs: Additional arguments
-            
+            **kwargs: See ``similarity_search_by_vector``
+        
         Returns:
             List of similar documents
         """
@@ -101,128 +299,388 @@ class PgVectorStore(BaseVectorStore):
         **kwargs
     ) -> List[DocumentWithScore]:
         """
-        Search for similar documents with scores (mocked).
+        Search for similar documents with scores.
         
         Args:
             query: Search query
             k: Number of results to return
             filter_dict: Metadata filters
+            **kwargs: See ``similarity_search_by_vector``
+        
+        Returns:
+            List of (document, score) tuples, best first
+        """
+        query_embedding = await self.embeddings.embed_query(query)
+        return await self.similarity_search_by_vector(query_embedding, k, filter_dict, **kwargs)
+    
+    async def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Server-side top-k for a query embedding.
+        
+        The index parameter is set with ``SET LOCAL`` so it only applies to
+        this query's transaction. Scoped searches skip the ANN index: an ANN
+        scan filtered down to one session or user returns too few rows, so
+        the scoped chunks (found through the ``document_id`` index) are
+        ranked exactly instead, which costs the size of the scope rather
+        than of the corpus.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            filter_dict: Metadata filters, evaluated in SQL
+            ef_search: HNSW candidate list size (raised to at least k)
+            probes: IVFFlat lists scanned
             **kwargs: Additional arguments
-            
+        
         Returns:
-            List of (document, score) tuples
+            List of (document, score) tuples, best first
         """
-        logger.info(f"Searching for similar documents (MOCK): '{query[:50]}...'")
-        await asyncio.sleep(0.15)
+        operator = DISTANCE_METRICS[self.distance_metric][0]
+        where, params = build_filter_clause(filter_dict)
+        params.update({
+            "collection": self.collection,
+            "embedding": to_vector_literal(embedding),
+            "k": k,
+        })
         
-        query_embedding = self._generate_mock_embedding(seed=hash(query))
+        distance = f"embedding {operator} {VECTOR_PARAM.format(name='embedding')}"
+        if (filter_dict or {}).get("scope"):
+            # MATERIALIZED keeps the planner from ordering through the ANN index
+            sql = text(f"""
+                WITH scoped AS MATERIALIZED (
+                    SELECT chunk_id, content, metadata, {distance} AS distance
+                    FROM {TABLE}
+                    WHERE collection = :collection{where}
+                )
+                SELECT chunk_id, content, metadata, distance
+                FROM scoped
+                ORDER BY distance
+                LIMIT :k
+            """)
+        else:
+            sql = text(f"""
+                SELECT chunk_id, content, metadata, {distance} AS distance
+                FROM {TABLE}
+                WHERE collection = :collection{where}
+                ORDER BY distance
+                LIMIT :k
+            """)
         
-        filtered_docs = self._apply_filters(filter_dict)
+        async with self.engine.begin() as conn:
+            if self.index_type == "hnsw":
+                await conn.execute(text(f"SET LOCAL hnsw.ef_search = {max(int(ef_search or self.ef_search), k)}"))
+            else:
+                await conn.execute(text(f"SET LOCAL ivfflat.probes = {int(probes or self.probes)}"))
+            rows = (await conn.execute(sql, params)).all()
         
-        results = []
-        for doc in filtered_docs:
-            similarity = self._cosine_similarity(query_embedding, doc.embedding)
-            results.append((doc, similarity))
+        return [
+            (
+                Document(id=row.chunk_id, content=row.content, metadata=row.metadata),
+                self._distance_to_score(row.distance),
+            )
+            for row in rows
+        ]
+    
+    async def lexical_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[VectorStoreFilter] = None,
+        **kwargs
+    ) -> List[DocumentWithScore]:
+        """
+        Full-text search on ``content_tsv``, ranked by ``ts_rank_cd``.
         
-        results.sort(key=lambda x: x[1], reverse=True)
-        results = results[:k]
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filters, evaluated in SQL
+            **kwargs: Additional arguments
+        
+        Returns:
+            List of (document, rank) tuples, best first
+        """
+        tsquery = build_tsquery(query)
+        if not tsquery:
+            return []
+        
+        where, params = build_filter_clause(filter_dict)
+        params.update({"collection": self.collection, "tsquery": tsquery, "k": k})
+        
+        sql = text(f"""
+            SELECT chunk_id, content, metadata, ts_rank_cd(content_tsv, query) AS rank
+            FROM {TABLE}, to_tsquery('{TEXT_SEARCH_CONFIG}', :tsquery) AS query
+            WHERE collection = :collection AND content_tsv @@ query{where}
+            ORDER BY rank DESC
+            LIMIT :k
+        """)
+        
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(sql, params)).all()
         
-        logger.info(f"Found {len(results)} similar documents (MOCK)")
-        return results
+        return [
+            (Document(id=row.chunk_id, content=row.content, metadata=row.metadata), float(row.rank))
+            for row in rows
+        ]
     
     async def delete_by_ids(self, ids: List[str]) -> bool:
         """
-        Delete documents by IDs (mocked).
+        Delete documents by IDs.
         
         Args:
             ids: Document IDs to delete
-            
+        
         Returns:
             True if successful
         """
-        logger.info(f"Deleting {len(ids)} documents (MOCK)")
-        await asyncio.sleep(0.05)
+        if not ids:
+            return True
         
-        for doc_id in ids:
-            self._documents.pop(doc_id, None)
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                text(f"DELETE FROM {TABLE} WHERE collection = :collection AND chunk_id = ANY(:ids)"),
+                {"collection": self.collection, "ids": list(ids)},
+            )
+        self._index_changed()
         
-        logger.info("Deleted documents (MOCK)")
+        logger.info(f"Deleted {result.rowcount} documents from collection {self.collection}")
         return True
     
     async def get_by_ids(self, ids: List[str]) -> List[Document]:
         """
-        Get documents by IDs (mocked).
+        Get documents by IDs.
         
         Args:
             ids: Document IDs to retrieve
-            
+        
         Returns:
-            List of documents
+            List of documents (without embeddings)
         """
-        logger.info(f"Retrieving {len(ids)} documents by ID (MOCK)")
-        await asyncio.sleep(0.05)
+        if not ids:
+            return []
         
-        return [self._documents[doc_id] for doc_id in ids if doc_id in self._documents]
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(
+                text(f"""
+                    SELECT chunk_id, content, metadata FROM {TABLE}
+                    WHERE collection = :collection AND chunk_id = ANY(:ids)
+                """),
+                {"collection": self.collection, "ids": list(ids)},
+            )).all()
+        
+        by_id = {row.chunk_id: row for row in rows}
+        return [
+            Document(id=doc_id, content=by_id[doc_id].content, metadata=by_id[doc_id].metadata)
+            for doc_id in ids if doc_id in by_id
+        ]
     
-    def _apply_filters(self, filter_dict: Optional[VectorStoreFilter]) -> List[Document]:
+    async def get_by_document_id(self, document_id: int) -> List[Document]:
         """
-        Apply metadata filters to documents.
+        Get the chunks of a source document.
         
         Args:
-            filter_dict: Metadata filters
-            
+            document_id: ``document_id`` column of the chunks
+        
         Returns:
-            Filtered documents
+            List of chunks (without embeddings)
         """
-        if not filter_dict:
-            return list(self._documents.values())
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(
+                text(f"""
+                    SELECT chunk_id, content, metadata FROM {TABLE}
+                    WHERE collection = :collection AND document_id = :document_id
+                """),
+                {"collection": self.collection, "document_id": document_id},
+            )).all()
+        return [Document(id=row.chunk_id, content=row.content, metadata=row.metadata) for row in rows]
+    
+    async def update_metadata(self, metadata: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace the metadata of stored documents, keeping their embeddings.
         
-        filtered = []
-        for doc in self._documents.values():
-            match = True
-            for key, value in filter_dict.items():
-                if doc.metadata.get(key) != value:
-                    match = False
-                    break
-            if match:
-                filtered.append(doc)
+        Args:
+            metadata: New metadata by document id (unknown ids are ignored)
+        """
+        if not metadata:
+            return
         
-        return filtered
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text(f"""
+                    UPDATE {TABLE} SET metadata = CAST(:metadata AS jsonb), updated_at = now()
+                    WHERE collection = :collection AND chunk_id = :chunk_id
+                """),
+                [
+                    {"collection": self.collection, "chunk_id": doc_id, "metadata": json.dumps(doc_metadata, default=str)}
+                    for doc_id, doc_metadata in metadata.items()
+                ],
+            )
+        self._index_changed()
     
-    def _generate_mock_embedding(self, seed: Optional[int] = None) -> List[float]:
+    async def delete_by_document_id(self, document_id: int) -> int:
         """
-        Generate mock embedding vector.
+        Delete every chunk of a source document in one statement.
         
         Args:
-            seed: Random seed for reproducibility
-            
+            document_id: ``document_id`` column of the chunks
+        
+        Returns:
+            Number of chunks deleted
+        """
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                text(f"DELETE FROM {TABLE} WHERE collection = :collection AND document_id = :document_id"),
+                {"collection": self.collection, "document_id": document_id},
+            )
+        self._index_changed()
+        
+        logger.info(f"Deleted {result.rowcount} chunks of document {document_id} from collection {self.collection}")
+        return result.rowcount
+    
+    async def get_tombstone_ratio(self) -> float:
+        """
+        Measured bloat of the ANN index: the fraction of it not taken by live rows.
+        
+        Autovacuum reclaims dead rows, but the index keeps the space they
+        held. Its expected size is the live row count times the bytes per
+        row it had right after its last build, which ``create_index`` and
+        ``rebuild_index`` record in the index comment; an index built
+        elsewhere (e.g. by a migration) gets its current density recorded
+        on the first check.
+        
         Returns:
-            Mock embedding vector
+            Ratio between 0 and 1 (0 before the table has statistics)
+        """
+        async with self.engine.begin() as conn:
+            row = (await conn.execute(
+                text(
+                    "SELECT pg_relation_size(c.oid) AS size, s.n_live_tup AS live, "
+                    "obj_description(c.oid, 'pg_class') AS comment "
+                    "FROM pg_class c JOIN pg_stat_user_tables s ON s.relname = :table "
+                    "WHERE c.oid = to_regclass(:index)"
+                ),
+                {"table": TABLE, "index": INDEX_NAME},
+            )).one_or_none()
+            if row is None or not row.live or not row.size:
+                return 0.0
+            
+            density = parse_index_density(row.comment)
+            if density is None:
+                await self._record_index_density(conn)
+                return 0.0
+        
+        return max(0.0, 1.0 - row.live * density / row.size)
+    
+    async def rebuild_index(self) -> None:
+        """
+        Rebuild the ANN index without blocking writes.
+        
+        Only the index is rebuilt: dead rows are left to autovacuum. The
+        table is shared by every worker, so an advisory lock lets only one
+        of them rebuild at a time; the others skip.
         """
-        if seed is not None:
-            random.seed(seed)
+        async with self.engine.connect() as conn:
+            # REINDEX CONCURRENTLY cannot run inside a transaction
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REBUILD_LOCK_KEY})).scalar()
+            if not locked:
+                logger.info(f"Skipping rebuild of {INDEX_NAME}: another worker holds the lock")
+                return
+            try:
+                await conn.execute(text(f"REINDEX INDEX CONCURRENTLY {INDEX_NAME}"))
+                await self._record_index_density(conn)
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REBUILD_LOCK_KEY})
         
-        vector = [random.gauss(0, 1) for _ in range(self._dimension)]
-        norm = math.sqrt(sum(x ** 2 for x in vector))
-        return [x / norm for x in vector]
+        logger.info(f"Rebuilt {INDEX_NAME}")
+    
+    async def _record_index_density(self, conn: AsyncConnection) -> None:
+        """Record the ANN index's bytes per row as its comment (the bloat baseline)."""
+        row = (await conn.execute(
+            text(f"SELECT pg_relation_size(to_regclass(:index)) AS size, count(*) AS rows FROM {TABLE}"),
+            {"index": INDEX_NAME},
+        )).one()
+        if not row.rows or not row.size:
+            return
+        # COMMENT takes no bind parameters; the value is a formatted float
+        await conn.execute(text(
+            f"COMMENT ON INDEX {INDEX_NAME} IS '{DENSITY_COMMENT_PREFIX}{row.size / row.rows:.1f}'"
+        ))
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        return max(0.0, min(1.0, dot_product))
+    async def create_index(self, index_type: Optional[str] = None, **params: int) -> None:
+        """
+        (Re)build the ANN index on the embedding column.
+        
+        IVFFlat clusters are computed from the rows present at build time, so
+        rebuild after bulk loads. Building locks the table against writes.
+        
+        Args:
+            index_type: ``hnsw`` or ``ivfflat`` (default: the store's type)
+            **params: ``m``/``ef_construction`` (HNSW) or ``lists`` (IVFFlat)
+        """
+        index_type = index_type or self.index_type
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}. Available types: {list(INDEX_TYPES)}")
+        
+        if index_type == "hnsw":
+            options = {
+                "m": params.get("m", settings.PGVECTOR_HNSW_M),
+                "ef_construction": params.get("ef_construction", settings.PGVECTOR_HNSW_EF_CONSTRUCTION),
+            }
+        else:
+            options = {"lists": params.get("lists", settings.PGVECTOR_IVFFLAT_LISTS)}
+        with_clause = ", ".join(f"{key} = {int(value)}" for key, value in options.items())
+        opclass = DISTANCE_METRICS[self.distance_metric][1]
+        
+        async with self.engine.begin() as conn:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+            await conn.execute(text(
+                f"CREATE INDEX {INDEX_NAME} ON {TABLE} "
+                f"USING {index_type} (embedding {opclass}) WITH ({with_clause})"
+            ))
+            await self._record_index_density(conn)
+        
+        self.index_type = index_type
+        logger.info(f"Built {index_type} index on {TABLE} ({with_clause})")
     
-    def get_stats(self) -> VectorStoreStats:
+    async def get_stats(self) -> VectorStoreStats:
         """
         Get store statistics.
         
         Returns:
             Statistics dictionary
         """
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(
+                text(f"SELECT count(*) AS total, max(updated_at) AS last_updated FROM {TABLE} WHERE collection = :collection"),
+                {"collection": self.collection},
+            )).one()
+        
         return {
-            "total_documents": len(self._documents),
-            "dimension": self._dimension,
-            "mock": True
+            "total_documents": row.total,
+            "total_embeddings": row.total,
+            "collection_name": self.collection,
+            "embedding_dimension": self._dimension,
+            "last_updated": row.last_updated.isoformat() if row.last_updated else None,
+            "backend": "pgvector",
+            "index_type": self.index_type,
         }
+    
+    def _distance_to_score(self, distance: float) -> float:
+        """Convert a pgvector distance into a similarity (higher is better)."""
+        if self.distance_metric == "cosine":
+            return 1.0 - distance
+        if self.distance_metric == "inner_product":
+            return -distance
+        return 1.0 / (1.0 + distance)
 
 
 def get_pgvector_store(config: Optional[VectorStoreConfig] = None) -> PgVectorStore:
@@ -231,7 +689,7 @@ def get_pgvector_store(config: Optional[VectorStoreConfig] = None) -> PgVectorSt
     
     Args:
         config: Store configuration
-        
+    
     Returns:
         PgVectorStore instance
     """
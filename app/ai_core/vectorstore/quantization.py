@@ -0,0 +1,202 @@
+"""Compact embedding storage: float16 and scalar-quantized int8 rows."""
+
+from typing import Optional, Tuple
+import tempfile
+
+import numpy as np
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+# Rows upcast to float32 per scoring block; small enough to stay in CPU cache
+BLOCK_BYTES = 2 * 2 ** 20
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization.
+    
+    Each row is scaled so its largest absolute component maps to 127.
+    
+    Args:
+        vectors: float32 matrix
+    
+    Returns:
+        (int8 codes, float32 scale per row); ``codes * scale`` approximates the input
+    """
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class VectorStorage:
+    """
+    Growable row store for normalized embeddings in float32, float16 or int8.
+    
+    Only the codes (plus one float32 scale per row for int8) live in process
+    memory. With ``keep_full`` a float32 copy is kept in a temporary
+    file-backed memory map for rescoring: its pages are page cache the kernel
+    can evict, and a search only touches the rows it rescores.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        capacity: int = 1024,
+        storage: str = "float32",
+        keep_full: bool = False,
+        spill_dir: Optional[str] = None,
+    ):
+        """
+        Initialize storage.
+        
+        Args:
+            dimension: Embedding dimension
+            capacity: Rows allocated up front
+            storage: ``float32``, ``float16`` or ``int8``
+            keep_full: Keep float32 originals on disk for rescoring
+                (ignored for float32 storage)
+            spill_dir: Directory for the originals file (default: system temp)
+        """
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unsupported storage type: {storage}. Available types: {list(STORAGE_TYPES)}")
+        
+        self.dimension = dimension
+        self.storage = storage
+        self.spill_dir = spill_dir
+        capacity = max(1, capacity)
+        
+        self.codes = np.zeros((capacity, dimension), dtype=np.float32 if storage == "float32" else storage)
+        self.scales = np.ones(capacity, dtype=np.float32) if storage == "int8" else None
+        self.full = self._allocate_full(capacity) if keep_full and storage != "float32" else None
+    
+    @property
+    def capacity(self) -> int:
+        return len(self.codes)
+    
+    @property
+    def quantized(self) -> bool:
+        return self.storage != "float32"
+    
+    @property
+    def nbytes(self) -> int:
+        """Process memory held (codes and scales; the on-disk originals are excluded)."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+    
+    def reserve(self, rows: int, used: int) -> None:
+        """
+        Grow (by doubling) to hold at least ``rows`` rows.
+        
+        Args:
+            rows: Rows needed
+            used: Rows currently in use (copied over)
+        """
+        capacity = self.capacity
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        
+        codes = np.zeros((capacity, self.dimension), dtype=self.codes.dtype)
+        codes[:used] = self.codes[:used]
+        self.codes = codes
+        if self.scales is not None:
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[:used] = self.scales[:used]
+            self.scales = scales
+        if self.full is not None:
+            full = self._allocate_full(capacity)
+            full[:used] = self.full[:used]
+            self.full = full
+    
+    def set_rows(self, rows: np.ndarray | list, vectors: np.ndarray) -> None:
+        """
+        Write normalized float32 vectors into rows.
+        
+        Args:
+            rows: Row numbers
+            vectors: One vector per row
+        """
+        if self.storage == "int8":
+            codes, scales = quantize_int8(vectors)
+            self.codes[rows] = codes
+            self.scales[rows] = scales
+        else:
+            self.codes[rows] = vectors
+        if self.full is not None:
+            self.full[rows] = vectors
+    
+    def move_row(self, source: int, target: int) -> None:
+        """Copy row ``source`` over row ``target``."""
+        self.codes[target] = self.codes[source]
+        if self.scales is not None:
+            self.scales[target] = self.scales[source]
+        if self.full is not None:
+            self.full[target] = self.full[source]
+    
+    def get(self, rows: np.ndarray | int) -> np.ndarray:
+        """
+        Vectors of rows at the best precision available.
+        
+        Args:
+            rows: Row number(s)
+        
+        Returns:
+            float32 vector(s)
+        """
+        if self.full is not None:
+            return np.asarray(self.full[rows], dtype=np.float32)
+        vectors = np.asarray(self.codes[rows], dtype=np.float32)
+        if self.scales is not None:
+            vectors = vectors * (self.scales[rows][..., None] if np.ndim(rows) else self.scales[rows])
+        return vectors
+    
+    def scores(self, queries: np.ndarray, size: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarity of queries against stored rows, computed on the codes.
+        
+        Quantized rows are upcast one cache-sized block at a time into a reused
+        buffer, so no full-size float32 temporary is ever allocated.
+        
+        Args:
+            queries: float32 queries, one per row
+            size: Rows in use
+            rows: Optional subset of row numbers to score
+        
+        Returns:
+            Score matrix of shape (queries, rows)
+        """
+        count = size if rows is None else len(rows)
+        if not self.quantized:
+            matrix = self.codes[:size] if rows is None else self.codes[rows]
+            return queries @ matrix.T
+        
+        out = np.empty((len(queries), count), dtype=np.float32)
+        block = max(256, BLOCK_BYTES // (4 * self.dimension))
+        buffer = np.empty((min(block, count), self.dimension), dtype=np.float32)
+        for start in range(0, count, block):
+            end = min(start + block, count)
+            selection = slice(start, end) if rows is None else rows[start:end]
+            upcast = buffer[:end - start]
+            np.copyto(upcast, self.codes[selection], casting="unsafe")
+            out[:, start:end] = queries @ upcast.T
+            if self.scales is not None:
+                out[:, start:end] *= self.scales[selection]
+        return out
+    
+    def rescore(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """
+        Full-precision similarity for a few rows.
+        
+        Args:
+            query: float32 query
+            rows: Row numbers
+        
+        Returns:
+            One score per row
+        """
+        return self.get(rows) @ query
+    
+    def _allocate_full(self, capacity: int) -> np.ndarray:
+        handle = tempfile.TemporaryFile(dir=self.spill_dir)
+        return np.memmap(handle, dtype=np.float32, mode="w+", shape=(capacity, self.dimension))
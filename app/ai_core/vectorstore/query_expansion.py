@@ -0,0 +1,68 @@
+"""Cheap query rewrites for fan-out retrieval (no LLM call)."""
+
+from typing import List
+import re
+
+_TERM_PATTERN = re.compile(r"\w+(?:[-.:/]\w+)*", re.UNICODE)
+_QUOTED_PATTERN = re.compile(r"[\"“]([^\"”\n]{3,200})[\"”]")
+
+STOPWORDS = frozenset(
+    """
+    a about an and are as at be been but by can could did do does for from had has have how i if in
+    into is it its me my of on or our please should so tell than that the their them then there
+    these they this those to was we were what when where which who why will with would you your
+    """.split()
+)
+
+
+def _is_identifier(term: str) -> bool:
+    """Codes, versions and names: digits, inner capitals, separators or all caps."""
+    return (
+        any(char.isdigit() for char in term)
+        or any(char in "-.:/_" for char in term)
+        or (term.isupper() and len(term) > 1)
+        or (not term.islower() and not term.istitle())
+    )
+
+
+def expand_query(query: str, max_rewrites: int = 2) -> List[str]:
+    """
+    Rewrites of a question that retrieve differently from the original.
+    
+    - Keyword query: the question without stop words, which moves the
+      embedding away from the question's phrasing toward its content
+    - Identifier query: only the codes, versions and names in the question,
+      which keyword search matches exactly
+    
+    Args:
+        query: User question
+        max_rewrites: Maximum number of rewrites
+    
+    Returns:
+        Distinct rewrites, none equal to the query
+    """
+    terms = _TERM_PATTERN.findall(query)
+    keywords = [term for term in terms if term.lower() not in STOPWORDS]
+    identifiers = [term for term in keywords if _is_identifier(term)]
+    
+    rewrites: List[str] = []
+    for rewrite in (" ".join(keywords), " ".join(identifiers)):
+        normalized = rewrite.lower()
+        if rewrite and normalized != query.strip().lower() and normalized not in (r.lower() for r in rewrites):
+            rewrites.append(rewrite)
+    return rewrites[:max_rewrites]
+
+
+def quoted_queries(text: str, limit: int = 3) -> List[str]:
+    """
+    Search queries quoted in free-text plan output.
+    
+    Args:
+        text: Plan text (e.g. the ``plan_text`` of PlanTool)
+        limit: Maximum number of queries
+    
+    Returns:
+        Distinct quoted strings, in order
+    """
+    queries = dict.fromkeys(match.strip() for match in _QUOTED_PATTERN.findall(text or ""))
+    return [query for query in queries if query][:limit]
@@ -0,0 +1,163 @@
+"""Second-stage reranking of retrieved documents: relevance, diversity and deduplication."""
+
+from typing import List, Optional, Protocol, Sequence
+import logging
+
+import numpy as np
+
+from app.ai_core.vectorstore.base import Document
+from app.ai_core.vectorstore.embeddings import EmbeddingFunction
+from app.types import DocumentWithScore
+
+logger = logging.getLogger(__name__)
+
+# float32 rounding leaves the cosine similarity of identical vectors just below 1.0
+_SIMILARITY_TOLERANCE = 1e-5
+
+
+class RelevanceScorer(Protocol):
+    """
+    Scores candidates against the query (e.g. a local cross-encoder).
+    
+    Higher is more relevant; scores only need to be comparable within one call.
+    """
+    
+    async def score(self, query: str, documents: List[Document]) -> List[float]:
+        ...
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray,
+    embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    duplicate_threshold: float = 1.0,
+) -> List[int]:
+    """
+    Greedy maximal marginal relevance selection.
+    
+    Each step picks the candidate maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max_similarity_to_selected``.
+    The pairwise similarity matrix is one matrix product, and each step
+    updates the running max-similarity vector in place, so selecting k of n
+    costs O(n * k) vectorized work after the O(n^2 * d) product. Candidates
+    whose similarity to a selected one reaches ``duplicate_threshold`` are
+    dropped as near-duplicates.
+    
+    Args:
+        relevance: Relevance per candidate, higher is better (scaled to [0, 1]
+            so it is comparable with cosine similarity)
+        embeddings: Candidate embeddings, one row per candidate
+        k: Number of candidates to select
+        lambda_mult: 1 ranks by relevance only, 0 by diversity only
+        duplicate_threshold: Cosine similarity at which a candidate counts as
+            a duplicate of a selected one (1.0 keeps all but exact duplicates)
+    
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    count = len(relevance)
+    if count == 0 or k <= 0:
+        return []
+    
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = vectors / norms
+    similarity = vectors @ vectors.T
+    
+    relevance = np.asarray(relevance, dtype=np.float32)
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(count, dtype=np.float32)
+    
+    max_similarity = np.full(count, -np.inf, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+    selected: List[int] = []
+    while len(selected) < k and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+        available &= max_similarity < duplicate_threshold - _SIMILARITY_TOLERANCE
+    
+    return selected
+
+
+class Reranker:
+    """
+    Reorders over-fetched candidates into a short, diverse, relevant list.
+    
+    Relevance comes from the scorer when one is set, otherwise from the
+    retrieval scores. Candidate embeddings are taken from the embedding
+    function (served from the embedding cache for indexed chunks), then
+    ``maximal_marginal_relevance`` trades relevance against redundancy and
+    drops near-duplicate chunks, so the context window is not spent on the
+    same passage twice.
+    """
+    
+    def __init__(
+        self,
+        embeddings: EmbeddingFunction,
+        scorer: Optional[RelevanceScorer] = None,
+        lambda_mult: float = 0.7,
+        duplicate_threshold: float = 0.95,
+    ):
+        """
+        Initialize reranker.
+        
+        Args:
+            embeddings: Embedding function of the searched store
+            scorer: Optional relevance model replacing retrieval scores
+            lambda_mult: Relevance vs diversity trade-off (see
+                ``maximal_marginal_relevance``)
+            duplicate_threshold: Cosine similarity above which chunks are
+                treated as near-duplicates
+        """
+        self.embeddings = embeddings
+        self.scorer = scorer
+        self.lambda_mult = lambda_mult
+        self.duplicate_threshold = duplicate_threshold
+    
+    async def rerank(
+        self,
+        query: str,
+        candidates: Sequence[DocumentWithScore],
+        top_n: int,
+    ) -> List[DocumentWithScore]:
+        """
+        Select the best ``top_n`` candidates.
+        
+        Args:
+            query: Search query
+            candidates: Retrieved (document, score) tuples
+            top_n: Number of documents to keep
+        
+        Returns:
+            (document, relevance) tuples in selection order
+        """
+        if not candidates:
+            return []
+        
+        documents = [doc for doc, _ in candidates]
+        if self.scorer is not None:
+            relevance = await self.scorer.score(query, documents)
+        else:
+            relevance = [score for _, score in candidates]
+        
+        embeddings = await self.embeddings.embed_documents([doc.content for doc in documents])
+        selected = maximal_marginal_relevance(
+            np.asarray(relevance, dtype=np.float32),
+            np.asarray(embeddings, dtype=np.float32),
+            top_n,
+            self.lambda_mult,
+            self.duplicate_threshold,
+        )
+        
+        logger.debug(f"Reranked {len(candidates)} candidates to {len(selected)}")
+        return [(documents[index], float(relevance[index])) for index in selected]
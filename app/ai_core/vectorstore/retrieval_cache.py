@@ -0,0 +1,234 @@
+"""In-process LRU of search results keyed by quantized query embedding."""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import time
+
+import numpy as np
+
+from app.config.settings import settings
+from app.middleware.metrics import retrieval_cache_lookups_total
+from app.types import DocumentWithScore, RetrievalCacheStats, VectorStoreFilter
+
+
+def quantize_embedding(embedding: Sequence[float], step: float) -> bytes:
+    """
+    Digest of a query embedding snapped to a grid.
+    
+    The vector is normalized and each component rounded to a multiple of
+    ``step``, so embeddings of near-identical queries (casing, punctuation,
+    a filler word) share a digest while different queries do not.
+    
+    Args:
+        embedding: Query embedding
+        step: Grid spacing per component (on the unit-normalized vector)
+    
+    Returns:
+        16-byte digest
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    grid = np.round(vector / step).astype(np.int32) if step > 0 else vector
+    return hashlib.blake2b(grid.tobytes(), digest_size=16).digest()
+
+
+def filter_digest(filter_dict: Optional[VectorStoreFilter]) -> str:
+    """Order-independent digest of a metadata filter (ignores None values, like the stores)."""
+    if not filter_dict:
+        return ""
+    canonical = json.dumps(
+        {key: value for key, value in filter_dict.items() if value is not None},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RetrievalCache:
+    """
+    Bounded LRU of search results.
+    
+    Keys combine the quantized query embedding, a filter digest, k, the
+    search parameters and ``version``. One cache is shared by every store
+    instance of a collection (see ``get_retrieval_cache``), and a write
+    through any of them calls ``invalidate``, so results cached before an
+    add or delete stop matching. Writes made by another process (a shared
+    pgvector database) do not; ``ttl_seconds`` bounds how long such results
+    can be served.
+    """
+    
+    def __init__(
+        self,
+        capacity: int = 1024,
+        quantization_step: float = 0.01,
+        ttl_seconds: float = 0.0,
+        backend: str = "memory",
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            capacity: Result lists kept in the LRU
+            quantization_step: Embedding grid spacing (0 = exact embeddings only)
+            ttl_seconds: Maximum age of a cached result (0 = until evicted)
+            backend: Store backend name, for metrics
+        """
+        self.capacity = capacity
+        self.quantization_step = quantization_step
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._lru: OrderedDict[Hashable, Tuple[float, List[DocumentWithScore]]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self.version = 0
+    
+    def __len__(self) -> int:
+        return len(self._lru)
+    
+    def key(
+        self,
+        embedding: Sequence[float],
+        filter_dict: Optional[VectorStoreFilter],
+        k: int,
+        version: int,
+        *params: Any,
+    ) -> Hashable:
+        """
+        Cache key of one search.
+        
+        Args:
+            embedding: Query embedding
+            filter_dict: Metadata filters
+            k: Number of results
+            version: Store index version
+            *params: Other inputs that change the results (search mode,
+                weights, keyword terms), hashable
+        
+        Returns:
+            Hashable key
+        """
+        return (
+            quantize_embedding(embedding, self.quantization_step),
+            filter_digest(filter_dict),
+            k,
+            version,
+            params,
+        )
+    
+    def get(self, key: Hashable) -> Optional[List[DocumentWithScore]]:
+        """
+        Cached results for a key.
+        
+        Args:
+            key: Key from ``key``
+        
+        Returns:
+            A copy of the result list, or None on a miss
+        """
+        entry = self._lru.get(key)
+        if entry is not None and self.ttl_seconds > 0 and time.monotonic() - entry[0] > self.ttl_seconds:
+            del self._lru[key]
+            entry = None
+        
+        if entry is None:
+            self._misses += 1
+            retrieval_cache_lookups_total.labels(backend=self.backend, result="miss").inc()
+            return None
+        
+        self._lru.move_to_end(key)
+        self._hits += 1
+        retrieval_cache_lookups_total.labels(backend=self.backend, result="hit").inc()
+        return list(entry[1])
+    
+    def set(self, key: Hashable, results: Sequence[DocumentWithScore]) -> None:
+        """
+        Cache results, evicting the least recently used entries over capacity.
+        
+        Args:
+            key: Key from ``key``
+            results: Search results
+        """
+        if self.capacity <= 0:
+            return
+        self._lru[key] = (time.monotonic(), list(results))
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+    
+    def invalidate(self) -> None:
+        """Record a write: bump ``version`` and drop the entries cached before it."""
+        self.version += 1
+        self._lru.clear()
+    
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        self._lru.clear()
+        self._hits = 0
+        self._misses = 0
+    
+    def get_stats(self) -> RetrievalCacheStats:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Statistics dictionary
+        """
+        lookups = self._hits + self._misses
+        return {
+            "backend": self.backend,
+            "size": len(self._lru),
+            "capacity": self.capacity,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+
+# Store instances are created per agent (and so per request): caches live at process level
+_caches: Dict[Tuple[str, str], RetrievalCache] = {}
+
+
+def get_retrieval_cache(
+    backend: str,
+    collection: str = "default",
+    capacity: Optional[int] = None,
+) -> Optional[RetrievalCache]:
+    """
+    Process-wide retrieval cache of a collection, created on first use.
+    
+    Args:
+        backend: Store backend name
+        collection: Collection name
+        capacity: Entries (default: VECTOR_RETRIEVAL_CACHE_SIZE; the first
+            caller's capacity applies)
+    
+    Returns:
+        RetrievalCache, or None if the capacity is 0
+    """
+    capacity = settings.VECTOR_RETRIEVAL_CACHE_SIZE if capacity is None else capacity
+    if capacity <= 0:
+        return None
+    key = (backend, collection)
+    if key not in _caches:
+        _caches[key] = RetrievalCache(
+            capacity=capacity,
+            quantization_step=settings.VECTOR_RETRIEVAL_CACHE_STEP,
+            ttl_seconds=settings.VECTOR_RETRIEVAL_CACHE_TTL_SECONDS,
+            backend=backend,
+        )
+    return _caches[key]
+
+
+def invalidate_retrieval_caches() -> None:
+    """
+    Invalidate every retrieval cache.
+    
+    For changes outside the vector store that change what a filter matches,
+    such as documents attached to or detached from a session (``scope``).
+    """
+    for cache in _caches.values():
+        cache.invalidate()
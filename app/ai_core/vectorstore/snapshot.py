@@ -0,0 +1,284 @@
+"""Memory-mapped vector store snapshots.
+
+A snapshot root holds immutable snapshot directories and a ``CURRENT`` file
+naming the active one::
+
+    root/
+        CURRENT                  -> "snap-20261019T140312-4711-0001"
+        snap-20261019T140312-4711-0001/
+            meta.json            format version, dtype, shape, store metadata
+            vectors.npy          contiguous float32/float16 matrix, one row per id
+            ids.npy              fixed-width UTF-8 ids in row order
+            doc_offsets.npy      byte offsets into documents.jsonl (n + 1)
+            documents.jsonl      {"content", "metadata"} per row
+            <name>.npy           extra arrays (e.g. IVF centroids)
+
+Arrays are opened with ``mmap_mode``, so every worker process maps the same
+files and shares them through the OS page cache instead of holding a private
+copy, and opening is O(1) in the number of vectors. Documents are decoded
+one row at a time on access.
+
+Writers build a complete new directory, fsync it and then atomically replace
+``CURRENT``; readers that already opened the previous snapshot keep using it
+(its files stay valid while mapped) and pick up the new one by opening
+again, e.g. ``ANNVectorStore.refresh``.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import itertools
+import json
+import mmap
+import os
+import shutil
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 1
+CURRENT = "CURRENT"
+DTYPES = ("float32", "float16")
+
+_sequence = itertools.count(1)
+
+
+@dataclass
+class Snapshot:
+    """An opened snapshot (read-only views over memory-mapped files)."""
+    name: str
+    path: Path
+    meta: Dict[str, Any]
+    vectors: np.ndarray
+    ids: np.ndarray
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    _doc_offsets: Optional[np.ndarray] = None
+    _doc_map: Optional[mmap.mmap] = None
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def has_documents(self) -> bool:
+        return self._doc_offsets is not None
+    
+    def id_list(self) -> List[str]:
+        """Decode all ids (row order)."""
+        return [doc_id.decode("utf-8") for doc_id in self.ids.tolist()]
+    
+    def document(self, row: int) -> Dict[str, Any]:
+        """
+        Decode the document stored for a row.
+        
+        Args:
+            row: Row number
+        
+        Returns:
+            Dict with ``content`` and ``metadata``
+        """
+        if self._doc_map is None:
+            return {"content": "", "metadata": {}}
+        start, end = int(self._doc_offsets[row]), int(self._doc_offsets[row + 1])
+        return json.loads(self._doc_map[start:end])
+    
+    def is_current(self) -> bool:
+        """Whether this is still the snapshot ``CURRENT`` points at."""
+        return current_name(self.path.parent) == self.name
+    
+    def close(self) -> None:
+        """Release the document mapping (array maps close when garbage collected)."""
+        if self._doc_map is not None:
+            self._doc_map.close()
+            self._doc_map = None
+
+
+def current_name(root: str | Path) -> Optional[str]:
+    """Name of the active snapshot under ``root``, or None."""
+    try:
+        return (Path(root) / CURRENT).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(
+    root: str | Path,
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    documents: Optional[Sequence[Dict[str, Any]]] = None,
+    arrays: Optional[Dict[str, np.ndarray]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    dtype: str = "float32",
+    keep: int = 2,
+) -> str:
+    """
+    Write a snapshot and make it current.
+    
+    Args:
+        root: Snapshot root directory
+        ids: One id per vector row
+        vectors: Embedding matrix
+        documents: Optional ``{"content", "metadata"}`` per row
+        arrays: Extra arrays stored alongside (memory-mapped on open)
+        meta: Extra JSON-serializable metadata
+        dtype: ``float32`` or ``float16`` storage for ``vectors``
+        keep: Snapshots to retain, including the new one (older ones are deleted)
+    
+    Returns:
+        Name of the new snapshot
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported snapshot dtype: {dtype}. Available dtypes: {list(DTYPES)}")
+    if len(ids) != len(vectors):
+        raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+    
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"snap-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(_sequence):04d}"
+    staging = root / f".{name}.tmp"
+    staging.mkdir()
+    
+    try:
+        encoded = [doc_id.encode("utf-8") for doc_id in ids]
+        width = max((len(doc_id) for doc_id in encoded), default=1)
+        _save_array(staging / "vectors.npy", np.ascontiguousarray(vectors, dtype=dtype))
+        _save_array(staging / "ids.npy", np.array(encoded, dtype=f"S{max(width, 1)}"))
+        
+        if documents is not None:
+            offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+            with open(staging / "documents.jsonl", "wb") as f:
+                for row, document in enumerate(documents):
+                    line = json.dumps(document, default=str).encode("utf-8") + b"\n"
+                    f.write(line)
+                    offsets[row + 1] = offsets[row] + len(line)
+                f.flush()
+                os.fsync(f.fileno())
+            _save_array(staging / "doc_offsets.npy", offsets)
+        
+        for array_name, array in (arrays or {}).items():
+            _save_array(staging / f"{array_name}.npy", np.ascontiguousarray(array))
+        
+        _write_durable(staging / "meta.json", json.dumps({
+            "version": FORMAT_VERSION,
+            "dtype": dtype,
+            "count": len(ids),
+            "dimension": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "arrays": sorted(arrays or {}),
+            "created_at": time.time(),
+            **(meta or {}),
+        }).encode("utf-8"))
+        
+        os.rename(staging, root / name)
+        _write_durable(root / f"{CURRENT}.tmp", name.encode("utf-8"))
+        os.replace(root / f"{CURRENT}.tmp", root / CURRENT)
+        _fsync_dir(root)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    
+    prune_snapshots(root, keep)
+    return name
+
+
+def open_snapshot(root: str | Path, name: Optional[str] = None, mmap_mode: str = "r") -> Snapshot:
+    """
+    Open a snapshot without reading the vectors into memory.
+    
+    Args:
+        root: Snapshot root directory
+        name: Snapshot to open (default: the current one)
+        mmap_mode: ``r`` (read-only, shared) or ``c`` (copy-on-write: writes
+            stay private to the process, untouched pages stay shared)
+    
+    Returns:
+        Opened snapshot
+    
+    Raises:
+        FileNotFoundError: If there is no current snapshot
+        ValueError: If the format version is not supported
+    """
+    root = Path(root)
+    name = name or current_name(root)
+    if name is None:
+        raise FileNotFoundError(f"No snapshot in {root}")
+    
+    path = root / name
+    meta = json.loads((path / "meta.json").read_text())
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version: {meta.get('version')}")
+    
+    snapshot = Snapshot(
+        name=name,
+        path=path,
+        meta=meta,
+        vectors=np.load(path / "vectors.npy", mmap_mode=mmap_mode),
+        ids=np.load(path / "ids.npy", mmap_mode="r"),
+        arrays={
+            array_name: np.load(path / f"{array_name}.npy", mmap_mode="r")
+            for array_name in meta.get("arrays", [])
+        },
+    )
+    
+    documents_path = path / "documents.jsonl"
+    if documents_path.exists():
+        snapshot._doc_offsets = np.load(path / "doc_offsets.npy", mmap_mode="r")
+        if documents_path.stat().st_size:
+            with open(documents_path, "rb") as f:
+                snapshot._doc_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return snapshot
+
+
+def iter_snapshots(root: str | Path) -> Iterator[Path]:
+    """Snapshot directories under ``root``, oldest first."""
+    root = Path(root)
+    if not root.exists():
+        return iter(())
+    return iter(sorted(path for path in root.iterdir() if path.is_dir() and path.name.startswith("snap-")))
+
+
+def prune_snapshots(root: str | Path, keep: int = 2) -> int:
+    """
+    Delete all but the newest ``keep`` snapshots (never the current one).
+    
+    Processes that still map a deleted snapshot keep reading it; the space
+    is reclaimed when they close it.
+    
+    Args:
+        root: Snapshot root directory
+        keep: Snapshots to retain
+    
+    Returns:
+        Number of snapshots deleted
+    """
+    current = current_name(root)
+    snapshots = list(iter_snapshots(root))
+    removed = 0
+    for path in snapshots[:max(0, len(snapshots) - max(1, keep))]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def _save_array(path: Path, array: np.ndarray) -> None:
+    with open(path, "wb") as f:
+        np.save(f, array, allow_pickle=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_durable(path: Path, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, status, HTTPException
+from app.config.settings import settings
+from app.constants.messages import Messages
 from app.services.document import DocumentService
-from app.schemas.document import DocumentCreate, DocumentResponse
+from app.services.ingestion import get_ingestion_pipeline
+from app.schemas.document import DocumentCreate, DocumentResponse, DocumentUpdate, IngestionStatusResponse
 from app.database.session import get_db_session
 from app.exceptions.base import NotFoundException
 from app.exceptions.database import DatabaseException
@@ -16,11 +19,16 @@ router = APIRouter(prefix="/documents", tags=["documents"])
 @router.post("", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
 async def create_document(
     request: DocumentCreate,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db_session)
 ):
     try:
         service = DocumentService(session)
-        return await service.create_document(request)
+        document = await service.create_document(request)
+        if settings.INGESTION_ENABLED:
+            # Runs after the response is sent; chunking and embedding happen in the pipeline's workers
+            background_tasks.add_task(get_ingestion_pipeline().enqueue, document.id)
+        return document
     except DatabaseException as e:
         logger.error(f"Database error in create_document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -47,6 +55,38 @@ async def get_document(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.put("/{document_id}", response_model=DocumentResponse)
+async def update_document(
+    document_id: int,
+    request: DocumentUpdate,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_db_session)
+):
+    try:
+        service = DocumentService(session)
+        document = await service.update_document(document_id, request)
+        if settings.INGESTION_ENABLED and (request.content is not None or request.title is not None):
+            # Unchanged chunks keep their embeddings; see IngestionPipeline
+            background_tasks.add_task(get_ingestion_pipeline().enqueue, document.id)
+        return document
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DatabaseException as e:
+        logger.error(f"Database error in update_document: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in update_document: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{document_id}/ingestion", response_model=IngestionStatusResponse)
+async def get_document_ingestion(document_id: int):
+    ingestion = get_ingestion_pipeline().get_status(document_id)
+    if ingestion is None:
+        raise HTTPException(status_code=404, detail=Messages.INGESTION_NOT_FOUND)
+    return ingestion
+
+
 @router.get("/user/{user_id}", response_model=List[DocumentResponse])
 async def get_user_documents(
     user_id: int,
@@ -1,7 +1,7 @@
 from pydantic_settings import BaseSettings
 from enum import Enum
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 import platform
 
 
@@ -35,10 +35,97 @@ class Settings(BaseSettings):
     LLM_MAX_TOKENS: int = 2000
     LLM_FALLBACK_MODEL: str = "qwen/qwen3-next-80b-a3b-thinking"
     
+    LLM_CIRCUIT_BREAKER_ENABLED: bool = True
+    LLM_CIRCUIT_FAILURE_RATE_THRESHOLD: float = 0.5  # Error rate that opens the circuit
+    LLM_CIRCUIT_SLOW_CALL_RATE_THRESHOLD: float = 0.8  # Slow-call rate that opens the circuit
+    LLM_CIRCUIT_SLOW_CALL_SECONDS: float = 20.0  # Latency above which a call is slow
+    LLM_CIRCUIT_WINDOW_SIZE: int = 20  # Number of recent calls evaluated
+    LLM_CIRCUIT_MIN_CALLS: int = 5  # Minimum calls before rates are evaluated
+    LLM_CIRCUIT_OPEN_SECONDS: float = 30.0  # Time to fail fast before probing
+    LLM_CIRCUIT_HALF_OPEN_MAX_CALLS: int = 2  # Probe calls allowed while half-open
+    
+    LLM_BATCH_MAX_CONCURRENCY: int = 8  # Concurrent calls per abatch()
+    LLM_BATCH_USE_NATIVE: bool = True  # Use the provider's own batch call when it has one
+    
+    FAKE_LLM_SCRIPT_PATH: Optional[str] = None  # JSON rules file for LLM_PROVIDER=fake
+    FAKE_LLM_RESPONSE_TEMPLATE: str = ""  # Fallback template ({query}, {model}); empty uses built-in
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = "lognormal"  # constant | uniform | normal | lognormal
+    FAKE_LLM_TTFT_MS: float = 300.0  # Mean time to first token
+    FAKE_LLM_TTFT_STDDEV_MS: float = 100.0  # Spread of time to first token
+    FAKE_LLM_TOKENS_PER_SECOND: float = 60.0  # Generation speed after first token
+    FAKE_LLM_ERROR_RATE_429: float = 0.0  # Fraction of calls failing with 429
+    FAKE_LLM_ERROR_RATE_5XX: float = 0.0  # Fraction of calls failing with 503
+    FAKE_LLM_SEED: int = 42  # Seed for latency and error draws
+    
+    USAGE_METERING_ENABLED: bool = True
+    USAGE_METERING_PERSIST: bool = True  # Write usage rows to the llm_usage table
+    USAGE_METERING_BATCH_SIZE: int = 100  # Rows per batched insert
+    USAGE_METERING_FLUSH_INTERVAL_SECONDS: float = 2.0  # Max time a row waits in memory
+    USAGE_METERING_MAX_BUFFER_SIZE: int = 10000  # Rows buffered before new ones are dropped
+    
     AGENT_CONFIDENCE_THRESHOLD: float = 0.6  # Minimum confidence for auto-routing
     AGENT_MAX_HISTORY_MESSAGES: int = 10  # Maximum history messages to keep
     AGENT_MAX_CONTEXT_TOKENS: int = 4000  # Maximum context tokens for LLM
     
+    RAG_REASONING_MODE: str = "fused"  # fused (one JSON call) | separate (think, then plan)
+    RAG_TOP_K: int = 50  # Candidates retrieved per search, reranked down to RAG_RERANK_TOP_N
+    RAG_RERANK_TOP_N: int = 10  # Documents kept by rerank; the context packer fills RAG_CONTEXT_TOKENS from them
+    RAG_CONTEXT_TOKENS: int = 3000  # Token budget of retrieved context in the generation prompt (at most AGENT_MAX_CONTEXT_TOKENS)
+    RAG_MMR_LAMBDA: float = 0.7  # Rerank relevance vs diversity (1 = relevance only)
+    RAG_DUPLICATE_THRESHOLD: float = 0.95  # Cosine similarity above which chunks count as near-duplicates
+    RAG_RETRIEVAL_MODE: str = "hybrid"  # hybrid (vector + keyword, fused with RRF) | dense (vector only)
+    RAG_HYBRID_VECTOR_WEIGHT: float = 1.0  # RRF weight of the vector ranking
+    RAG_HYBRID_LEXICAL_WEIGHT: float = 1.0  # RRF weight of the keyword ranking
+    RAG_HYBRID_MIN_SCORE: float = 0.3  # Fused score (1 = ranked first by every retriever) kept by rerank
+    RAG_RETRIEVAL_SCOPE: str = "user"  # user (session's and user's own documents) | session (session's only) | all (whole corpus)
+    RAG_QUERY_REWRITES: int = 2  # Cheap rewrites searched alongside the raw query (0 = raw query only)
+    RAG_MAX_SUB_QUERIES: int = 3  # Plan sub-queries searched by the refine step
+    
+    VECTOR_STORE_BACKEND: str = "pgvector"  # pgvector | ann | memory
+    PGVECTOR_DIMENSION: int = 1536  # Embedding column width (fixed by the migration)
+    PGVECTOR_DISTANCE_METRIC: str = "cosine"  # cosine | l2 | inner_product
+    PGVECTOR_INDEX_TYPE: str = "hnsw"  # hnsw | ivfflat
+    PGVECTOR_HNSW_M: int = 16  # Graph degree (build time)
+    PGVECTOR_HNSW_EF_CONSTRUCTION: int = 64  # Candidate list size while building
+    PGVECTOR_HNSW_EF_SEARCH: int = 40  # Candidate list size per query (recall vs latency)
+    PGVECTOR_IVFFLAT_LISTS: int = 100  # Clusters; about rows / 1000 up to 1M rows
+    PGVECTOR_IVFFLAT_PROBES: int = 10  # Clusters scanned per query (recall vs latency)
+    PGVECTOR_INSERT_BATCH_SIZE: int = 500  # Rows per bulk insert statement
+    VECTOR_QUANTIZATION: str = "float32"  # In-memory vector storage: float32 | float16 | int8
+    VECTOR_RESCORE_OVERSAMPLE: int = 4  # Quantized search rescores k * this candidates at full precision (0 = off)
+    VECTOR_FILTER_PREFILTER_BELOW: float = 0.1  # Filters matching less than this fraction score only matching vectors
+    VECTOR_HYBRID_RRF_K: int = 60  # Reciprocal rank fusion smoothing constant
+    VECTOR_HYBRID_OVERSAMPLE: int = 4  # Hybrid search fetches k * this candidates from each retriever
+    VECTOR_RETRIEVAL_CACHE_SIZE: int = 1024  # Search results kept per store in an in-process LRU (0 = off)
+    VECTOR_RETRIEVAL_CACHE_STEP: float = 0.01  # Query embedding grid; near-identical queries within it share results
+    VECTOR_RETRIEVAL_CACHE_TTL_SECONDS: float = 300.0  # Max result age; bounds staleness after other workers' writes (0 = none)
+    EMBEDDING_BACKEND: str = "hashing"  # hashing (local, deterministic, offline) | mock
+    EMBEDDING_IDF_PATH: str = ""  # IDF weights (.npy) for the hashing backend, from HashingEmbeddingFunction.save_idf
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_BACKEND: str = "memory"  # memory | redis (REDIS_URL) | disk (EMBEDDING_CACHE_PATH)
+    EMBEDDING_CACHE_SIZE: int = 10000  # Vectors kept in the in-process LRU
+    EMBEDDING_CACHE_DTYPE: str = "float32"  # float32 | float16 (half the bytes per cached vector)
+    EMBEDDING_CACHE_TTL_SECONDS: int = 0  # Redis expiry per entry (0 = never)
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.sqlite3"  # SQLite file for the disk backend
+    EMBEDDING_BATCH_ENABLED: bool = True  # Coalesce concurrent embedding calls into batched model calls
+    EMBEDDING_BATCH_MAX_SIZE: int = 64  # Texts per batched model call
+    EMBEDDING_BATCH_MAX_WAIT_SECONDS: float = 0.005  # Max time a call waits for others to join its batch
+    INGESTION_ENABLED: bool = True  # Chunk, embed and index documents when they are created
+    INGESTION_WORKERS: int = 2  # Documents ingested concurrently per process
+    INGESTION_BATCH_SIZE: int = 64  # Chunks per embedding call and vector store insert
+    INGESTION_CHUNK_TOKENS: int = 400  # Token budget per chunk
+    INGESTION_CHUNK_OVERLAP_TOKENS: int = 50  # Tokens repeated between consecutive chunks
+    INGESTION_TOKENIZER: str = "cl100k_base"  # tiktoken encoding for token counts (empty = estimate)
+    INGESTION_MAX_QUEUE_SIZE: int = 1000  # Documents waiting before new uploads are not ingested
+    INGESTION_COMPACTION_INTERVAL_SECONDS: float = 300.0  # How often the vector index is measured for dead space (0 = never)
+    INGESTION_COMPACTION_TOMBSTONE_RATIO: float = 0.2  # Dead fraction of the index (tombstones, pgvector bloat) that triggers a rebuild
+    INGESTION_STATUS_RETENTION: int = 10000  # Finished ingestion statuses kept for GET /documents/{id}/ingestion
+    ANN_NLIST: int = 1024  # IVF cells; about sqrt(rows) to 4 * sqrt(rows)
+    ANN_NPROBE: int = 16  # Cells scanned per query (recall vs latency)
+    ANN_INDEX_PATH: str = ""  # Snapshot root the ann backend loads from and saves to (empty = not persisted)
+    ANN_SNAPSHOT_DTYPE: str = "float32"  # float32 | float16 (half the file size and page cache)
+    ANN_SNAPSHOT_REFRESH_SECONDS: float = 30.0  # How often workers check for a newer snapshot (0 = never)
+    
     @property
     def MAX_LLM_CALL_RETRIES(self) -> int:
         """Environment-specific retry count."""
@@ -23,4 +23,5 @@ class ErrorCode(str, Enum):
     DB_CONNECTION_ERROR = "DB_CONNECTION_ERROR"
     DB_TRANSACTION_ERROR = "DB_TRANSACTION_ERROR"
     LLM_ERROR = "LLM_ERROR"
+    LLM_CIRCUIT_OPEN = "LLM_CIRCUIT_OPEN"
     GRAPH_ERROR = "GRAPH_ERROR"
@@ -8,6 +8,7 @@ class Messages:
     SESSION_NOT_FOUND = "Session not found"
     MESSAGE_NOT_FOUND = "Message not found"
     DOCUMENT_NOT_FOUND = "Document not found"
+    INGESTION_NOT_FOUND = "No ingestion recorded for this document"
     INVALID_INPUT = "Invalid input provided"
     DATABASE_ERROR = "Database operation failed"
     LLM_ERROR = "LLM service unavailable"
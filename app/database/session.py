@@ -1,7 +1,15 @@
+from typing import Callable
+import logging
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.database.engine import engine
 
+logger = logging.getLogger(__name__)
+
+_COMMIT_CALLBACKS = "commit_callbacks"
+
 async_session_factory = sessionmaker(
     engine,
     class_=AsyncSession,
@@ -24,3 +32,32 @@ async def get_async_session():
 
 
 get_db_session = get_async_session
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Run ``callback`` once the session's transaction commits.
+    
+    Nothing runs if it rolls back. The callback runs inside the commit, on
+    the event loop; schedule async work from it with ``asyncio.create_task``.
+    Failures are logged, since the transaction is already committed.
+    
+    Args:
+        session: Session whose transaction the callback waits for
+        callback: Function to call after the commit
+    """
+    session.info.setdefault(_COMMIT_CALLBACKS, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_COMMIT_CALLBACKS, []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Post-commit callback {callback!r} failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_commit_callbacks(session: Session) -> None:
+    session.info.pop(_COMMIT_CALLBACKS, None)
@@ -1,3 +1,4 @@
+from app.constants.enums import ErrorCode
 from app.exceptions.base import BaseException
 
 
@@ -14,6 +15,12 @@ class LLMException(ServiceException):
         )
 
 
+class CircuitOpenException(LLMException):
+    def __init__(self, message: str = "LLM circuit breaker is open"):
+        super().__init__(message=message)
+        self.code = ErrorCode.LLM_CIRCUIT_OPEN
+
+
 class GraphException(ServiceException):
     def __init__(self, message: str = "Graph execution failed"):
         super().__init__(
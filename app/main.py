@@ -21,6 +21,8 @@ from app.database.connection import check_connection
 from app.constants.messages import Messages
 from app.core.logger import logger
 from app.database.engine import engine
+from app.ai_core.llm.metering import get_usage_meter
+from app.services.ingestion import get_ingestion_pipeline
 
 if settings.LANGFUSE_ENABLED:
     os.environ["LANGFUSE_PUBLIC_KEY"] = settings.LANGFUSE_PUBLIC_KEY
@@ -47,6 +49,16 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("application_shutdown")
+    try:
+        await get_ingestion_pipeline().stop()
+    except Exception as e:
+        logger.warning("ingestion_pipeline_stop_failed", error=str(e))
+    
+    try:
+        await get_usage_meter().stop()
+    except Exception as e:
+        logger.warning("usage_meter_flush_failed", error=str(e))
+    
     try:
         await engine.dispose()
     except Exception as e:
@@ -42,6 +42,17 @@ llm_token_count = Counter(
     ['model', 'type']
 )
 
+llm_agent_token_count = Counter(
+    'llm_agent_tokens_total',
+    'Total LLM tokens used per agent and graph node',
+    ['model', 'agent_type', 'node', 'type']
+)
+
+llm_usage_records_dropped_total = Counter(
+    'llm_usage_records_dropped_total',
+    'LLM usage records dropped because the buffer was full or the write failed'
+)
+
 llm_inference_duration_seconds = Histogram(
     'llm_inference_duration_seconds',
     'Time spent processing LLM inference',
@@ -56,6 +67,84 @@ llm_stream_duration_seconds = Histogram(
     buckets=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0]
 )
 
+llm_batch_items_total = Counter(
+    'llm_batch_items_total',
+    'Total items processed by batch LLM calls',
+    ['model', 'status']
+)
+
+llm_batch_size = Histogram(
+    'llm_batch_size',
+    'Number of items per batch LLM call',
+    ['model'],
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500]
+)
+
+llm_circuit_breaker_state = Gauge(
+    'llm_circuit_breaker_state',
+    'LLM circuit breaker state (0=closed, 1=half_open, 2=open)',
+    ['endpoint', 'model']
+)
+
+llm_circuit_breaker_transitions_total = Counter(
+    'llm_circuit_breaker_transitions_total',
+    'Total LLM circuit breaker state transitions',
+    ['endpoint', 'model', 'state']
+)
+
+llm_circuit_breaker_rejections_total = Counter(
+    'llm_circuit_breaker_rejections_total',
+    'Total LLM calls rejected by an open circuit breaker',
+    ['endpoint', 'model']
+)
+
+embedding_cache_lookups_total = Counter(
+    'embedding_cache_lookups_total',
+    'Embedding cache lookups by result (memory_hit, persistent_hit, miss)',
+    ['model', 'result']
+)
+
+retrieval_cache_lookups_total = Counter(
+    'retrieval_cache_lookups_total',
+    'Vector store retrieval cache lookups by result (hit, miss)',
+    ['backend', 'result']
+)
+
+embedding_batch_size = Histogram(
+    'embedding_batch_size',
+    'Number of texts per batched embedding model call',
+    ['model'],
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256]
+)
+
+embedding_batch_requests = Histogram(
+    'embedding_batch_requests',
+    'Number of embedding calls coalesced into one batch',
+    ['model'],
+    buckets=[1, 2, 4, 8, 16, 32, 64]
+)
+
+document_ingestions_total = Counter(
+    'document_ingestions_total',
+    'Documents processed by the ingestion pipeline',
+    ['status']
+)
+
+document_ingestion_chunks_total = Counter(
+    'document_ingestion_chunks_total',
+    'Document chunks embedded and indexed by the ingestion pipeline'
+)
+
+document_ingestion_chunks_unchanged_total = Counter(
+    'document_ingestion_chunks_unchanged_total',
+    'Document chunks kept on re-ingestion without re-embedding'
+)
+
+vector_index_rebuilds_total = Counter(
+    'vector_index_rebuilds_total',
+    'Vector index rebuilds triggered by deleted entries'
+)
+
 agent_invocations_total = Counter(
     'agent_invocations_total',
     'Total number of agent invocations',
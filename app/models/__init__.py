@@ -13,6 +13,8 @@ from .session import Session
 from .message import Message
 from .document import Document
 from .session_document import SessionDocument
+from .llm_usage import LLMUsage
+from .document_chunk import DocumentChunk
 
 __all__ = [
     "Base",
@@ -22,4 +24,6 @@ __all__ = [
     "Message",
     "Document",
     "SessionDocument",
+    "LLMUsage",
+    "DocumentChunk",
 ]
\ No newline at end of file
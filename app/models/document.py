@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, Text
+from sqlalchemy import Column, Integer, ForeignKey, Index, String, Text
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -18,4 +18,8 @@ class Document(BaseModel):
         secondary="session_documents",
         back_populates="documents"
     )
+    
+    __table_args__ = (
+        Index('ix_documents_user_id', 'user_id'),
+    )
 
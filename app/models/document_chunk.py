@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Computed, Integer, ForeignKey, String, Text, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.types import UserDefinedType
+from app.config.settings import settings
+from app.models.base import BaseModel
+
+
+class Vector(UserDefinedType):
+    """pgvector ``vector(n)`` column type.
+    
+    Values are bound as text literals (``'[0.1,0.2,...]'``) so the pgvector
+    Python package is not required.
+    """
+    cache_ok = True
+    
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+    
+    def get_col_spec(self, **kw) -> str:
+        return f"vector({self.dimension})"
+
+
+class DocumentChunk(BaseModel):
+    """Embedded chunk of a document, searched by the pgvector store.
+    
+    ``chunk_id`` is the vector store document id and is unique per collection.
+    The ANN index on ``embedding`` is created by the migration and can be
+    rebuilt with ``PgVectorStore.create_index``. ``content_tsv`` is
+    maintained by Postgres for keyword search.
+    """
+    __tablename__ = "document_chunks"
+    
+    collection = Column(String(100), nullable=False, default="default")
+    chunk_id = Column(String(255), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=True)
+    content = Column(Text, nullable=False)
+    chunk_metadata = Column("metadata", JSONB, nullable=False, default=dict)
+    embedding = Column(Vector(settings.PGVECTOR_DIMENSION), nullable=False)
+    content_tsv = Column(TSVECTOR, Computed("to_tsvector('simple', content)", persisted=True))
+    
+    __table_args__ = (
+        UniqueConstraint('collection', 'chunk_id', name='uq_document_chunks_collection_chunk'),
+        Index('ix_document_chunks_document_id', 'document_id'),
+        Index('ix_document_chunks_metadata', 'metadata', postgresql_using='gin'),
+        Index('ix_document_chunks_content_tsv', 'content_tsv', postgresql_using='gin'),
+    )
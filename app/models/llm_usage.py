@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, ForeignKey, String, Float, Index
+from app.models.base import BaseModel
+
+
+class LLMUsage(BaseModel):
+    """Token usage of a single LLM call, attributed to user, session, agent and node.
+    
+    Rows are written in batches by the usage meter, never on the request path.
+    """
+    __tablename__ = "llm_usage"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="SET NULL"), nullable=True)
+    agent_type = Column(String(50), nullable=True)
+    node = Column(String(100), nullable=True)
+    model = Column(String(255), nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_llm_usage_user_created', 'user_id', 'created_at'),
+        Index('ix_llm_usage_session_id', 'session_id'),
+        Index('ix_llm_usage_agent_created', 'agent_type', 'created_at'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from app.models.base import BaseModel
 
 
@@ -8,3 +8,7 @@ class SessionDocument(BaseModel):
     
     session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
     document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    
+    __table_args__ = (
+        Index('ix_session_documents_session_document', 'session_id', 'document_id'),
+    )
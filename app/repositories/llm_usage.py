@@ -0,0 +1,66 @@
+from typing import Optional, List
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.base import BaseRepository
+from app.models.llm_usage import LLMUsage
+
+
+class LLMUsageRepository(BaseRepository[LLMUsage]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session)
+    
+    async def get_by_id(self, id: int) -> Optional[LLMUsage]:
+        result = await self.session.execute(
+            select(LLMUsage).where(LLMUsage.id == id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def bulk_create(self, entities: List[LLMUsage]) -> int:
+        """Insert many usage rows in one flush."""
+        self.session.add_all(entities)
+        await self.session.flush()
+        return len(entities)
+    
+    async def get_totals_by_agent(self, user_id: Optional[int] = None) -> List[dict]:
+        """Aggregate token totals per agent and node, optionally for one user."""
+        query = select(
+            LLMUsage.agent_type,
+            LLMUsage.node,
+            LLMUsage.model,
+            func.count(LLMUsage.id).label("calls"),
+            func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+            func.sum(LLMUsage.cached_tokens).label("cached_tokens"),
+            func.avg(LLMUsage.latency_ms).label("avg_latency_ms"),
+        ).group_by(LLMUsage.agent_type, LLMUsage.node, LLMUsage.model)
+        
+        if user_id is not None:
+            query = query.where(LLMUsage.user_id == user_id)
+        
+        result = await self.session.execute(query)
+        return [dict(row._mapping) for row in result.all()]
+    
+    async def create(self, entity: LLMUsage) -> LLMUsage:
+        self.session.add(entity)
+        await self.session.flush()
+        await self.session.refresh(entity)
+        return entity
+    
+    async def update(self, entity: LLMUsage) -> LLMUsage:
+        await self.session.flush()
+        await self.session.refresh(entity)
+        return entity
+    
+    async def delete(self, id: int) -> bool:
+        usage = await self.get_by_id(id)
+        if usage:
+            await self.session.delete(usage)
+            await self.session.flush()
+            return True
+        return False
+    
+    async def find_all(self, skip: int = 0, limit: int = 100) -> List[LLMUsage]:
+        result = await self.session.execute(
+            select(LLMUsage).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
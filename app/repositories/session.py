@@ -10,6 +10,11 @@ class SessionRepository(BaseRepository[Session]):
     def __init__(self, session: AsyncSession):
         super().__init__(session)
     
+    async def get_owner_id(self, id: int) -> Optional[int]:
+        """Owning user of a session, or None if the session does not exist."""
+        result = await self.session.execute(select(Session.user_id).where(Session.id == id))
+        return result.scalar_one_or_none()
+    
     async def get_by_id(self, id: int) -> Optional[Session]:
         result = await self.session.execute(
             select(Session)
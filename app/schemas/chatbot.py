@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Literal
+from typing import Any, List, Dict, Optional, Literal
 from app.constants.enums import MessageRole
 from app.types.common import MetadataDict
 from app.types.guardrail import GuardrailValidationResult
@@ -33,6 +33,7 @@ class ChatResponse(BaseModel):
     session_name: Optional[str] = None  # Session name for newly created sessions
     is_new_session: Optional[bool] = False  # Indicates if this is a newly created session
     error: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None  # Agent-reported details, e.g. RAG context_tokens
 
 
 class ChatCompletionRequest(BaseModel):
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
+from datetime import datetime
 from app.schemas.base import BaseSchema, TimestampSchema
 
 
@@ -14,6 +15,7 @@ class DocumentCreate(BaseSchema):
     file_path: Optional[str] = None
     file_type: Optional[str] = None
     user_id: int
+    session_id: Optional[int] = None
 
 
 class DocumentUpdate(BaseSchema):
@@ -29,3 +31,16 @@ class DocumentResponse(TimestampSchema):
     file_path: Optional[str] = None
     file_type: Optional[str] = None
     user_id: int
+
+
+class IngestionStatusResponse(BaseSchema):
+    document_id: int
+    status: str
+    chunks_indexed: int = 0
+    chunks_unchanged: int = 0
+    chunks_removed: int = 0
+    progress: float = 0.0
+    error: Optional[str] = None
+    queued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
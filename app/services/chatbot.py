@@ -8,7 +8,9 @@ import logging
 from app.ai_core.agents import AgentRouter
 from app.ai_core.agents.agent_factory import AgentFactory, AgentType
 from app.ai_core.llm import LLMFactory, LLMProviderType
+from app.ai_core.llm.metering import usage_context, extract_token_usage
 from app.config.settings import settings
+from app.database.session import async_session_factory
 from langchain_core.messages import HumanMessage
 from app.schemas.chatbot import ChatRequest, ChatResponse, ChatCompletionRequest, ChatCompletionResponse, StreamChunk
 from app.schemas.message import MessageCreate
@@ -97,14 +99,15 @@ class ChatbotService:
             
             history = await self._build_history(session_obj.id)
             
-            result = await self.router.route(
-                user_input=request.query,
-                session_id=str(session_obj.id),
-                user_id=user_id,
-                agent_type=None,
-                config={"history": history} if history else None,
-                confidence_threshold=confidence_threshold
-            )
+            with usage_context(user_id=user_id, session_id=session_obj.id):
+                result = await self.router.route(
+                    user_input=request.query,
+                    session_id=str(session_obj.id),
+                    user_id=user_id,
+                    agent_type=None,
+                    config={"history": history} if history else None,
+                    confidence_threshold=confidence_threshold
+                )
             
             routing = result.get("_routing", {})
             agent_type = routing.get("agent_type")
@@ -125,7 +128,8 @@ class ChatbotService:
                 session_id=str(session_obj.id),
                 session_name=session_obj.name if is_new_session else None,
                 is_new_session=is_new_session,
-                error=result.get("error")
+                error=result.get("error"),
+                metadata=result.get("metadata") or None
             )
             
         except NotFoundException:
@@ -189,7 +193,8 @@ class ChatbotService:
             confidence = 1.0
             agent_type_enum = None
             
-            detected_type, confidence = await self.router.detect_intent(request.query)
+            with usage_context(user_id=user_id, session_id=session_obj.id):
+                detected_type, confidence = await self.router.detect_intent(request.query)
             
             if confidence < confidence_threshold:
                 logger.warning(
@@ -265,8 +270,10 @@ class ChatbotService:
                 enable_guardrail=settings.ENABLE_GUARDRAIL
             )
             
+            session_id, user_id = await self._usage_owner(request.session_id)
             try:
-                response = await llm.ainvoke([HumanMessage(content=request.query)])
+                with usage_context(user_id=user_id, session_id=session_id, agent_type="completion"):
+                    response = await llm.ainvoke([HumanMessage(content=request.query)])
             except ValueError as ve:
                 return ChatCompletionResponse(
                     content=str(ve),
@@ -274,13 +281,15 @@ class ChatbotService:
                     guardrail_result={"valid": False, "reason": str(ve), "blocked": True}
                 )
             
+            token_usage = extract_token_usage(response)
+            
             return ChatCompletionResponse(
                 content=response.content,
                 model=settings.LLM_MODEL,
                 usage={
-                    "prompt_tokens": response.response_metadata.get("token_usage", {}).get("prompt_tokens", 0),
-                    "completion_tokens": response.response_metadata.get("token_usage", {}).get("completion_tokens", 0),
-                    "total_tokens": response.response_metadata.get("token_usage", {}).get("total_tokens", 0)
+                    "prompt_tokens": token_usage["prompt_tokens"],
+                    "completion_tokens": token_usage["completion_tokens"],
+                    "total_tokens": token_usage["total_tokens"]
                 },
                 guardrail_result={"valid": True, "reason": None, "blocked": False}
             )
@@ -288,6 +297,35 @@ class ChatbotService:
             logger.error(f"Chat completion error: {str(e)}")
             raise LLMException(f"Chat completion failed: {str(e)}")
     
+    async def _usage_owner(self, session_id: Optional[int | str]) -> tuple[Optional[int], Optional[int]]:
+        """
+        Resolve a client-supplied session id for usage attribution.
+        
+        Usage rows reference sessions and users, so an id that does not exist
+        would fail the metering batch it lands in.
+        
+        Args:
+            session_id: Session id from the request
+        
+        Returns:
+            (session_id, owner user_id) of an existing session, else (None, None)
+        """
+        try:
+            session_id = int(session_id)
+        except (TypeError, ValueError):
+            return None, None
+        
+        try:
+            if self.session is not None:
+                user_id = await self.session_repo.get_owner_id(session_id)
+            else:
+                async with async_session_factory() as session:
+                    user_id = await SessionRepository(session).get_owner_id(session_id)
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not resolve session {session_id} for usage attribution: {e}")
+            return None, None
+        return (session_id, user_id) if user_id is not None else (None, None)
+    
     async def _save_user_message(self, session_id: int, content: str) -> Message:
         """Save user message to DB."""
         try:
@@ -1,8 +1,12 @@
 """Document service for managing user documents."""
 
 from app.repositories.document import DocumentRepository
-from app.schemas.document import DocumentCreate, DocumentResponse
+from app.schemas.document import DocumentCreate, DocumentResponse, DocumentUpdate
 from app.models.document import Document
+from app.models.session_document import SessionDocument
+from app.services.ingestion import get_ingestion_pipeline
+from app.ai_core.vectorstore.retrieval_cache import invalidate_retrieval_caches
+from app.database.session import on_commit
 from app.exceptions.base import NotFoundException
 from app.exceptions.database import DatabaseException
 from app.constants.messages import Messages
@@ -32,6 +36,12 @@ class DocumentService:
             )
             
             created = await self.repository.create(document)
+            if document_data.session_id is not None:
+                self.repository.session.add(
+                    SessionDocument(session_id=document_data.session_id, document_id=created.id)
+                )
+                await self.repository.session.flush()
+                on_commit(self.repository.session, invalidate_retrieval_caches)
             return DocumentResponse.model_validate(created)
         except SQLAlchemyError as e:
             logger.error(f"Database error creating document: {e}")
@@ -68,10 +78,38 @@ class DocumentService:
             logger.error(f"Unexpected error getting documents for user {user_id}: {e}")
             raise
     
+    async def update_document(self, document_id: int, document_data: DocumentUpdate) -> DocumentResponse:
+        """Update a document; re-ingesting it re-embeds only the chunks whose text changed."""
+        try:
+            document = await self.repository.get_by_id(document_id)
+            if not document:
+                raise NotFoundException(Messages.DOCUMENT_NOT_FOUND, "Document")
+            
+            for field, value in document_data.model_dump(exclude_unset=True).items():
+                if value is not None:
+                    setattr(document, field, value)
+            
+            updated = await self.repository.update(document)
+            return DocumentResponse.model_validate(updated)
+        except NotFoundException:
+            raise
+        except SQLAlchemyError as e:
+            logger.error(f"Database error updating document {document_id}: {e}")
+            raise DatabaseException(f"Failed to update document: {str(e)}")
+        except Exception as e:
+            logger.error(f"Unexpected error updating document {document_id}: {e}")
+            raise
+    
     async def delete_document(self, document_id: int) -> bool:
-        """Delete a document."""
+        """Delete a document and every chunk of it in the vector store."""
         try:
-            return await self.repository.delete(document_id)
+            deleted = await self.repository.delete(document_id)
+            if deleted:
+                # pgvector chunks cascade with the row; removing them from the pipeline's own
+                # connection while this transaction holds their locks would deadlock
+                pipeline = get_ingestion_pipeline()
+                on_commit(self.repository.session, lambda: pipeline.schedule_remove(document_id))
+            return deleted
         except SQLAlchemyError as e:
             logger.error(f"Database error deleting document {document_id}: {e}")
             raise DatabaseException(f"Failed to delete document: {str(e)}")
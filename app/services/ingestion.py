@@ -0,0 +1,508 @@
+"""Background ingestion of uploaded documents into the vector store.
+
+Creating or updating a document enqueues it; worker tasks on the event loop
+then stream its text through chunking, batched embedding and bulk insertion
+into the vector store, so the request returns immediately. Progress is kept
+per document and served by ``GET /documents/{id}/ingestion``.
+"""
+
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import logging
+
+from sqlalchemy import select
+
+from app.ai_core.vectorstore.base import BaseVectorStore, Document as VectorDocument
+from app.ai_core.vectorstore.chunking import chunk_text, get_token_counter
+from app.ai_core.vectorstore.factory import create_vector_store
+from app.config.settings import settings
+from app.middleware.metrics import (
+    document_ingestion_chunks_total,
+    document_ingestion_chunks_unchanged_total,
+    document_ingestions_total,
+    vector_index_rebuilds_total,
+)
+from app.models.document import Document
+from app.models.session_document import SessionDocument
+from app.types import IngestionStatus
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+FINISHED_STATUSES = (STATUS_COMPLETED, STATUS_FAILED)
+
+# The upload's transaction may commit just after the job starts
+LOAD_ATTEMPTS = 5
+LOAD_RETRY_SECONDS = 0.2
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(document_id: int, digest: str, occurrence: int = 0) -> str:
+    """
+    Vector store id of a document chunk.
+    
+    Ids are derived from the chunk's content rather than its position, so a
+    chunk keeps its id (and embedding) when an edit elsewhere moves it.
+    
+    Args:
+        document_id: Source document
+        digest: ``content_hash`` of the chunk
+        occurrence: Index among chunks of the document with the same text
+    
+    Returns:
+        ``doc-<document_id>-<16 hex digits>``, suffixed for repeated text
+    """
+    base = f"doc-{document_id}-{digest[:16]}"
+    return f"{base}-{occurrence}" if occurrence else base
+
+
+class IngestionPipeline:
+    """
+    Chunks, embeds and indexes documents in background workers.
+    
+    ``enqueue`` is synchronous and never blocks. ``workers`` tasks take
+    documents off a bounded queue; each streams the text through
+    ``chunk_text`` and hands ``batch_size`` chunks at a time to the vector
+    store, which embeds them in one call and bulk-inserts them.
+    
+    Re-ingesting an edited document diffs its chunks against the store by
+    content hash: only chunks with new text are embedded, unchanged ones
+    that moved get their metadata (offsets, title, sessions) rewritten in
+    place, and chunks no longer present are deleted. Ingestion and removal
+    of the same document are serialized, so a delete racing an ingest
+    cannot leave chunks behind.
+    
+    Deletes leave tombstones or unused space in some indexes; while workers
+    run, the index is measured every ``compaction_interval`` seconds and
+    rebuilt once ``compaction_ratio`` of it is dead space. Jobs live in process
+    memory: ones still queued at shutdown are lost and can be re-enqueued.
+    Only the latest ``status_retention`` finished statuses are kept, and a
+    document's lock is dropped once nothing holds or awaits it.
+    """
+    
+    def __init__(
+        self,
+        vector_store: Optional[BaseVectorStore] = None,
+        workers: int = 2,
+        batch_size: int = 64,
+        chunk_tokens: int = 400,
+        overlap_tokens: int = 50,
+        tokenizer: str = "cl100k_base",
+        max_queue_size: int = 1000,
+        compaction_interval: float = 300.0,
+        compaction_ratio: float = 0.2,
+        status_retention: int = 10000,
+    ):
+        """
+        Initialize ingestion pipeline.
+        
+        Args:
+            vector_store: Target store (default: ``create_vector_store()`` on first use)
+            workers: Documents ingested concurrently
+            batch_size: Chunks per embedding call and insert
+            chunk_tokens: Token budget per chunk
+            overlap_tokens: Tokens shared by consecutive chunks
+            tokenizer: tiktoken encoding for token counts ("" to estimate)
+            max_queue_size: Documents waiting before new ones are rejected
+            compaction_interval: Seconds between index measurements (0 = never)
+            compaction_ratio: Dead fraction of the index that triggers a rebuild
+            status_retention: Finished statuses kept (oldest are dropped first)
+        """
+        self._vector_store = vector_store
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer
+        self.max_queue_size = max_queue_size
+        self.compaction_interval = compaction_interval
+        self.compaction_ratio = compaction_ratio
+        self.status_retention = max(0, status_retention)
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._removals: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._status: Dict[int, IngestionStatus] = {}
+        self._finished: "OrderedDict[int, None]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._lock_users: Counter = Counter()
+    
+    @property
+    def vector_store(self) -> BaseVectorStore:
+        if self._vector_store is None:
+            self._vector_store = create_vector_store()
+        return self._vector_store
+    
+    def enqueue(self, document_id: int) -> IngestionStatus:
+        """
+        Schedule a document for ingestion.
+        
+        Args:
+            document_id: Document to ingest
+        
+        Returns:
+            Current status (unchanged if the document is already queued)
+        """
+        status = self._status.get(document_id)
+        if status and status["status"] == STATUS_QUEUED:
+            return dict(status)
+        
+        status = self._new_status(document_id)
+        self._ensure_started()
+        if self._queue is None:
+            status.update(status=STATUS_FAILED, error="No running event loop", finished_at=_now())
+            self._retire(document_id)
+        else:
+            try:
+                self._queue.put_nowait(document_id)
+            except asyncio.QueueFull:
+                status.update(status=STATUS_FAILED, error="Ingestion queue is full", finished_at=_now())
+                document_ingestions_total.labels(status=STATUS_FAILED).inc()
+                self._retire(document_id)
+                logger.error(f"Ingestion queue full, document {document_id} not ingested")
+        
+        return dict(status)
+    
+    def get_status(self, document_id: int) -> Optional[IngestionStatus]:
+        """
+        Ingestion progress of a document.
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            Status, or None if the document was never enqueued by this process
+        """
+        status = self._status.get(document_id)
+        return dict(status) if status else None
+    
+    async def ingest(self, document_id: int) -> IngestionStatus:
+        """
+        Ingest a document now, in the calling task.
+        
+        Args:
+            document_id: Document to ingest
+        
+        Returns:
+            Final status
+        """
+        status = self._status.get(document_id) or self._new_status(document_id)
+        status.update(
+            status=STATUS_RUNNING,
+            started_at=_now(),
+            chunks_indexed=0,
+            chunks_unchanged=0,
+            chunks_removed=0,
+            progress=0.0,
+            error=None,
+        )
+        
+        async with self._locked(document_id):
+            await self._ingest(document_id, status)
+        self._retire(document_id)
+        return dict(status)
+    
+    async def _ingest(self, document_id: int, status: IngestionStatus) -> None:
+        """Diff a document's chunks against the store and apply the changes."""
+        try:
+            loaded = await self._load(document_id)
+            if loaded is None:
+                raise LookupError(f"Document {document_id} not found")
+            document, session_ids = loaded
+            
+            metadata = {
+                "document_id": document.id,
+                "user_id": document.user_id,
+                "title": document.title,
+                "file_type": document.file_type,
+                "date": document.created_at.date().isoformat() if document.created_at else None,
+                "session_ids": session_ids,
+            }
+            if len(session_ids) == 1:
+                metadata["session_id"] = session_ids[0]
+            
+            content = document.content or ""
+            existing = {chunk.id: chunk for chunk in await self.vector_store.get_by_document_id(document_id)}
+            # Loading a tiktoken encoding may download it; keep that off the event loop
+            count_tokens = await asyncio.to_thread(get_token_counter, self.tokenizer)
+            current: set = set()
+            moved: Dict[str, Dict[str, Any]] = {}
+            occurrences: Counter = Counter()
+            batch: List[VectorDocument] = []
+            for chunk in chunk_text(content, self.chunk_tokens, self.overlap_tokens, count_tokens):
+                digest = content_hash(chunk["content"])
+                doc_id = chunk_id(document_id, digest, occurrences[digest])
+                occurrences[digest] += 1
+                current.add(doc_id)
+                chunk_metadata = {
+                    **metadata,
+                    "chunk_index": chunk["index"],
+                    "token_count": chunk["token_count"],
+                    "start": chunk["start"],
+                    "end": chunk["end"],
+                    "content_hash": digest,
+                }
+                
+                if doc_id in existing:
+                    # Same text, so same embedding: at most the metadata changed
+                    if existing[doc_id].metadata != chunk_metadata:
+                        moved[doc_id] = chunk_metadata
+                    status["chunks_unchanged"] += 1
+                    continue
+                
+                batch.append(VectorDocument(id=doc_id, content=chunk["content"], metadata=chunk_metadata))
+                if len(batch) >= self.batch_size:
+                    await self._index(batch, status, chunk["end"] / max(1, len(content)))
+                    batch = []
+            if batch:
+                await self._index(batch, status, 1.0)
+            
+            if moved:
+                await self.vector_store.update_metadata(moved)
+            stale = [doc_id for doc_id in existing if doc_id not in current]
+            if stale:
+                await self.vector_store.delete_by_ids(stale)
+            status["chunks_removed"] = len(stale)
+            document_ingestion_chunks_unchanged_total.inc(status["chunks_unchanged"])
+            
+            status.update(status=STATUS_COMPLETED, progress=1.0, finished_at=_now())
+            document_ingestions_total.labels(status=STATUS_COMPLETED).inc()
+            logger.info(
+                f"Ingested document {document_id}: {status['chunks_indexed']} chunks embedded, "
+                f"{status['chunks_unchanged']} unchanged, {len(stale)} removed"
+            )
+        
+        except Exception as e:
+            status.update(status=STATUS_FAILED, error=str(e), finished_at=_now())
+            document_ingestions_total.labels(status=STATUS_FAILED).inc()
+            logger.error(f"Ingestion of document {document_id} failed: {e}")
+    
+    async def remove(self, document_id: int) -> int:
+        """
+        Drop a document's chunks from the vector store.
+        
+        Call it once the document's deletion has committed: pgvector chunk
+        rows cascade with the document row, and deleting them from another
+        connection while that transaction is open blocks on its row locks.
+        
+        Args:
+            document_id: Deleted document
+        
+        Returns:
+            Number of chunks deleted
+        """
+        self._ensure_started()
+        async with self._locked(document_id):
+            self._status.pop(document_id, None)
+            self._finished.pop(document_id, None)
+            removed = await self.vector_store.delete_by_document_id(document_id)
+        return removed
+    
+    def schedule_remove(self, document_id: int) -> None:
+        """
+        Drop a document's chunks in a background task.
+        
+        Meant for ``on_commit`` once the document's deletion committed. The
+        request does not wait for it, and a failure is logged rather than
+        raised, since the document itself is already gone.
+        
+        Args:
+            document_id: Deleted document
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.error(f"No running event loop, chunks of document {document_id} not removed")
+            return
+        
+        task = loop.create_task(self._remove_logged(document_id))
+        self._removals.add(task)
+        task.add_done_callback(self._removals.discard)
+    
+    async def compact(self, force: bool = False) -> bool:
+        """
+        Rebuild the vector index if enough of it is dead space.
+        
+        Args:
+            force: Rebuild without measuring first (an operator's explicit request)
+        
+        Returns:
+            True if the index was rebuilt
+        """
+        if force:
+            logger.info("Rebuilding vector index on request")
+        else:
+            ratio = await self.vector_store.get_tombstone_ratio()
+            if ratio < self.compaction_ratio:
+                return False
+            logger.info(f"Rebuilding vector index: {ratio:.0%} dead space")
+        
+        await self.vector_store.rebuild_index()
+        vector_index_rebuilds_total.inc()
+        return True
+    
+    async def stop(self) -> None:
+        """Stop the workers (queued documents are dropped, pending removals finish)."""
+        if self._removals:
+            await asyncio.gather(*self._removals)
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+    
+    async def _index(self, batch: List[VectorDocument], status: IngestionStatus, progress: float) -> List[str]:
+        """Embed and insert one batch of chunks."""
+        ids = await self.vector_store.add_documents(batch)
+        status["chunks_indexed"] += len(ids)
+        status["progress"] = round(progress, 4)
+        document_ingestion_chunks_total.inc(len(ids))
+        return ids
+    
+    async def _remove_logged(self, document_id: int) -> None:
+        """``remove`` for a background task: failures are logged."""
+        try:
+            await self.remove(document_id)
+        except Exception as e:
+            logger.error(f"Removing chunks of deleted document {document_id} failed: {e}")
+    
+    async def _load(self, document_id: int) -> Optional[Tuple[Document, List[int]]]:
+        """Document row and the sessions it is attached to."""
+        from app.database.session import async_session_factory
+        
+        for attempt in range(LOAD_ATTEMPTS):
+            async with async_session_factory() as session:
+                document = await session.get(Document, document_id)
+                if document is not None:
+                    result = await session.execute(
+                        select(SessionDocument.session_id).where(SessionDocument.document_id == document_id)
+                    )
+                    return document, sorted(result.scalars().all())
+            await asyncio.sleep(LOAD_RETRY_SECONDS * (attempt + 1))
+        return None
+    
+    @asynccontextmanager
+    async def _locked(self, document_id: int) -> AsyncIterator[None]:
+        """Hold the lock serializing ingestion and removal of one document."""
+        lock = self._locks.setdefault(document_id, asyncio.Lock())
+        self._lock_users[document_id] += 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[document_id] -= 1
+            if not self._lock_users[document_id]:
+                # Nobody holds or awaits it: a later caller creates a fresh one
+                del self._lock_users[document_id]
+                self._locks.pop(document_id, None)
+    
+    def _retire(self, document_id: int) -> None:
+        """Record a finished status, dropping the oldest beyond ``status_retention``."""
+        self._finished[document_id] = None
+        self._finished.move_to_end(document_id)
+        while len(self._finished) > self.status_retention:
+            oldest, _ = self._finished.popitem(last=False)
+            status = self._status.get(oldest)
+            # Re-enqueued since it finished: the new job's status stays
+            if status and status["status"] in FINISHED_STATUSES:
+                del self._status[oldest]
+    
+    def _new_status(self, document_id: int) -> IngestionStatus:
+        status: IngestionStatus = {
+            "document_id": document_id,
+            "status": STATUS_QUEUED,
+            "chunks_indexed": 0,
+            "chunks_unchanged": 0,
+            "chunks_removed": 0,
+            "progress": 0.0,
+            "error": None,
+            "queued_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._status[document_id] = status
+        self._finished.pop(document_id, None)
+        return status
+    
+    def _ensure_started(self) -> None:
+        """Start the workers on the running event loop if needed."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        if loop is self._loop and self._tasks and not all(task.done() for task in self._tasks):
+            return
+        
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+        if self.compaction_interval > 0:
+            self._tasks.append(loop.create_task(self._compact_periodically()))
+    
+    async def _run(self) -> None:
+        """Ingest queued documents one at a time."""
+        while True:
+            document_id = await self._queue.get()
+            try:
+                await self.ingest(document_id)
+            finally:
+                self._queue.task_done()
+    
+    async def _compact_periodically(self) -> None:
+        """Measure the index every ``compaction_interval`` seconds."""
+        while True:
+            await asyncio.sleep(self.compaction_interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.error(f"Vector index compaction failed: {e}")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+_ingestion_pipeline: Optional[IngestionPipeline] = None
+
+
+def get_ingestion_pipeline() -> IngestionPipeline:
+    """
+    Get ingestion pipeline instance (singleton).
+    
+    Returns:
+        IngestionPipeline instance
+    """
+    global _ingestion_pipeline
+    
+    if _ingestion_pipeline is None:
+        _ingestion_pipeline = IngestionPipeline(
+            workers=settings.INGESTION_WORKERS,
+            batch_size=settings.INGESTION_BATCH_SIZE,
+            chunk_tokens=settings.INGESTION_CHUNK_TOKENS,
+            overlap_tokens=settings.INGESTION_CHUNK_OVERLAP_TOKENS,
+            tokenizer=settings.INGESTION_TOKENIZER,
+            max_queue_size=settings.INGESTION_MAX_QUEUE_SIZE,
+            compaction_interval=settings.INGESTION_COMPACTION_INTERVAL_SECONDS,
+            compaction_ratio=settings.INGESTION_COMPACTION_TOMBSTONE_RATIO,
+            status_retention=settings.INGESTION_STATUS_RETENTION,
+        )
+    
+    return _ingestion_pipeline
@@ -12,6 +12,8 @@ from typing import List
 import logging
 from datetime import datetime, timedelta, timezone
 from app.ai_core.agents.agent_factory import AgentFactory, AgentType
+from app.ai_core.vectorstore.retrieval_cache import invalidate_retrieval_caches
+from app.database.session import on_commit
 
 logger = logging.getLogger(__name__)
 
@@ -117,7 +119,7 @@ class SessionService:
                 else:
                     if len(older_sessions) < limit:
                         older_sessions.append(session_response)
-        
+            
             return GroupedSessionsResponse(
                 today=today_sessions,
                 yesterday=yesterday_sessions,
@@ -164,7 +166,11 @@ class SessionService:
             except Exception as e:
                 logger.warning(f"Failed to clear checkpoints for session {session_id}: {e}")
             
-            return await self.repository.delete(session_id)
+            deleted = await self.repository.delete(session_id)
+            if deleted:
+                # Its document links cascade away, changing what session-scoped searches match
+                on_commit(self.repository.session, invalidate_retrieval_caches)
+            return deleted
         except SQLAlchemyError as e:
             logger.error(f"Database error deleting session {session_id}: {e}")
             raise DatabaseException(f"Failed to delete session: {str(e)}")
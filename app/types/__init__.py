@@ -6,6 +6,7 @@ from .agent import (
     AgentExecutionResult,
     NodeReturnType,
     LangGraphConfig,
+    RAGReasoning,
 )
 from .guardrail import (
     GuardrailValidationResult,
@@ -14,6 +15,9 @@ from .guardrail import (
 from .llm import (
     LLMConfig,
     LLMValidationResult,
+    LLMBatchResult,
+    TokenUsage,
+    UsageAttribution,
 )
 from .mcp import (
     MCPConfig,
@@ -30,7 +34,14 @@ from .tool import (
 from .vectorstore import (
     VectorStoreConfig,
     VectorStoreFilter,
+    RetrievalScope,
     VectorStoreStats,
+    EmbeddingCacheStats,
+    RetrievalCacheStats,
+    TextChunk,
+    ContextSection,
+    PackedContext,
+    IngestionStatus,
     DocumentWithScore,
 )
 from .common import (
@@ -43,10 +54,14 @@ __all__ = [
     "AgentResponse",
     "AgentExecutionResult",
     "NodeReturnType",
+    "RAGReasoning",
     "GuardrailValidationResult",
     "GuardrailConfig",
     "LLMConfig",
     "LLMValidationResult",
+    "LLMBatchResult",
+    "TokenUsage",
+    "UsageAttribution",
     "MCPConfig",
     "MCPExecuteParams",
     "CypherExecutionResult",
@@ -57,7 +72,14 @@ __all__ = [
     "ToolResult",
     "VectorStoreConfig",
     "VectorStoreFilter",
+    "RetrievalScope",
     "VectorStoreStats",
+    "EmbeddingCacheStats",
+    "RetrievalCacheStats",
+    "TextChunk",
+    "ContextSection",
+    "PackedContext",
+    "IngestionStatus",
     "DocumentWithScore",
     "ErrorDetails",
     "MetadataDict",
@@ -1,6 +1,8 @@
 """Agent-related type definitions."""
 
-from typing import TypedDict, Optional, Any, List
+from typing import Optional, Any, List
+
+from typing_extensions import TypedDict
 from app.types.common import MetadataDict
 
 
@@ -16,6 +18,16 @@ class AgentConfig(TypedDict, total=False):
     max_context_tokens: int
     neo4j_config: Optional["Neo4jConfig"]
     vectorstore_config: Optional["VectorStoreConfig"]
+    reasoning_mode: str
+    top_k: int
+    query_rewrites: int
+    retrieval_mode: str
+    retrieval_scope: str
+    vector_weight: float
+    lexical_weight: float
+    rerank_top_n: int
+    rerank_scorer: Any
+    context_tokens: int
 
 
 class LangGraphConfig(TypedDict, total=False):
@@ -42,6 +54,14 @@ class VectorStoreConfig(TypedDict, total=False):
     distance_metric: str
 
 
+class RAGReasoning(TypedDict, total=False):
+    """Structured analysis and retrieval plan produced by the RAG reasoning step."""
+    intent: str
+    analysis: str
+    sub_queries: List[str]
+    filters: dict[str, Any]
+
+
 class AgentResponse(TypedDict, total=False):
     """Agent execution response."""
     response: str
@@ -87,5 +107,8 @@ class NodeReturnType(TypedDict, total=False):
     reranked_docs: Optional[list[tuple[Any, float]]]
     answer: Optional[str]
     context_used: Optional[int]
+    context_tokens: Optional[int]
     retrieval_count: Optional[int]
+    metadata: Optional[dict[str, Any]]
     metadata_filter: Optional[dict[str, Any]]
+    reasoning: Optional["RAGReasoning"]
@@ -1,6 +1,8 @@
 """Common type definitions used across the application."""
 
-from typing import TypedDict, Any, Optional
+from typing import Any, Optional
+
+from typing_extensions import TypedDict
 
 
 class ErrorDetails(TypedDict, total=False):
@@ -1,6 +1,8 @@
 """Guardrail-related type definitions."""
 
-from typing import TypedDict, Optional
+from typing import Optional
+
+from typing_extensions import TypedDict
 
 
 class GuardrailValidationResult(TypedDict, total=False):
@@ -1,6 +1,8 @@
 """LLM-related type definitions."""
 
-from typing import TypedDict, Optional
+from typing import Any, Optional
+
+from typing_extensions import TypedDict
 
 
 class LLMConfig(TypedDict, total=False):
@@ -24,3 +26,30 @@ class LLMValidationResult(TypedDict, total=False):
     blocked: bool
     reason: Optional[str]
     details: Optional[dict[str, float]]
+
+
+class TokenUsage(TypedDict, total=False):
+    """Token counts reported for a single LLM call or stream."""
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    total_tokens: int
+
+
+class UsageAttribution(TypedDict, total=False):
+    """Who and what an LLM call's token usage is charged to."""
+    user_id: Optional[int]
+    session_id: Optional[int]
+    agent_type: Optional[str]
+    node: Optional[str]
+
+
+class LLMBatchResult(TypedDict, total=False):
+    """Outcome of one item of a batch LLM call."""
+    index: int
+    success: bool
+    response: Optional[Any]
+    error: Optional[str]
+    error_type: Optional[str]
+    input_validation: LLMValidationResult
+    output_validation: Optional[LLMValidationResult]
@@ -1,6 +1,8 @@
 """MCP (Model Context Protocol) related type definitions."""
 
-from typing import TypedDict, Optional, Any
+from typing import Optional, Any
+
+from typing_extensions import TypedDict
 
 
 class MCPConfig(TypedDict, total=False):
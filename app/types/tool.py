@@ -1,6 +1,8 @@
 """Tool-related type definitions."""
 
-from typing import TypedDict, Any
+from typing import Any
+
+from typing_extensions import TypedDict
 
 
 class ToolParams(TypedDict, total=False):
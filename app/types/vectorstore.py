@@ -1,6 +1,8 @@
 """Vector store related type definitions."""
 
-from typing import TypedDict, Optional, Any
+from typing import Optional, Any
+
+from typing_extensions import TypedDict
 
 
 class VectorStoreConfig(TypedDict, total=False):
@@ -10,6 +12,21 @@ class VectorStoreConfig(TypedDict, total=False):
     embedding_dimension: int
     distance_metric: str
     connection_string: Optional[str]
+    index_type: str
+    ef_search: int
+    probes: int
+    nlist: int
+    nprobe: int
+    index_path: Optional[str]
+    quantization: str
+    rescore: int
+    retrieval_cache_size: int
+
+
+class RetrievalScope(TypedDict, total=False):
+    """Documents a search may return: attached to the session or owned by the user."""
+    session_id: Optional[int]
+    user_id: Optional[int]
 
 
 class VectorStoreFilter(TypedDict, total=False):
@@ -21,6 +38,7 @@ class VectorStoreFilter(TypedDict, total=False):
     metadata: Optional[dict[str, Any]]
     date_from: Optional[str]
     date_to: Optional[str]
+    scope: Optional[RetrievalScope]
 
 
 class VectorStoreStats(TypedDict, total=False):
@@ -30,6 +48,74 @@ class VectorStoreStats(TypedDict, total=False):
     collection_name: str
     embedding_dimension: int
     last_updated: Optional[str]
+    backend: str
+    index_type: Optional[str]
+    storage: str
+    index_bytes: int
+
+
+class EmbeddingCacheStats(TypedDict):
+    """Embedding cache counters and hit rate."""
+    model: str
+    backend: str
+    size: int
+    capacity: int
+    memory_hits: int
+    persistent_hits: int
+    misses: int
+    errors: int
+    hit_rate: float
+
+
+class RetrievalCacheStats(TypedDict):
+    """Retrieval result cache counters and hit rate."""
+    backend: str
+    size: int
+    capacity: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class TextChunk(TypedDict):
+    """A chunk of a document's text."""
+    index: int
+    content: str
+    start: int
+    end: int
+    token_count: int
+
+
+class ContextSection(TypedDict):
+    """Text of one source document packed into a prompt context."""
+    source: str
+    title: Optional[str]
+    score: float
+    content: str
+    chunk_ids: list[str]
+
+
+class PackedContext(TypedDict):
+    """Retrieved context packed into a token budget."""
+    text: str
+    token_count: int
+    sections: list[ContextSection]
+    chunks_used: int
+    chunks_trimmed: int
+
+
+class IngestionStatus(TypedDict, total=False):
+    """Progress of a document's ingestion into the vector store."""
+    document_id: int
+    status: str
+    chunks_indexed: int
+    chunks_unchanged: int
+    chunks_removed: int
+    progress: float
+    error: Optional[str]
+    queued_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
 
 
 class DocumentWithScore(TypedDict):
@@ -0,0 +1 @@
+"""Load-test and benchmark harnesses (run as ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,145 @@
+"""Recall@k versus latency of the IVF index against brute force.
+
+Builds an IVFIndex and an exact MatrixIndex over the same clustered synthetic
+embeddings (random unit vectors have no structure for a quantizer to find,
+real embeddings do), then sweeps ``nprobe`` and reports recall@k against the
+exact results together with per-query latency.
+
+Examples::
+
+    python -m benchmarks.ann_recall
+    python -m benchmarks.ann_recall --sizes 1000000 --nprobe 1,4,16,64 --output results/ann.json
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from app.ai_core.vectorstore.ivf_index import IVFIndex
+from app.ai_core.vectorstore.matrix_index import MatrixIndex
+from benchmarks.vector_index import measure_qps
+
+
+def clustered_vectors(
+    rng: np.random.Generator,
+    count: int,
+    dim: int,
+    clusters: int,
+    spread: float = 0.6,
+) -> np.ndarray:
+    """Unit vectors drawn around ``clusters`` random topic centers."""
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 100_000):
+        end = min(start + 100_000, count)
+        noise = rng.standard_normal((end - start, dim), dtype=np.float32) * (spread / math.sqrt(dim))
+        vectors[start:end] = centers[rng.integers(0, clusters, end - start)] + noise
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def recall_at_k(approximate: List[List[tuple]], exact: List[List[tuple]], k: int) -> float:
+    """Mean fraction of the exact top-k found by the approximate search."""
+    hits = [
+        len({doc_id for doc_id, _ in found} & {doc_id for doc_id, _ in truth}) / k
+        for found, truth in zip(approximate, exact)
+    ]
+    return sum(hits) / len(hits)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed)
+    results: List[Dict[str, Any]] = []
+    
+    for size in args.sizes:
+        nlist = args.nlist or max(16, int(2 * math.sqrt(size)))
+        data = clustered_vectors(rng, size + args.queries, args.dim, clusters=max(32, size // 1000))
+        vectors, queries = data[:size], data[size:]
+        ids = [f"doc-{i}" for i in range(size)]
+        
+        begin = time.perf_counter()
+        exact_index = MatrixIndex(args.dim, initial_capacity=size)
+        exact_index.add(ids, vectors)
+        exact_build = time.perf_counter() - begin
+        
+        begin = time.perf_counter()
+        ivf = IVFIndex(args.dim, nlist=nlist, seed=args.seed)
+        for start in range(0, size, 50_000):
+            ivf.add(ids[start:start + 50_000], vectors[start:start + 50_000])
+        if not ivf.is_trained:
+            ivf.train()
+        ivf_build = time.perf_counter() - begin
+        
+        truth = exact_index.search_batch(queries, args.k)
+        brute = measure_qps(lambda q: exact_index.search(q[0], args.k), queries)
+        print(
+            f"n={size} dim={args.dim} nlist={nlist}  build exact={exact_build:.2f}s ivf={ivf_build:.2f}s  "
+            f"brute force: {brute['qps']:.1f} qps p50={brute['p50_ms']:.3f}ms",
+            flush=True,
+        )
+        
+        sweep = []
+        for nprobe in args.nprobe:
+            if nprobe > nlist:
+                continue
+            found = [ivf.search(query, args.k, nprobe) for query in queries]
+            timing = measure_qps(lambda q: ivf.search(q[0], args.k, nprobe), queries)
+            point = {"nprobe": nprobe, "recall": recall_at_k(found, truth, args.k), **timing}
+            sweep.append(point)
+            print(
+                f"  nprobe={nprobe:<5} recall@{args.k}={point['recall']:.3f}  "
+                f"p50={point['p50_ms']:.3f}ms p99={point['p99_ms']:.3f}ms  "
+                f"{point['qps']:9.1f} qps ({point['qps'] / brute['qps']:.1f}x)",
+                flush=True,
+            )
+        
+        results.append({
+            "size": size,
+            "dim": args.dim,
+            "k": args.k,
+            "nlist": nlist,
+            "build_s": {"exact": exact_build, "ivf": ivf_build},
+            "index_mb": ivf.nbytes / 2 ** 20,
+            "brute_force": brute,
+            "sweep": sweep,
+        })
+        del exact_index, ivf, data
+    
+    return {"meta": {"seed": args.seed, "queries": args.queries}, "results": results}
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="IVF recall@k vs latency benchmark")
+    parser.add_argument("--sizes", type=_int_list, default=[100_000])
+    parser.add_argument("--dim", type=int, default=384,
+                        help="embedding dimension (1M x 384 needs about 5 GB)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None,
+                        help="IVF cells (default: 2 * sqrt(size))")
+    parser.add_argument("--nprobe", type=_int_list, default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+    
+    report = run_benchmark(args)
+    
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,523 @@
+"""End-to-end load test for the chat and session endpoints.
+
+Drives ``/api/v1/chat``, ``/api/v1/chat/stream``, session listing and message
+history at a sweep of concurrency levels and reports throughput, latency
+percentiles, time to first token, database pool waits and process memory.
+
+By default the app runs in-process behind ``httpx.ASGITransport`` with the
+fake LLM provider and the offline Neo4j / vector store fakes, so a run needs
+only a database. Pass ``--base-url`` to load an already running server
+instead (start it with ``LLM_PROVIDER=fake`` for repeatable numbers).
+
+Examples::
+
+    python -m benchmarks.chat_load --concurrency 1,8,32 --requests 200
+    python -m benchmarks.chat_load --scenarios stream --output results/stream.json
+    python -m benchmarks.chat_load --base-url http://localhost:8000 --pids 4242
+"""
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+import uuid
+
+from benchmarks.fakes import configure_environment
+
+API_PREFIX = "/api/v1"
+
+SCENARIOS = ("chat", "stream", "sessions", "messages")
+
+QUERIES = [
+    "Hello, how are you today?",
+    "Summarise what we talked about so far",
+    "Search the documents for the onboarding policy",
+    "Who is connected to Alice in the graph?",
+    "Give me three ideas for a weekend project",
+]
+
+
+@dataclass
+class RequestSample:
+    """Outcome of one request."""
+    latency: float
+    ok: bool
+    ttft: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ScenarioResult:
+    """Aggregated measurements for one scenario at one concurrency level."""
+    scenario: str
+    concurrency: int
+    samples: List[RequestSample] = field(default_factory=list)
+    wall_time: float = 0.0
+    pool_waits: List[float] = field(default_factory=list)
+    memory_before_kb: Dict[str, int] = field(default_factory=dict)
+    memory_after_kb: Dict[str, int] = field(default_factory=dict)
+    
+    def summary(self) -> Dict[str, Any]:
+        """Summarise samples into the JSON report shape."""
+        latencies = [s.latency for s in self.samples if s.ok]
+        ttfts = [s.ttft for s in self.samples if s.ok and s.ttft is not None]
+        errors = [s.error for s in self.samples if not s.ok]
+        
+        result: Dict[str, Any] = {
+            "scenario": self.scenario,
+            "concurrency": self.concurrency,
+            "requests": len(self.samples),
+            "errors": len(errors),
+            "error_rate": len(errors) / len(self.samples) if self.samples else 0.0,
+            "throughput_rps": len(latencies) / self.wall_time if self.wall_time else 0.0,
+            "wall_time_s": self.wall_time,
+            "latency_ms": _distribution(latencies),
+        }
+        if ttfts:
+            result["ttft_ms"] = _distribution(ttfts)
+        if self.pool_waits:
+            result["db_pool_wait_ms"] = _distribution(self.pool_waits)
+        if self.memory_after_kb:
+            result["rss_kb"] = {
+                pid: {
+                    "before": self.memory_before_kb.get(pid),
+                    "after": rss,
+                }
+                for pid, rss in self.memory_after_kb.items()
+            }
+        if errors:
+            result["sample_errors"] = sorted(set(errors))[:5]
+        return result
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    """Latency distribution in milliseconds."""
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) * 1000,
+        "p50": _percentile(ordered, 50) * 1000,
+        "p95": _percentile(ordered, 95) * 1000,
+        "p99": _percentile(ordered, 99) * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    """
+    Resident set size of a process in kilobytes.
+    
+    Args:
+        pid: Process id
+    
+    Returns:
+        RSS in KB, or None when it cannot be read
+    """
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    
+    if pid == os.getpid():
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+    return None
+
+
+class PoolWaitRecorder:
+    """Time every connection checkout of the app's SQLAlchemy pool (in-process only)."""
+    
+    def __init__(self):
+        self.waits: List[float] = []
+        self._pool = None
+        self._original_connect = None
+    
+    def install(self) -> None:
+        """Wrap ``pool.connect`` of the app engine."""
+        from app.database.engine import engine
+        
+        pool = engine.sync_engine.pool
+        original_connect = pool.connect
+        
+        def timed_connect(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return original_connect(*args, **kwargs)
+            finally:
+                self.waits.append(time.perf_counter() - start_time)
+        
+        pool.connect = timed_connect
+        self._pool = pool
+        self._original_connect = original_connect
+    
+    def uninstall(self) -> None:
+        """Restore the original ``pool.connect``."""
+        if self._pool is not None:
+            self._pool.connect = self._original_connect
+            self._pool = None
+    
+    def drain(self) -> List[float]:
+        """Return and clear the waits recorded so far."""
+        waits, self.waits = self.waits, []
+        return waits
+
+
+@asynccontextmanager
+async def open_client(base_url: Optional[str], timeout: float) -> AsyncIterator[Any]:
+    """
+    HTTP client against a running server or the in-process app.
+    
+    Args:
+        base_url: Server URL, or None to run the app in-process
+        timeout: Per-request timeout in seconds
+    
+    Yields:
+        httpx.AsyncClient
+    """
+    import httpx
+    
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+    
+    from benchmarks.fakes import install_fakes
+    await install_fakes()
+    from app.main import app
+    
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://benchmark",
+            timeout=timeout,
+            limits=limits,
+        ) as client:
+            yield client
+
+
+class ChatLoadTest:
+    """Runs the load scenarios against one client."""
+    
+    def __init__(self, client: Any, seed_sessions: int = 5, seed_messages: int = 6):
+        """
+        Initialize load test.
+        
+        Args:
+            client: httpx.AsyncClient pointing at the API
+            seed_sessions: Sessions created up front for the read scenarios
+            seed_messages: Chat turns sent into each seeded session
+        """
+        self.client = client
+        self.seed_sessions = seed_sessions
+        self.seed_messages = seed_messages
+        self.user_id: Optional[int] = None
+        self.session_ids: List[int] = []
+        self._queries = itertools.cycle(QUERIES)
+    
+    async def setup(self) -> None:
+        """Create a benchmark user and seed sessions with history."""
+        suffix = uuid.uuid4().hex[:8]
+        response = await self.client.post(f"{API_PREFIX}/users", json={
+            "username": f"bench_{suffix}",
+            "email": f"bench_{suffix}@example.com",
+            "fullname": "Benchmark User",
+        })
+        response.raise_for_status()
+        self.user_id = response.json()["id"]
+        
+        for i in range(self.seed_sessions):
+            response = await self.client.post(f"{API_PREFIX}/sessions", json={
+                "name": f"Benchmark session {i}",
+                "user_id": self.user_id,
+            })
+            response.raise_for_status()
+            session_id = response.json()["id"]
+            self.session_ids.append(session_id)
+            
+            for _ in range(self.seed_messages):
+                await self.client.post(
+                    f"{API_PREFIX}/chat",
+                    params={"user_id": self.user_id},
+                    json={"query": next(self._queries), "session_id": session_id},
+                )
+    
+    def request_for(self, scenario: str, index: int) -> Callable[[], Awaitable[RequestSample]]:
+        """
+        Build the request coroutine factory for a scenario.
+        
+        Args:
+            scenario: One of ``SCENARIOS``
+            index: Request number (spreads load over the seeded sessions)
+        
+        Returns:
+            Zero-argument coroutine factory
+        """
+        session_id = self.session_ids[index % len(self.session_ids)] if self.session_ids else None
+        query = next(self._queries)
+        
+        if scenario == "chat":
+            return lambda: self._timed_request(
+                "POST",
+                f"{API_PREFIX}/chat",
+                params={"user_id": self.user_id},
+                json={"query": query, "session_id": session_id},
+            )
+        if scenario == "stream":
+            return lambda: self._timed_stream(query, session_id)
+        if scenario == "sessions":
+            if index % 4 == 0:
+                return lambda: self._timed_request(
+                    "POST",
+                    f"{API_PREFIX}/sessions",
+                    json={"name": f"Load session {index}", "user_id": self.user_id},
+                )
+            return lambda: self._timed_request(
+                "GET",
+                f"{API_PREFIX}/sessions/user/{self.user_id}/grouped",
+            )
+        if scenario == "messages":
+            return lambda: self._timed_request(
+                "GET",
+                f"{API_PREFIX}/sessions/{session_id}/messages",
+            )
+        raise ValueError(f"Unknown scenario: {scenario}")
+    
+    async def run(self, scenario: str, concurrency: int, total_requests: int) -> ScenarioResult:
+        """
+        Send ``total_requests`` requests with at most ``concurrency`` in flight.
+        
+        Args:
+            scenario: Scenario name
+            concurrency: Concurrent in-flight requests
+            total_requests: Requests to send
+        
+        Returns:
+            Raw scenario result
+        """
+        result = ScenarioResult(scenario=scenario, concurrency=concurrency)
+        counter = itertools.count()
+        
+        async def worker() -> None:
+            while True:
+                index = next(counter)
+                if index >= total_requests:
+                    return
+                result.samples.append(await self.request_for(scenario, index)())
+        
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result.wall_time = time.perf_counter() - start_time
+        return result
+    
+    async def _timed_request(self, method: str, url: str, **kwargs) -> RequestSample:
+        """Send one request and time it."""
+        start_time = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            latency = time.perf_counter() - start_time
+            if response.status_code >= 400:
+                return RequestSample(latency, False, error=f"HTTP {response.status_code}")
+            return RequestSample(latency, True)
+        except Exception as e:
+            return RequestSample(time.perf_counter() - start_time, False, error=type(e).__name__)
+    
+    async def _timed_stream(self, query: str, session_id: Optional[int]) -> RequestSample:
+        """Consume one SSE stream, recording time to the first content chunk."""
+        start_time = time.perf_counter()
+        ttft = None
+        error = None
+        
+        try:
+            async with self.client.stream(
+                "POST",
+                f"{API_PREFIX}/chat/stream",
+                params={"user_id": self.user_id},
+                json={"query": query, "session_id": session_id},
+            ) as response:
+                if response.status_code >= 400:
+                    error = f"HTTP {response.status_code}"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    try:
+                        event = json.loads(line[len("data: "):])
+                    except json.JSONDecodeError:
+                        continue
+                    if event.get("type") == "chunk" and event.get("content") and ttft is None:
+                        ttft = time.perf_counter() - start_time
+                    elif event.get("type") == "error" or ("error" in event and "type" not in event):
+                        error = error or "stream error"
+        except Exception as e:
+            error = type(e).__name__
+        
+        latency = time.perf_counter() - start_time
+        return RequestSample(latency, error is None, ttft=ttft, error=error)
+
+
+def _git_commit() -> Optional[str]:
+    """Current git commit of the working tree, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_row(summary: Dict[str, Any]) -> str:
+    """One human-readable result line."""
+    latency = summary["latency_ms"]
+    line = (
+        f"{summary['scenario']:<9} c={summary['concurrency']:<4} "
+        f"rps={summary['throughput_rps']:8.1f}  "
+        f"p50={latency.get('p50', 0):8.1f}ms p95={latency.get('p95', 0):8.1f}ms "
+        f"p99={latency.get('p99', 0):8.1f}ms  err={summary['errors']}"
+    )
+    if "ttft_ms" in summary:
+        line += f"  ttft_p50={summary['ttft_ms']['p50']:.1f}ms ttft_p95={summary['ttft_ms']['p95']:.1f}ms"
+    if "db_pool_wait_ms" in summary:
+        line += f"  pool_wait_p95={summary['db_pool_wait_ms']['p95']:.2f}ms"
+    return line
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run every scenario at every concurrency level.
+    
+    Args:
+        args: Parsed command line arguments
+    
+    Returns:
+        JSON-serialisable report
+    """
+    pool_recorder = None if args.base_url else PoolWaitRecorder()
+    pids = list(args.pids) or ([] if args.base_url else [os.getpid()])
+    results: List[Dict[str, Any]] = []
+    
+    async with open_client(args.base_url, args.timeout) as client:
+        load_test = ChatLoadTest(client, seed_sessions=args.seed_sessions, seed_messages=args.seed_messages)
+        await load_test.setup()
+        
+        if pool_recorder:
+            pool_recorder.install()
+        
+        try:
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    if args.warmup:
+                        await load_test.run(scenario, concurrency, args.warmup)
+                    if pool_recorder:
+                        pool_recorder.drain()
+                    
+                    memory_before = {str(pid): read_rss_kb(pid) for pid in pids}
+                    result = await load_test.run(scenario, concurrency, args.requests)
+                    result.memory_before_kb = memory_before
+                    result.memory_after_kb = {str(pid): read_rss_kb(pid) for pid in pids}
+                    if pool_recorder:
+                        result.pool_waits = pool_recorder.drain()
+                    
+                    summary = result.summary()
+                    results.append(summary)
+                    print(_format_row(summary), flush=True)
+        finally:
+            if pool_recorder:
+                pool_recorder.uninstall()
+    
+    from app.config.settings import settings
+    
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "in-process",
+            "requests_per_level": args.requests,
+            "warmup": args.warmup,
+            "llm_provider": settings.LLM_PROVIDER,
+            "fake_llm_ttft_ms": settings.FAKE_LLM_TTFT_MS,
+            "fake_llm_tokens_per_second": settings.FAKE_LLM_TOKENS_PER_SECOND,
+            "database_pool_size": settings.DATABASE_POOL_SIZE,
+            "database_max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        },
+        "results": results,
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _scenario_list(value: str) -> List[str]:
+    scenarios = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return scenarios
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16],
+                        help="comma-separated concurrency levels (default: 1,4,16)")
+    parser.add_argument("--requests", type=int, default=100,
+                        help="requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10,
+                        help="unmeasured requests before each level")
+    parser.add_argument("--scenarios", type=_scenario_list, default=list(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--base-url", default=None,
+                        help="load a running server instead of the in-process app")
+    parser.add_argument("--pids", type=_int_list, default=[],
+                        help="server process ids to sample RSS from (with --base-url)")
+    parser.add_argument("--seed-sessions", type=int, default=5)
+    parser.add_argument("--seed-messages", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", type=Path, default=None,
+                        help="write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    configure_environment()
+    
+    report = asyncio.run(run_benchmark(args))
+    
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
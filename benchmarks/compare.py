@@ -0,0 +1,120 @@
+"""Compare two benchmark reports and flag regressions.
+
+Matches results by (scenario, concurrency) and compares throughput, latency
+percentiles, time to first token and (vector store reports) recall. Exits with status 1 when any metric got
+worse by more than ``--threshold`` so the script can gate CI.
+
+Example::
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import sys
+
+# (path into a result, True if higher is better)
+METRICS: List[Tuple[Tuple[str, ...], bool]] = [
+    (("throughput_rps",), True),
+    (("throughput_qps",), True),
+    (("recall",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("latency_ms", "p99"), False),
+    (("ttft_ms", "p50"), False),
+    (("ttft_ms", "p95"), False),
+    (("error_rate",), False),
+]
+
+
+def _lookup(result: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    value: Any = result
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+
+def _index(report: Dict[str, Any]) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    return {(r["scenario"], r["concurrency"]): r for r in report.get("results", [])}
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    candidate: Dict[str, Any],
+    threshold: float = 0.1,
+) -> List[Dict[str, Any]]:
+    """
+    Compare every shared metric of two reports.
+    
+    Args:
+        baseline: Reference report
+        candidate: Report under test
+        threshold: Relative change treated as a regression (0.1 = 10%)
+    
+    Returns:
+        One row per compared metric with ``change`` and ``regression`` keys
+    """
+    rows = []
+    baseline_results = _index(baseline)
+    candidate_results = _index(candidate)
+    
+    for key in sorted(baseline_results.keys() & candidate_results.keys()):
+        for path, higher_is_better in METRICS:
+            before = _lookup(baseline_results[key], path)
+            after = _lookup(candidate_results[key], path)
+            if before is None or after is None:
+                continue
+            
+            if before == 0:
+                change = 0.0 if after == 0 else float("inf")
+            else:
+                change = (after - before) / before
+            worse = -change if higher_is_better else change
+            
+            rows.append({
+                "scenario": key[0],
+                "concurrency": key[1],
+                "metric": ".".join(path),
+                "baseline": before,
+                "candidate": after,
+                "change": change,
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change counted as a regression (default: 0.1)")
+    args = parser.parse_args(argv)
+    
+    baseline = json.loads(args.baseline.read_text())
+    candidate = json.loads(args.candidate.read_text())
+    rows = compare_reports(baseline, candidate, args.threshold)
+    
+    print(f"baseline:  {baseline.get('meta', {}).get('git_commit')}  "
+          f"candidate: {candidate.get('meta', {}).get('git_commit')}")
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['scenario']:<9} c={row['concurrency']:<4} {row['metric']:<16} "
+            f"{row['baseline']:10.2f} -> {row['candidate']:10.2f} "
+            f"({row['change']:+7.1%}) {flag}"
+        )
+    
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Offline stand-ins for external services used by the benchmark harnesses.
+
+``configure_environment`` must run before anything under ``app`` is imported,
+because settings are read once at import time.
+"""
+
+from pathlib import Path
+from typing import Any, List, Optional
+import asyncio
+import os
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+
+OFFLINE_ENVIRONMENT = {
+    "LLM_PROVIDER": "fake",
+    "VECTOR_STORE_BACKEND": "memory",
+    "LLM_API_KEY": "fake-key",
+    "LLM_MODEL": "fake-model",
+    "LLM_FALLBACK_MODEL": "fake-model",
+    "FAKE_LLM_SCRIPT_PATH": str(BENCHMARK_DIR / "fake_llm_script.json"),
+    "ENABLE_CHECKPOINTER": "false",
+    "LANGFUSE_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def configure_environment(overrides: Optional[dict[str, str]] = None) -> None:
+    """
+    Point the app at offline fakes unless the caller already set a value.
+    
+    Args:
+        overrides: Values that win over both the defaults and the environment
+    """
+    for key, value in OFFLINE_ENVIRONMENT.items():
+        os.environ.setdefault(key, value)
+    for key, value in (overrides or {}).items():
+        os.environ[key] = value
+
+
+async def install_fakes(vector_documents: int = 200) -> None:
+    """
+    Replace the Neo4j client and the RAG vector store with in-process fakes.
+    
+    Args:
+        vector_documents: Synthetic documents seeded into the shared vector store
+    """
+    from app.ai_core.agents.neo4j_agent import agent as neo4j_agent_module
+    from app.ai_core.agents.rag_agent import agent as rag_agent_module
+    from app.ai_core.mcp.neo4j_client import Neo4jMCPClient
+    from app.ai_core.vectorstore.base import Document
+    from app.ai_core.vectorstore.memory_store import InMemoryVectorStore
+    
+    class FakeNeo4jClient(Neo4jMCPClient):
+        """Neo4j client answering from a static schema with a small simulated latency."""
+        
+        latency = 0.005
+        
+        async def connect(self) -> None:
+            self._connection = {"status": "connected", "uri": "fake://neo4j"}
+        
+        async def disconnect(self) -> None:
+            self._connection = None
+        
+        async def execute_cypher(self, query: str) -> List[dict[str, Any]]:
+            await asyncio.sleep(self.latency)
+            return [{"user": f"user_{i}", "friend": f"user_{i + 1}"} for i in range(10)]
+        
+        async def get_schema(self):
+            await asyncio.sleep(self.latency)
+            return {
+                "node_labels": ["User", "Product", "Category"],
+                "relationship_types": ["KNOWS", "BOUGHT", "IN_CATEGORY"],
+                "property_keys": ["name", "price", "title"],
+                "constraints": [],
+                "indexes": [],
+            }
+        
+        async def explain_query(self, query: str):
+            await asyncio.sleep(self.latency)
+            return {"plan": {"summary": "ProduceResults"}, "estimated_rows": 10, "db_hits": None}
+    
+    shared_store = InMemoryVectorStore()
+    await shared_store.add_documents([
+        Document(
+            id=f"bench-{i}",
+            content=f"Benchmark document {i} about topic {i % 17}.",
+            metadata={"document_type": "benchmark", "topic": i % 17},
+            embedding=shared_store._generate_mock_embedding(seed=i),
+        )
+        for i in range(vector_documents)
+    ])
+    
+    neo4j_agent_module.Neo4jMCPClient = FakeNeo4jClient
+    rag_agent_module.create_vector_store = lambda config=None: shared_store
@@ -0,0 +1,107 @@
+"""Memory, recall and speed of quantized embedding storage.
+
+Builds a MatrixIndex per storage type (float32, float16, int8) with and
+without full-precision rescoring over the same clustered embeddings, and
+reports index memory, recall@k against float32 exact search and QPS. The
+cost of keeping each embedding as a Python ``List[float]`` is shown for
+reference.
+
+Examples::
+
+    python -m benchmarks.quantization
+    python -m benchmarks.quantization --size 200000 --dim 1536 --output results/quant.json
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from app.ai_core.vectorstore.matrix_index import MatrixIndex
+from benchmarks.ann_recall import clustered_vectors, recall_at_k
+from benchmarks.vector_index import measure_qps
+
+CONFIGS = [
+    ("float32", 0),
+    ("float16", 0),
+    ("float16", 4),
+    ("int8", 0),
+    ("int8", 2),
+    ("int8", 4),
+]
+
+
+def python_list_bytes(dim: int) -> int:
+    """Approximate size of one embedding held as a list of Python floats."""
+    vector = [float(x) for x in np.random.default_rng(0).standard_normal(dim)]
+    return sys.getsizeof(vector) + sum(sys.getsizeof(x) for x in vector)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed)
+    data = clustered_vectors(rng, args.size + args.queries, args.dim, clusters=max(32, args.size // 1000))
+    vectors, queries = data[:args.size], data[args.size:]
+    ids = [f"doc-{i}" for i in range(args.size)]
+    
+    list_mb = python_list_bytes(args.dim) * args.size / 2 ** 20
+    print(f"n={args.size} dim={args.dim}  List[float] embeddings: {list_mb:.0f} MB", flush=True)
+    
+    truth = None
+    results: List[Dict[str, Any]] = []
+    for storage, rescore in CONFIGS:
+        begin = time.perf_counter()
+        index = MatrixIndex(args.dim, initial_capacity=args.size, storage=storage, rescore=rescore)
+        index.add(ids, vectors)
+        build_seconds = time.perf_counter() - begin
+        
+        found = index.search_batch(queries, args.k)
+        if truth is None:
+            truth = found
+        timing = measure_qps(lambda q: index.search(q[0], args.k), queries)
+        result = {
+            "storage": storage,
+            "rescore": rescore,
+            "build_s": build_seconds,
+            "index_mb": index.nbytes / 2 ** 20,
+            "recall": recall_at_k(found, truth, args.k),
+            **timing,
+        }
+        results.append(result)
+        print(
+            f"{storage:<8} rescore={rescore}  {result['index_mb']:8.1f} MB "
+            f"({list_mb / result['index_mb']:5.1f}x smaller than lists)  "
+            f"recall@{args.k}={result['recall']:.3f}  {result['qps']:8.1f} qps p50={result['p50_ms']:.2f}ms",
+            flush=True,
+        )
+        del index
+    
+    return {
+        "meta": {"seed": args.seed, "size": args.size, "dim": args.dim, "k": args.k, "list_mb": list_mb},
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Quantized storage benchmark")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+    
+    report = run_benchmark(args)
+    
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Query throughput of the exact in-memory vector index.
+
+Builds a MatrixIndex at each requested size from random unit vectors and
+measures single-query and batched QPS for top-k search, unfiltered and with a
+10% candidate mask. The pure-Python loop the index replaced is timed at the
+smallest size for reference.
+
+Examples::
+
+    python -m benchmarks.vector_index
+    python -m benchmarks.vector_index --sizes 10000,100000 --dim 1536 --output results/index.json
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from app.ai_core.vectorstore.matrix_index import MatrixIndex
+
+
+def random_unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    """Random float32 unit vectors."""
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build_index(rng: np.random.Generator, size: int, dim: int, chunk: int = 50_000) -> MatrixIndex:
+    """Insert ``size`` random vectors in chunks (exercises incremental add)."""
+    index = MatrixIndex(dim)
+    for start in range(0, size, chunk):
+        count = min(chunk, size - start)
+        index.add([f"doc-{i}" for i in range(start, start + count)], random_unit_vectors(rng, count, dim))
+    return index
+
+
+def measure_qps(run, queries: np.ndarray, batch_size: int = 1) -> Dict[str, float]:
+    """Run queries one batch at a time and report QPS and per-batch latency."""
+    latencies = []
+    for start in range(0, len(queries), batch_size):
+        begin = time.perf_counter()
+        run(queries[start:start + batch_size])
+        latencies.append(time.perf_counter() - begin)
+    
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "qps": len(queries) / total if total else 0.0,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def python_loop_qps(index: MatrixIndex, queries: np.ndarray, k: int) -> float:
+    """QPS of the previous pure-Python scoring loop (dot products + full sort)."""
+    documents = [row.tolist() for row in index.vectors]
+    begin = time.perf_counter()
+    for query in queries:
+        query = query.tolist()
+        scores = [sum(a * b for a, b in zip(query, doc)) for doc in documents]
+        sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:k]
+    return len(queries) / (time.perf_counter() - begin)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed)
+    results: List[Dict[str, Any]] = []
+    
+    for size in args.sizes:
+        begin = time.perf_counter()
+        index = build_index(rng, size, args.dim)
+        build_seconds = time.perf_counter() - begin
+        
+        queries = random_unit_vectors(rng, args.queries, args.dim)
+        mask = rng.random(size) < 0.1
+        
+        result = {
+            "size": size,
+            "dim": args.dim,
+            "k": args.k,
+            "build_s": build_seconds,
+            "matrix_mb": index.nbytes / 2 ** 20,
+            "single": measure_qps(lambda q: index.search(q[0], args.k), queries),
+            "batched": measure_qps(lambda q: index.search_batch(q, args.k), queries, args.batch_size),
+            "masked_10pct": measure_qps(lambda q: index.search(q[0], args.k, mask), queries),
+        }
+        
+        delete_ids = [f"doc-{i}" for i in range(0, size, 10)]
+        begin = time.perf_counter()
+        index.delete(delete_ids)
+        result["delete_10pct_s"] = time.perf_counter() - begin
+        
+        if size == min(args.sizes) and not args.skip_python:
+            result["python_loop_qps"] = python_loop_qps(index, queries[:3], args.k)
+        
+        results.append(result)
+        line = (
+            f"n={size:<9} build={build_seconds:6.2f}s  "
+            f"single={result['single']['qps']:9.1f} qps (p50 {result['single']['p50_ms']:.2f}ms)  "
+            f"batch{args.batch_size}={result['batched']['qps']:9.1f} qps  "
+            f"masked={result['masked_10pct']['qps']:9.1f} qps"
+        )
+        if "python_loop_qps" in result:
+            line += f"  python_loop={result['python_loop_qps']:.2f} qps"
+        print(line, flush=True)
+        
+        del index
+    
+    return {"meta": {"seed": args.seed, "queries": args.queries}, "results": results}
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MatrixIndex QPS benchmark")
+    parser.add_argument("--sizes", type=_int_list, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384,
+                        help="embedding dimension (1M x 1536 needs about 6 GB)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-python", action="store_true",
+                        help="skip the slow pure-Python reference")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+    
+    report = run_benchmark(args)
+    
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
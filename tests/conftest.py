@@ -1,3 +1,9 @@
+import os
+
+# Settings are read at import time; unit tests need no real services
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
 import pytest
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from app.ai_core.vectorstore.chunking import chunk_text, estimate_tokens
+
+TEXT = " ".join(f"Sentence {i} talks about topic {i % 7} in a few words." for i in range(60))
+
+
+def test_chunks_stay_within_budget_and_map_back_to_source():
+    chunks = list(chunk_text(TEXT, chunk_tokens=40, overlap_tokens=10))
+    
+    assert len(chunks) > 1
+    assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk["token_count"] <= 40
+        assert TEXT[chunk["start"]:chunk["end"]] == chunk["content"]
+    assert chunks[0]["start"] == 0
+    assert chunks[-1]["end"] == len(TEXT)
+
+
+def test_consecutive_chunks_share_overlap():
+    chunks = list(chunk_text(TEXT, chunk_tokens=40, overlap_tokens=15))
+    
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk["start"] < previous["end"]
+        assert estimate_tokens(TEXT[chunk["start"]:previous["end"]]) <= 15
+
+
+def test_zero_overlap_chunks_are_disjoint():
+    chunks = list(chunk_text(TEXT, chunk_tokens=40, overlap_tokens=0))
+    
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk["start"] >= previous["end"]
+
+
+def test_sentence_longer_than_chunk_is_split_into_words():
+    text = " ".join(f"word{i}" for i in range(100))
+    
+    chunks = list(chunk_text(text, chunk_tokens=20, overlap_tokens=5))
+    
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk["token_count"] <= 20
+        assert text[chunk["start"]:chunk["end"]] == chunk["content"]
+    assert chunks[-1]["content"].endswith("word99")
+
+
+def test_word_longer_than_chunk_gets_its_own_chunk():
+    long_word = "x" * 200
+    text = f"short words {long_word} more words"
+    
+    chunks = list(chunk_text(text, chunk_tokens=10, overlap_tokens=2))
+    
+    assert [chunk["content"] for chunk in chunks] == ["short words", long_word, "more words"]
+    assert chunks[1]["token_count"] > 10
+
+
+def test_boundaries_resynchronise_after_an_edit():
+    words = "alpha beta gamma delta river stone cloud paper window garden engine signal".split()
+    for trial in range(5):
+        rng = random.Random(trial)
+        sentences = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(5, 30))).capitalize() + f" {i}."
+            for i in range(1100)
+        ]
+        before = {chunk["content"] for chunk in chunk_text(" ".join(sentences), 400, 50)}
+        
+        edited = rng.randrange(len(sentences))
+        sentences[edited] = sentences[edited][:-1] + " and a few more words here."
+        after = [chunk["content"] for chunk in chunk_text(" ".join(sentences), 400, 50)]
+        
+        assert len(after) > 60
+        assert len([content for content in after if content not in before]) <= 8
+
+
+def test_paragraph_ends_are_chunk_boundaries():
+    paragraphs = [" ".join(f"Point {p}.{i} of the paragraph." for i in range(6)) for p in range(4)]
+    text = "\n\n".join(paragraphs)
+    
+    chunks = list(chunk_text(text, chunk_tokens=80, overlap_tokens=0))
+    
+    assert [chunk["content"] for chunk in chunks] == paragraphs
+
+
+def test_unanchored_chunks_are_packed_full():
+    chunks = list(chunk_text(TEXT, chunk_tokens=40, overlap_tokens=0, anchored=False))
+    
+    for chunk, following in zip(chunks, chunks[1:]):
+        sentence = following["content"].split(".")[0] + "."
+        assert chunk["token_count"] + estimate_tokens(sentence) > 40
+
+
+def test_empty_text_has_no_chunks():
+    assert list(chunk_text("   \n\n  ")) == []
+
+
+def test_non_positive_budget_is_rejected():
+    with pytest.raises(ValueError):
+        list(chunk_text(TEXT, chunk_tokens=0))
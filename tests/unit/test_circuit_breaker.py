@@ -0,0 +1,126 @@
+import pytest
+
+from app.ai_core.llm import circuit_breaker as breaker_module
+from app.ai_core.llm.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class Clock:
+    """Stands in for ``time.monotonic`` so the open period can be skipped."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        "test-endpoint", "test-model", window_size=4, min_calls=4, open_seconds=30.0, half_open_max_calls=2
+    )
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record_failure(0.1)
+
+
+def test_stays_closed_below_min_calls(breaker):
+    for _ in range(breaker.min_calls - 1):
+        breaker.record_failure(0.1)
+    
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failure_rate_opens_and_rejects(breaker):
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitState.CLOSED
+    
+    breaker.record_failure(0.1)
+    
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30.0
+
+
+def test_slow_calls_open(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record_success(breaker.slow_call_seconds)
+    
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_half_open_after_open_period(breaker, clock):
+    trip(breaker)
+    clock.now += 29.0
+    assert breaker.state == CircuitState.OPEN
+    
+    clock.now += 1.0
+    
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.retry_after() == 0.0
+
+
+def test_half_open_limits_probe_calls(breaker, clock):
+    trip(breaker)
+    clock.now += breaker.open_seconds
+    
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    
+    breaker.release()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_probes_close(breaker, clock):
+    trip(breaker)
+    clock.now += breaker.open_seconds
+    
+    for _ in range(breaker.half_open_max_calls):
+        assert breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.record_success(0.1)
+    
+    assert breaker.state == CircuitState.CLOSED
+    # The window starts over: one failure does not re-open it
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.parametrize("outcome", ["failure", "slow"])
+def test_failed_probe_reopens(breaker, clock, outcome):
+    trip(breaker)
+    clock.now += breaker.open_seconds
+    assert breaker.allow_request()
+    
+    if outcome == "failure":
+        breaker.record_failure(0.1)
+    else:
+        breaker.record_success(breaker.slow_call_seconds)
+    
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == breaker.open_seconds
+
+
+def test_reset_closes(breaker):
+    trip(breaker)
+    
+    breaker.reset()
+    
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
@@ -0,0 +1,222 @@
+from types import SimpleNamespace
+import asyncio
+
+import pytest
+
+from app.ai_core.vectorstore.chunking import estimate_tokens
+from app.ai_core.vectorstore.memory_store import InMemoryVectorStore
+from app.services.ingestion import STATUS_COMPLETED, STATUS_FAILED, STATUS_QUEUED, IngestionPipeline
+
+DOCUMENT_ID = 7
+
+
+def sentence(i: int) -> str:
+    return f"Paragraph {i} covers topic {i} briefly."
+
+
+CHUNK_TOKENS = estimate_tokens(sentence(0))
+
+
+def text(*numbers: int) -> str:
+    return " ".join(sentence(i) for i in numbers)
+
+
+@pytest.fixture
+async def pipeline():
+    store = InMemoryVectorStore({"embedding_dimension": 8, "retrieval_cache_size": 0})
+    # One sentence per chunk and no overlap, so the expected diff is easy to read
+    pipeline = IngestionPipeline(
+        store,
+        chunk_tokens=CHUNK_TOKENS,
+        overlap_tokens=0,
+        tokenizer="",
+        compaction_interval=0,
+    )
+    pipeline.document = SimpleNamespace(
+        id=DOCUMENT_ID, user_id=1, title="Notes", file_type="txt", created_at=None, content=text(*range(5))
+    )
+    pipeline.session_ids = [3]
+    
+    async def load(document_id):
+        return pipeline.document, pipeline.session_ids
+    
+    pipeline._load = load
+    yield pipeline
+    await pipeline.stop()
+
+
+async def chunks(pipeline):
+    return sorted(
+        await pipeline.vector_store.get_by_document_id(DOCUMENT_ID), key=lambda doc: doc.metadata["chunk_index"]
+    )
+
+
+async def test_create_indexes_every_chunk(pipeline):
+    status = await pipeline.ingest(DOCUMENT_ID)
+    
+    assert status["status"] == STATUS_COMPLETED
+    assert (status["chunks_indexed"], status["chunks_unchanged"], status["chunks_removed"]) == (5, 0, 0)
+    stored = await chunks(pipeline)
+    assert [doc.content for doc in stored] == [sentence(i) for i in range(5)]
+    assert stored[0].metadata["session_id"] == 3
+    assert all(doc.content == pipeline.document.content[doc.metadata["start"]:doc.metadata["end"]] for doc in stored)
+
+
+async def test_reingesting_unchanged_text_embeds_nothing(pipeline):
+    await pipeline.ingest(DOCUMENT_ID)
+    before = {doc.id: doc.metadata for doc in await chunks(pipeline)}
+    
+    status = await pipeline.ingest(DOCUMENT_ID)
+    
+    assert (status["chunks_indexed"], status["chunks_unchanged"], status["chunks_removed"]) == (0, 5, 0)
+    assert {doc.id: doc.metadata for doc in await chunks(pipeline)} == before
+
+
+async def test_update_embeds_new_chunks_moves_shifted_ones_and_drops_stale(pipeline):
+    await pipeline.ingest(DOCUMENT_ID)
+    ids = {doc.content: doc.id for doc in await chunks(pipeline)}
+    
+    # Insert a sentence at the front and drop the last one
+    pipeline.document.content = text(99, 0, 1, 2, 3)
+    status = await pipeline.ingest(DOCUMENT_ID)
+    
+    assert (status["chunks_indexed"], status["chunks_unchanged"], status["chunks_removed"]) == (1, 4, 1)
+    stored = await chunks(pipeline)
+    assert [doc.content for doc in stored] == [sentence(i) for i in (99, 0, 1, 2, 3)]
+    # Shifted chunks keep their ids, with offsets rewritten in place
+    assert [doc.id for doc in stored[1:]] == [ids[sentence(i)] for i in range(4)]
+    assert [doc.metadata["chunk_index"] for doc in stored] == list(range(5))
+    assert all(doc.content == pipeline.document.content[doc.metadata["start"]:doc.metadata["end"]] for doc in stored)
+
+
+async def test_metadata_change_rewrites_metadata_without_embedding(pipeline):
+    await pipeline.ingest(DOCUMENT_ID)
+    
+    pipeline.document.title = "Renamed"
+    pipeline.session_ids = [3, 4]
+    status = await pipeline.ingest(DOCUMENT_ID)
+    
+    assert (status["chunks_indexed"], status["chunks_unchanged"], status["chunks_removed"]) == (0, 5, 0)
+    for doc in await chunks(pipeline):
+        assert doc.metadata["title"] == "Renamed"
+        assert doc.metadata["session_ids"] == [3, 4]
+        assert "session_id" not in doc.metadata
+
+
+async def test_repeated_text_gets_distinct_ids(pipeline):
+    pipeline.document.content = text(1, 2, 1)
+    
+    status = await pipeline.ingest(DOCUMENT_ID)
+    
+    assert status["chunks_indexed"] == 3
+    assert len({doc.id for doc in await chunks(pipeline)}) == 3
+
+
+async def test_remove_deletes_chunks_and_status(pipeline):
+    await pipeline.ingest(DOCUMENT_ID)
+    
+    removed = await pipeline.remove(DOCUMENT_ID)
+    
+    assert removed == 5
+    assert await chunks(pipeline) == []
+    assert pipeline.get_status(DOCUMENT_ID) is None
+
+
+async def test_scheduled_remove_runs_in_the_background(pipeline):
+    await pipeline.ingest(DOCUMENT_ID)
+    
+    pipeline.schedule_remove(DOCUMENT_ID)
+    assert len(await chunks(pipeline)) == 5
+    await pipeline.stop()
+    
+    assert await chunks(pipeline) == []
+    assert pipeline.get_status(DOCUMENT_ID) is None
+
+
+async def test_scheduled_remove_failure_is_logged(pipeline, caplog):
+    async def fail(document_id):
+        raise ConnectionError("store unavailable")
+    
+    pipeline.vector_store.delete_by_document_id = fail
+    
+    pipeline.schedule_remove(DOCUMENT_ID)
+    await pipeline.stop()
+    
+    assert "Removing chunks of deleted document 7 failed: store unavailable" in caplog.text
+
+
+async def test_missing_document_fails(pipeline):
+    async def load(document_id):
+        return None
+    
+    pipeline._load = load
+    status = await pipeline.ingest(DOCUMENT_ID)
+    
+    assert status["status"] == STATUS_FAILED
+    assert "not found" in status["error"]
+
+
+async def test_locks_are_dropped_once_unused(pipeline):
+    release = asyncio.Event()
+    document, session_ids = pipeline.document, pipeline.session_ids
+    
+    async def slow_load(document_id):
+        await release.wait()
+        return document, session_ids
+    
+    pipeline._load = slow_load
+    first = asyncio.create_task(pipeline.ingest(DOCUMENT_ID))
+    second = asyncio.create_task(pipeline.ingest(DOCUMENT_ID))
+    await asyncio.sleep(0)
+    assert list(pipeline._locks) == [DOCUMENT_ID]
+    
+    release.set()
+    statuses = await asyncio.gather(first, second)
+    
+    assert [status["status"] for status in statuses] == [STATUS_COMPLETED, STATUS_COMPLETED]
+    assert pipeline._locks == {}
+    assert not pipeline._lock_users
+    
+    await pipeline.remove(DOCUMENT_ID)
+    assert pipeline._locks == {}
+
+
+async def test_finished_statuses_beyond_retention_are_dropped(pipeline):
+    pipeline.status_retention = 2
+    for document_id in (1, 2, 3):
+        await pipeline.ingest(document_id)
+    
+    assert pipeline.get_status(1) is None
+    assert pipeline.get_status(2)["status"] == STATUS_COMPLETED
+    assert pipeline.get_status(3)["status"] == STATUS_COMPLETED
+
+
+async def test_pending_statuses_are_not_dropped(pipeline):
+    pipeline.status_retention = 1
+    await pipeline.ingest(1)
+    pipeline._new_status(1)
+    
+    await pipeline.ingest(2)
+    await pipeline.ingest(3)
+    
+    assert pipeline.get_status(1)["status"] == STATUS_QUEUED
+    assert pipeline.get_status(2) is None
+    assert pipeline.get_status(3)["status"] == STATUS_COMPLETED
+
+
+async def test_compaction_measures_unless_forced(pipeline):
+    ratios, rebuilds = [], []
+    
+    async def tombstone_ratio():
+        ratios.append(0.05)
+        return 0.05
+    
+    async def rebuild_index():
+        rebuilds.append(True)
+    
+    pipeline.vector_store.get_tombstone_ratio = tombstone_ratio
+    pipeline.vector_store.rebuild_index = rebuild_index
+    
+    assert await pipeline.compact() is False
+    assert await pipeline.compact(force=True) is True
+    assert (len(ratios), len(rebuilds)) == (1, 1)
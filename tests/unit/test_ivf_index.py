@@ -0,0 +1,67 @@
+import numpy as np
+
+from app.ai_core.vectorstore.ivf_index import IVFIndex
+
+
+def vectors(count: int, dim: int = 8, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+
+def test_small_training_set_uses_fewer_cells_without_lowering_nlist():
+    index = IVFIndex(8, nlist=16, train_size=10**6)
+    index.add([f"doc-{i}" for i in range(5)], vectors(5))
+    
+    index.train()
+    
+    assert index.cells == 5
+    assert index.nlist == 16
+
+
+def test_retrain_after_growth_returns_to_configured_nlist():
+    index = IVFIndex(8, nlist=16, train_size=10**6)
+    index.add([f"doc-{i}" for i in range(5)], vectors(5))
+    index.train()
+    
+    index.add([f"doc-{i}" for i in range(5, 500)], vectors(495, seed=1))
+    index.train()
+    
+    assert index.cells == 16
+    assert len(index) == 500
+
+
+def test_search_with_all_cells_is_exact():
+    data = vectors(300)
+    index = IVFIndex(8, nlist=8, train_size=10**6)
+    index.add([f"doc-{i}" for i in range(300)], data)
+    index.train()
+    
+    query = data[42]
+    hits = index.search(query, 5, nprobe=index.cells)
+    
+    normalized = data / np.linalg.norm(data, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+    assert [doc_id for doc_id, _ in hits] == [f"doc-{i}" for i in expected]
+
+
+def test_single_adds_grow_the_slot_mask_by_doubling():
+    data = vectors(100)
+    index = IVFIndex(8, nlist=4, train_size=10**6)
+    capacities = set()
+    for i in range(100):
+        index.add([f"doc-{i}"], data[i:i + 1])
+        capacities.add(len(index._alive))
+    
+    assert capacities == {1, 2, 4, 8, 16, 32, 64, 128}
+    
+    # Overwrites and deletes tombstone slots; the spare capacity stays dead
+    index.add(["doc-0"], data[1:2])
+    index.delete(["doc-5"])
+    assert index.tombstones == 2
+    assert int(index._alive.sum()) == 99
+    hits = index.search(data[5], 3, nprobe=index.cells)
+    assert "doc-5" not in [doc_id for doc_id, _ in hits]
+    
+    index.compact()
+    index.add(["doc-100"], vectors(1, seed=2))
+    assert index.tombstones == 0
+    assert int(index._alive.sum()) == 100
@@ -0,0 +1,145 @@
+import math
+
+import pytest
+
+from app.ai_core.vectorstore.base import Document, reciprocal_rank_fusion
+from app.ai_core.vectorstore.lexical_index import BM25Index, tokenize
+
+
+def test_tokenize_keeps_compounds_and_their_parts():
+    assert tokenize("Error ERR-1234 in api/v1") == ["error", "err-1234", "err", "1234", "in", "api/v1", "api", "v1"]
+
+
+def test_add_and_remove_keep_corpus_statistics():
+    index = BM25Index()
+    index.add("a", "red apples and red pears")
+    index.add("b", "green pears")
+    
+    assert len(index) == 2
+    assert index._total_length == 7
+    assert index._postings["pears"] == {"a": 1, "b": 1}
+    assert index._postings["red"] == {"a": 2}
+    
+    index.remove("a")
+    
+    assert "a" not in index
+    assert index._total_length == 2
+    assert "red" not in index._postings
+    assert index._postings["pears"] == {"b": 1}
+    
+    index.remove("missing")
+    assert len(index) == 1
+
+
+def test_re_adding_replaces_previous_text():
+    index = BM25Index()
+    index.add("a", "old words")
+    index.add("a", "new text here")
+    
+    assert len(index) == 1
+    assert index._total_length == 3
+    assert index.search("old", 5) == []
+    assert [doc_id for doc_id, _ in index.search("new", 5)] == ["a"]
+
+
+def test_score_matches_bm25_formula():
+    index = BM25Index(k1=1.2, b=0.75)
+    index.add("a", "cat cat dog")
+    index.add("b", "dog bird")
+    
+    [(doc_id, score)] = index.search("cat", 5)
+    
+    idf = math.log(1 + (2 - 1 + 0.5) / (1 + 0.5))
+    norm = 1.2 * (1 - 0.75 + 0.75 * 3 / 2.5)
+    assert doc_id == "a"
+    assert score == pytest.approx(idf * 2 * 2.2 / (2 + norm))
+
+
+def test_rarer_terms_and_higher_frequency_rank_first():
+    index = BM25Index()
+    index.add_many([
+        ("common", "the report covers the budget"),
+        ("rare", "the report covers the zeppelin"),
+        ("twice", "budget budget overview"),
+    ])
+    
+    ranked = [doc_id for doc_id, _ in index.search("zeppelin budget", 3)]
+    
+    assert ranked[0] == "rare"
+    assert ranked.index("twice") < ranked.index("common")
+
+
+def test_candidates_restrict_scoring_without_changing_scores():
+    index = BM25Index()
+    index.add_many((f"doc-{i}", f"shared term {i}") for i in range(20))
+    full = dict(index.search("shared", 20))
+    
+    filtered = index.search("shared", 20, candidates={"doc-3", "doc-7", "unknown"})
+    
+    assert {doc_id for doc_id, _ in filtered} == {"doc-3", "doc-7"}
+    for doc_id, score in filtered:
+        assert score == pytest.approx(full[doc_id])
+    assert index.search("shared", 5, candidates=set()) == []
+
+
+def test_exact_compound_outranks_its_parts():
+    index = BM25Index()
+    index.add("exact", "failed with ERR-1234 on startup")
+    index.add("parts", "err 1234 appeared in two places")
+    
+    ranked = [doc_id for doc_id, _ in index.search("ERR-1234", 2)]
+    
+    assert ranked == ["exact", "parts"]
+
+
+def test_search_edge_cases():
+    index = BM25Index()
+    assert index.search("anything", 5) == []
+    
+    index.add("a", "some text")
+    assert index.search("text", 0) == []
+    assert index.search("absent", 5) == []
+
+
+def doc(doc_id: str) -> Document:
+    return Document(id=doc_id, content=doc_id, metadata={})
+
+
+def test_fusion_sums_weighted_reciprocal_ranks():
+    vector = [(doc("a"), 0.9), (doc("b"), 0.8)]
+    lexical = [(doc("b"), 12.0), (doc("c"), 3.0)]
+    
+    fused = reciprocal_rank_fusion([vector, lexical], weights=[1.0, 1.0], k=60)
+    
+    scores = {document.id: score for document, score in fused}
+    best = 2 / 61
+    assert [document.id for document, _ in fused] == ["b", "a", "c"]
+    assert scores["b"] == pytest.approx((1 / 62 + 1 / 61) / best)
+    assert scores["a"] == pytest.approx((1 / 61) / best)
+    assert scores["c"] == pytest.approx((1 / 62) / best)
+
+
+def test_fusion_weights_shift_the_order():
+    vector = [(doc("a"), 0.9), (doc("b"), 0.8)]
+    lexical = [(doc("b"), 12.0), (doc("a"), 3.0)]
+    
+    vector_heavy = reciprocal_rank_fusion([vector, lexical], weights=[0.8, 0.2], k=1)
+    lexical_heavy = reciprocal_rank_fusion([vector, lexical], weights=[0.2, 0.8], k=1)
+    
+    assert [document.id for document, _ in vector_heavy] == ["a", "b"]
+    assert [document.id for document, _ in lexical_heavy] == ["b", "a"]
+
+
+def test_fusion_top_score_is_one_when_ranked_first_everywhere():
+    ranking = [(doc("a"), 1.0), (doc("b"), 0.5)]
+    
+    fused = reciprocal_rank_fusion([ranking, ranking], weights=[0.7, 0.3])
+    
+    assert fused[0][0].id == "a"
+    assert fused[0][1] == pytest.approx(1.0)
+
+
+def test_fusion_with_zero_weights_does_not_divide_by_zero():
+    fused = reciprocal_rank_fusion([[(doc("a"), 1.0)]], weights=[0.0])
+    
+    assert fused == [(fused[0][0], 0.0)]
@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.ai_core.llm.base import BaseLLMProvider
+from app.ai_core.llm.circuit_breaker import CircuitState
+from app.config.settings import settings
+
+
+class CountingProvider(BaseLLMProvider):
+    """Answers every prompt and counts the requests that reach the endpoint."""
+    
+    supports_native_batch = True
+    
+    def __init__(self, fail_first: int = 0, delay: float = 0.0):
+        super().__init__(
+            f"model-{uuid.uuid4().hex[:8]}", enable_guardrail=False, enable_circuit_breaker=True, max_retries=2
+        )
+        self.calls = 0
+        self.fail_first = fail_first
+        self.delay = delay
+        self.batches = 0
+    
+    def _initialize_client(self):
+        return None
+    
+    async def _ainvoke_internal(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.calls <= self.fail_first:
+            raise ConnectionError("endpoint unavailable")
+        return AIMessage(content="ok")
+    
+    def _invoke_internal(self, messages):
+        raise NotImplementedError
+    
+    async def _abatch_internal(self, batch, max_concurrency):
+        self.batches += 1
+        return await super()._abatch_internal(batch, max_concurrency)
+
+
+@pytest.fixture(autouse=True)
+def no_metering(monkeypatch):
+    monkeypatch.setattr(settings, "USAGE_METERING_ENABLED", False)
+
+
+def prompts(count: int):
+    return [[HumanMessage(content=f"prompt {i}")] for i in range(count)]
+
+
+async def test_closed_breaker_sends_one_native_batch():
+    provider = CountingProvider()
+    
+    results = await provider.abatch(prompts(4), use_native=True)
+    
+    assert all(result["success"] for result in results)
+    assert (provider.batches, provider.calls) == (1, 4)
+
+
+async def test_failed_native_items_are_retried_one_by_one():
+    provider = CountingProvider(fail_first=1)
+    
+    results = await provider.abatch(prompts(3), use_native=True, max_concurrency=1)
+    
+    assert all(result["success"] for result in results)
+    assert (provider.batches, provider.calls) == (1, 4)
+
+
+async def test_half_open_breaker_only_lets_probe_calls_through():
+    # Slow probes keep every item in flight together, so the limit is what stops them
+    provider = CountingProvider(delay=0.05)
+    breaker = provider.circuit_breaker
+    breaker.open_seconds = 0.0
+    breaker._transition(CircuitState.OPEN)
+    assert breaker.state == CircuitState.HALF_OPEN
+    
+    results = await provider.abatch(prompts(5), use_native=True, max_concurrency=5)
+    
+    assert provider.batches == 0
+    assert provider.calls == breaker.half_open_max_calls
+    assert sum(result["success"] for result in results) == breaker.half_open_max_calls
+    assert {result["error_type"] for result in results if not result["success"]} == {"CircuitOpenException"}
+    assert breaker.state == CircuitState.CLOSED
@@ -0,0 +1,134 @@
+import pytest
+
+from app.ai_core.vectorstore.base import Document
+from app.ai_core.vectorstore.chunking import chunk_text, estimate_tokens
+from app.ai_core.vectorstore.packing import GAP_MARKER, pack_context, section_header
+
+SOURCE = " ".join(f"Fact number {i} about the system." for i in range(40))
+
+
+def piece(start: int, end: int, document_id: int = 1, title: str = "Manual") -> Document:
+    """Chunk of SOURCE with ingestion-style offset metadata."""
+    return Document(
+        id=f"{document_id}-{start}-{end}",
+        content=SOURCE[start:end],
+        metadata={"document_id": document_id, "title": title, "start": start, "end": end},
+    )
+
+
+def sentence_bounds(i: int):
+    start = SOURCE.index(f"Fact number {i} ")
+    return start, start + len(f"Fact number {i} about the system.")
+
+
+def test_overlapping_chunks_merge_without_repeating_text():
+    chunks = list(chunk_text(SOURCE, chunk_tokens=30, overlap_tokens=10))
+    documents = [(piece(chunk["start"], chunk["end"]), 1.0 - i / 100) for i, chunk in enumerate(chunks[:3])]
+    
+    packed = pack_context(documents, budget_tokens=10_000)
+    
+    [section] = packed["sections"]
+    assert section["content"] == SOURCE[chunks[0]["start"]:chunks[2]["end"]]
+    assert GAP_MARKER not in packed["text"]
+    assert packed["chunks_used"] == 3
+    assert section["chunk_ids"] == [doc.id for doc, _ in documents]
+
+
+def test_adjacent_chunks_merge_in_document_order():
+    first, second = sentence_bounds(3), sentence_bounds(4)
+    # Retrieved out of order, touching at one offset (the space belongs to the second)
+    documents = [(piece(first[1], second[1]), 0.9), (piece(first[0], first[1]), 0.8)]
+    
+    packed = pack_context(documents, budget_tokens=10_000)
+    
+    assert packed["sections"][0]["content"] == SOURCE[first[0]:second[1]]
+
+
+def test_contained_chunk_is_skipped():
+    outer = (sentence_bounds(5)[0], sentence_bounds(7)[1])
+    inner = sentence_bounds(6)
+    
+    packed = pack_context([(piece(*outer), 0.9), (piece(*inner), 0.8)], budget_tokens=10_000)
+    
+    assert packed["sections"][0]["content"] == SOURCE[outer[0]:outer[1]]
+    assert packed["chunks_used"] == 1
+
+
+def test_chunk_containing_a_taken_span_keeps_its_head():
+    inner = sentence_bounds(6)
+    outer = (sentence_bounds(5)[0], sentence_bounds(7)[1])
+    
+    packed = pack_context([(piece(*inner), 0.9), (piece(*outer), 0.8)], budget_tokens=10_000)
+    
+    assert packed["sections"][0]["content"] == SOURCE[outer[0]:inner[1]]
+    assert packed["chunks_used"] == 2
+
+
+def test_non_adjacent_chunks_are_joined_with_gap_marker():
+    far, near = sentence_bounds(20), sentence_bounds(2)
+    
+    packed = pack_context([(piece(*far), 0.9), (piece(*near), 0.8)], budget_tokens=10_000)
+    
+    [section] = packed["sections"]
+    assert section["content"] == SOURCE[near[0]:near[1]] + GAP_MARKER + SOURCE[far[0]:far[1]]
+    assert packed["text"].count(section_header(1, 0.9, "Manual")) == 1
+
+
+def test_documents_get_one_section_each_in_order_of_best_chunk():
+    documents = [
+        (piece(*sentence_bounds(1), document_id=2, title="Guide"), 0.9),
+        (piece(*sentence_bounds(8)), 0.8),
+        (piece(*sentence_bounds(2), document_id=2, title="Guide"), 0.7),
+    ]
+    
+    packed = pack_context(documents, budget_tokens=10_000)
+    
+    assert [section["source"] for section in packed["sections"]] == ["2", "1"]
+    assert packed["text"].startswith(section_header(1, 0.9, "Guide"))
+    assert section_header(2, 0.8, "Manual") in packed["text"]
+
+
+def test_chunks_without_offsets_are_kept_whole():
+    documents = [
+        (Document(id="a", content="Alpha text.", metadata={"document_id": 1}), 0.9),
+        (Document(id="b", content="Beta text.", metadata={"document_id": 1}), 0.8),
+    ]
+    
+    packed = pack_context(documents, budget_tokens=10_000)
+    
+    assert packed["sections"][0]["content"] == "Alpha text." + GAP_MARKER + "Beta text."
+
+
+@pytest.mark.parametrize("budget", [45, 80, 150, 400])
+def test_packed_text_stays_within_budget_including_headers(budget):
+    chunks = list(chunk_text(SOURCE, chunk_tokens=30, overlap_tokens=5))
+    documents = [
+        (piece(chunk["start"], chunk["end"], document_id=1 + i % 3, title=f"Doc {i % 3}"), 1.0 - i / 100)
+        for i, chunk in enumerate(chunks)
+    ]
+    
+    packed = pack_context(documents, budget_tokens=budget, min_chunk_tokens=8)
+    
+    assert packed["token_count"] == estimate_tokens(packed["text"])
+    assert packed["token_count"] <= budget
+    assert packed["chunks_used"] > 0
+
+
+def test_oversized_chunk_is_trimmed_to_whole_sentences():
+    chunk = piece(0, sentence_bounds(9)[1])
+    
+    packed = pack_context([(chunk, 1.0)], budget_tokens=40, min_chunk_tokens=8)
+    
+    content = packed["sections"][0]["content"]
+    assert packed["chunks_trimmed"] == 1
+    assert SOURCE.startswith(content)
+    assert content.endswith("system.")
+    assert packed["token_count"] <= 40
+
+
+def test_remainder_below_minimum_is_left_empty():
+    packed = pack_context([(piece(0, len(SOURCE)), 1.0)], budget_tokens=40, min_chunk_tokens=64)
+    
+    assert packed["text"] == ""
+    assert packed["token_count"] == 0
+    assert packed["chunks_used"] == 0
@@ -0,0 +1,71 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai_core.agents.rag_agent import agent as rag_module
+from app.ai_core.agents.rag_agent.agent import RAGAgent
+from app.ai_core.vectorstore.memory_store import InMemoryVectorStore
+from app.config.settings import settings
+
+
+class RecordingStore(InMemoryVectorStore):
+    """Returns no results and records the filter of every search."""
+    
+    def __init__(self):
+        super().__init__({"embedding_dimension": 8, "retrieval_cache_size": 0})
+        self.filters = []
+    
+    async def multi_query_rankings(self, queries, k, filter_dict=None, **kwargs):
+        self.filters.append(filter_dict)
+        return [[] for _ in queries]
+
+
+class PlanningLLM:
+    """Reasoning call answering with a plan that has sub-queries and filters."""
+    
+    async def ainvoke(self, messages):
+        plan = {"intent": "lookup", "analysis": "", "sub_queries": ["other topic"], "filters": {"tags": ["report"]}}
+        return SimpleNamespace(content=json.dumps(plan))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RecordingStore()
+    monkeypatch.setattr(settings, "ENABLE_CHECKPOINTER", False)
+    monkeypatch.setattr(rag_module, "create_vector_store", lambda config=None: store)
+    return store
+
+
+async def test_streamed_retrieval_is_scoped(store):
+    agent = RAGAgent({"llm_provider": "fake", "retrieval_scope": "user"})
+    agent.reasoning_llm = PlanningLLM()
+    
+    tokens = [token async for token in agent.execute_stream("what is x?", session_id="5", user_id=2)]
+    
+    assert tokens
+    scope = {"session_id": 5, "user_id": 2}
+    # Raw-query retrieval, then the plan's sub-query with its filters
+    assert store.filters[0] == {"scope": scope}
+    assert store.filters[1] == {"tags": ["report"], "scope": scope}
+
+
+async def test_execute_and_stream_start_from_the_same_state(store):
+    agent = RAGAgent({"llm_provider": "fake", "retrieval_scope": "session"})
+    
+    state = agent._build_message_state("question", session_id="9", user_id=3, history=[
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ])
+    
+    assert state["metadata_filter"] == {"scope": {"session_id": 9}}
+    assert [message.content for message in state["messages"]] == ["hi", "hello", "question"]
+
+
+async def test_plan_keeps_up_to_the_configured_sub_queries(store, monkeypatch):
+    monkeypatch.setattr(settings, "RAG_MAX_SUB_QUERIES", 5)
+    agent = RAGAgent({"llm_provider": "fake"})
+    
+    reasoning = agent._parse_reasoning(json.dumps({"sub_queries": [f"query {i}" for i in range(7)]}))
+    
+    assert reasoning["sub_queries"] == [f"query {i}" for i in range(5)]
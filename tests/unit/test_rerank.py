@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from app.ai_core.vectorstore.base import Document
+from app.ai_core.vectorstore.rerank import Reranker, maximal_marginal_relevance
+
+# 0 and 1 are near-duplicates; 2 and 3 point elsewhere
+EMBEDDINGS = np.array([
+    [1.0, 0.0, 0.0],
+    [0.99, 0.1, 0.0],
+    [0.6, 0.8, 0.0],
+    [0.0, 0.0, 1.0],
+], dtype=np.float32)
+RELEVANCE = np.array([1.0, 0.95, 0.6, 0.1], dtype=np.float32)
+
+
+def test_lambda_one_ranks_by_relevance():
+    assert maximal_marginal_relevance(RELEVANCE, EMBEDDINGS, 4, lambda_mult=1.0) == [0, 1, 2, 3]
+
+
+def test_lambda_zero_ranks_by_diversity_after_the_most_relevant():
+    selected = maximal_marginal_relevance(RELEVANCE, EMBEDDINGS, 4, lambda_mult=0.0)
+    
+    assert selected[:2] == [0, 3]
+    assert selected[-1] == 1
+
+
+def test_balanced_lambda_skips_redundant_candidate():
+    assert maximal_marginal_relevance(RELEVANCE, EMBEDDINGS, 2, lambda_mult=0.5) == [0, 3]
+
+
+def test_duplicate_threshold_drops_near_duplicates():
+    selected = maximal_marginal_relevance(RELEVANCE, EMBEDDINGS, 4, lambda_mult=1.0, duplicate_threshold=0.95)
+    
+    assert selected == [0, 2, 3]
+
+
+def test_default_threshold_drops_exact_duplicates():
+    embeddings = np.array([[1.0, 2.0], [1.0, 2.0], [2.0, -1.0]], dtype=np.float32)
+    
+    selected = maximal_marginal_relevance(np.array([1.0, 0.9, 0.5]), embeddings, 3, lambda_mult=1.0)
+    
+    assert selected == [0, 2]
+
+
+def test_k_larger_than_candidates_returns_each_once():
+    selected = maximal_marginal_relevance(RELEVANCE, EMBEDDINGS, 10)
+    
+    assert sorted(selected) == [0, 1, 2, 3]
+
+
+def test_empty_inputs():
+    assert maximal_marginal_relevance(np.array([]), np.zeros((0, 3)), 5) == []
+    assert maximal_marginal_relevance(RELEVANCE, EMBEDDINGS, 0) == []
+
+
+def test_equal_relevance_and_zero_vectors_are_handled():
+    embeddings = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    
+    selected = maximal_marginal_relevance(np.array([0.5, 0.5, 0.5]), embeddings, 3)
+    
+    assert sorted(selected) == [0, 1, 2]
+
+
+class FakeEmbeddings:
+    async def embed_documents(self, texts):
+        return [EMBEDDINGS[int(text)].tolist() for text in texts]
+
+
+class ReverseScorer:
+    async def score(self, query, documents):
+        return [float(doc.id) for doc in documents]
+
+
+def candidates():
+    return [(Document(id=str(i), content=str(i), metadata={}), float(RELEVANCE[i])) for i in range(4)]
+
+
+async def test_reranker_uses_retrieval_scores_and_drops_duplicates():
+    reranker = Reranker(FakeEmbeddings(), lambda_mult=1.0, duplicate_threshold=0.95)
+    
+    results = await reranker.rerank("query", candidates(), top_n=3)
+    
+    assert [doc.id for doc, _ in results] == ["0", "2", "3"]
+    assert results[0][1] == pytest.approx(1.0)
+
+
+async def test_reranker_prefers_scorer_relevance():
+    reranker = Reranker(FakeEmbeddings(), scorer=ReverseScorer(), lambda_mult=1.0, duplicate_threshold=1.0)
+    
+    results = await reranker.rerank("query", candidates(), top_n=2)
+    
+    assert [doc.id for doc, _ in results] == ["3", "2"]
+    assert [score for _, score in results] == [3.0, 2.0]
@@ -0,0 +1,63 @@
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.ai_core.vectorstore.base import Document
+from app.ai_core.vectorstore.memory_store import InMemoryVectorStore
+from app.ai_core.vectorstore.retrieval_cache import invalidate_retrieval_caches
+from app.database.session import on_commit
+
+
+def store(collection: str) -> InMemoryVectorStore:
+    return InMemoryVectorStore({"collection_name": collection, "embedding_dimension": 8, "retrieval_cache_size": 16})
+
+
+async def test_cache_is_shared_across_instances_and_invalidated_by_writes():
+    collection = f"cache-{uuid.uuid4().hex[:8]}"
+    writer, reader = store(collection), store(collection)
+    await writer.add_documents([Document(id="a", content="alpha report", metadata={})])
+    assert reader.retrieval_cache is writer.retrieval_cache
+    
+    first = await writer.multi_query_rankings(["alpha"], k=3)
+    cached = await reader.multi_query_rankings(["alpha"], k=3)
+    
+    assert cached == first
+    assert reader.retrieval_cache.get_stats()["hits"] == 1
+    
+    await writer.delete_by_ids(["a"])
+    after_delete = await reader.multi_query_rankings(["alpha"], k=3)
+    
+    assert after_delete == [[]]
+    assert reader.retrieval_cache.get_stats()["misses"] == 2
+
+
+async def test_collections_have_separate_caches():
+    assert store(f"cache-{uuid.uuid4().hex[:8]}").retrieval_cache is not store("other").retrieval_cache
+
+
+async def test_membership_changes_invalidate_every_cache():
+    cache = store(f"cache-{uuid.uuid4().hex[:8]}").retrieval_cache
+    version = cache.version
+    
+    invalidate_retrieval_caches()
+    
+    assert cache.version == version + 1
+
+
+async def test_on_commit_runs_only_after_commit():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    calls = []
+    async with AsyncSession(engine) as session:
+        await session.execute(text("SELECT 1"))
+        on_commit(session, lambda: calls.append("rolled back"))
+        await session.rollback()
+        
+        await session.execute(text("SELECT 1"))
+        on_commit(session, lambda: calls.append("committed"))
+        assert calls == []
+        await session.commit()
+        await session.commit()
+    await engine.dispose()
+    
+    assert calls == ["committed"]